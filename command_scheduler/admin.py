@@ -0,0 +1,87 @@
+from django.contrib import admin, messages
+from django.utils.translation import gettext_lazy as _, ngettext
+from .jobs import retry_jobs
+from .models import (
+    CommandLease,
+    CommandRunState,
+    Job,
+    ShardedRun,
+    ShardRun,
+)
+
+
+@admin.register(CommandRunState)
+class CommandRunStateAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "schedule",
+        "next_run_at",
+        "last_started_at",
+        "last_status",
+        "last_duration",
+    )
+    list_filter = ("last_status",)
+    ordering = ("next_run_at",)
+
+
+@admin.register(CommandLease)
+class CommandLeaseAdmin(admin.ModelAdmin):
+    list_display = ("name", "holder", "token", "expires_at")
+    ordering = ("name",)
+
+
+class ShardRunInline(admin.TabularInline):
+    model = ShardRun
+    fields = (
+        "index",
+        "status",
+        "attempts",
+        "holder",
+        "started_at",
+        "finished_at",
+        "duration",
+        "exit_code",
+    )
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(ShardedRun)
+class ShardedRunAdmin(admin.ModelAdmin):
+    list_display = ("name", "shards", "status", "started_at", "finished_at")
+    list_filter = ("name", "status")
+    ordering = ("-started_at",)
+    inlines = (ShardRunInline,)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "task",
+        "queue",
+        "priority",
+        "status",
+        "attempts",
+        "run_at",
+        "finished_at",
+    )
+    list_filter = ("status", "queue", "task")
+    search_fields = ("task",)
+    ordering = ("-id",)
+    actions = ("retry",)
+
+    @admin.action(description=_("Retry selected jobs"))
+    def retry(self, request, queryset):
+        retried = retry_jobs(queryset)
+        self.message_user(
+            request,
+            ngettext(
+                "%d job was queued again.",
+                "%d jobs were queued again.",
+                retried,
+            )
+            % retried,
+            messages.SUCCESS,
+        )
@@ -0,0 +1,107 @@
+"""
+Minimal cron expressions.
+
+Supports the five standard fields (minute, hour, day of month, month and
+day of week) with ``*``, values, ranges, lists and ``/`` steps, plus the
+``@hourly``, ``@daily``, ``@weekly``, ``@monthly`` and ``@yearly``
+aliases. As in cron, a day matches either restricted day field when both
+are restricted.
+"""
+
+from datetime import datetime, timedelta
+
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+# (minimum, maximum) of each field
+BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# Every possible match is found within this many years
+MAX_YEARS = 8
+
+
+class CronError(ValueError):
+    pass
+
+
+def _parse_field(field, minimum, maximum):
+    values = set()
+    for part in field.split(","):
+        expression, _, step = part.partition("/")
+        try:
+            step = int(step) if step else 1
+            if expression == "*":
+                start, end = minimum, maximum
+            elif "-" in expression:
+                start, end = map(int, expression.split("-"))
+            else:
+                start = int(expression)
+                end = maximum if step > 1 else start
+        except ValueError:
+            raise CronError(f"Invalid cron field: {field!r}")
+        if not minimum <= start <= end <= maximum or step < 1:
+            raise CronError(f"Invalid cron field: {field!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Cron:
+    def __init__(self, expression):
+        self.expression = expression
+        fields = ALIASES.get(expression, expression).split()
+        if len(fields) != 5:
+            raise CronError(f"Expected 5 cron fields: {expression!r}")
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            weekdays,
+        ) = (
+            _parse_field(field, *bounds)
+            for field, bounds in zip(fields, BOUNDS)
+        )
+        # Cron counts weekdays from Sunday (0 or 7), Python from Monday
+        self.weekdays = {(weekday - 1) % 7 for weekday in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _matches_day(self, value):
+        day = value.day in self.days
+        weekday = value.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, value):
+        """
+        Get the first matching time after the given naive time.
+
+        Raises:
+            CronError: If nothing matches, like on February 30.
+        """
+        value = value.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = value.replace(year=value.year + MAX_YEARS)
+        while value < limit:
+            if value.month not in self.months:
+                year, month = divmod(value.month, 12)
+                value = datetime(value.year + year, month + 1, 1)
+            elif not self._matches_day(value):
+                value = datetime(value.year, value.month, value.day)
+                value += timedelta(days=1)
+            elif value.hour not in self.hours:
+                value = value.replace(minute=0) + timedelta(hours=1)
+            elif value.minute not in self.minutes:
+                value += timedelta(minutes=1)
+            else:
+                return value
+        raise CronError(f"Cron never matches: {self.expression!r}")
+
+    def __str__(self):
+        return self.expression
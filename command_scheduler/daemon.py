@@ -0,0 +1,143 @@
+"""
+Resident scheduler.
+
+Boots Django once and keeps ticking: it sleeps until the next command is
+due, claims the due commands and runs them in the background, in forked
+children of the warm process or in the process itself. A command still
+running when it's due again is left due until it finishes.
+
+SIGTERM and SIGINT stop claiming commands and exit once the running ones
+finish. SIGHUP does the same and then re-executes the process, which
+picks up changed settings and code.
+
+Several daemons can run against the same database: a command's lease goes
+to one of them, and the others take it over if that one dies.
+"""
+
+import os
+import signal
+import sys
+import threading
+from contextlib import nullcontext
+from django.db import close_old_connections
+from django.utils import timezone
+from .runner import group_commands, run_commands
+from .schedules import (
+    claim_due_commands,
+    get_next_due_time,
+    get_schedule_name,
+    record_results,
+    sync_run_states,
+)
+
+
+# Settings and other nodes may change the schedule in the meantime
+MAX_SLEEP_SECONDS = 60
+
+
+class SchedulerDaemon:
+    def __init__(
+        self,
+        command_configs,
+        workers=None,
+        timeout=None,
+        in_process=False,
+        report=None,
+        holder=None,
+        shard_limit=None,
+    ):
+        self.command_configs = command_configs
+        self.timeout = timeout
+        self.in_process = in_process
+        self.holder = holder
+        self.shard_limit = shard_limit
+        self.report = report or (lambda results, summaries=(): None)
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._reload = False
+        self._lock = threading.Lock()
+        self._slots = (
+            threading.Semaphore(workers) if workers else nullcontext()
+        )
+        self._running = set()
+        self._threads = []
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+        self._wakeup.set()
+
+    def _handle_reload(self, signum, frame):
+        self._reload = True
+        self._handle_stop(signum, frame)
+
+    def _run(self, group, names):
+        try:
+            with self._slots:
+                results = run_commands(
+                    group, timeout=self.timeout, in_process=self.in_process
+                )
+            summaries = record_results(results)
+            self.report(results, summaries=summaries)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._running -= names
+            # Commands left due while running may be claimed now
+            self._wakeup.set()
+
+    def tick(self):
+        """Start the due commands and get when to tick next."""
+        close_old_connections()
+        now = timezone.now()
+        sync_run_states(self.command_configs, now)
+        with self._lock:
+            running = set(self._running)
+        due_commands = claim_due_commands(
+            self.command_configs,
+            now,
+            exclude=running,
+            holder=self.holder,
+            shard_limit=self.shard_limit,
+        )
+        self._threads = [
+            thread for thread in self._threads if thread.is_alive()
+        ]
+        # Each group runs on its own, so short commands aren't held up
+        for group in group_commands(due_commands):
+            names = {
+                get_schedule_name(command_config) for command_config in group
+            }
+            with self._lock:
+                self._running |= names
+            thread = threading.Thread(target=self._run, args=(group, names))
+            thread.start()
+            self._threads.append(thread)
+
+        with self._lock:
+            running = set(self._running)
+        next_due_at = get_next_due_time(
+            self.command_configs,
+            exclude=running,
+            holder=self.holder,
+            shard_limit=self.shard_limit,
+        )
+        close_old_connections()
+        if next_due_at is None:
+            return MAX_SLEEP_SECONDS
+        seconds = (next_due_at - timezone.now()).total_seconds()
+        return min(max(seconds, 0), MAX_SLEEP_SECONDS)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        while not self._stopping:
+            sleep = self.tick()
+            self._wakeup.wait(sleep)
+            self._wakeup.clear()
+
+        for thread in self._threads:
+            thread.join()
+        if self._reload:
+            os.execv(sys.executable, [sys.executable, *sys.argv])
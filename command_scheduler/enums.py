@@ -5,3 +5,40 @@ class ScheduleType(Enum):
     DAILY = "daily"
     WEEKLY = "weekly"
     MONTHLY = "monthly"
+    CRON = "cron"
+    INTERVAL = "interval"
+
+
+class CatchUp(Enum):
+    # Run once for any number of missed runs
+    LATEST = "latest"
+    # Run once per missed run, up to MAX_CATCH_UP_RUNS
+    ALL = "all"
+    # Don't run if the run was missed by more than MISSED_AFTER
+    SKIP = "skip"
+
+
+class RunStatus(Enum):
+    SUCCESS = "success"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    # Stopped as its lease couldn't be renewed
+    LOST = "lost"
+
+
+class ShardStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    # Same as RunStatus
+    SUCCESS = "success"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    LOST = "lost"
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    # Failed every attempt, kept for inspection
+    DEAD = "dead"
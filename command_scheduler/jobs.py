@@ -0,0 +1,249 @@
+"""
+Background jobs stored in the database.
+
+Functions decorated with @task are enqueued as Job rows, in the same
+transaction as the request enqueuing them, and run by the workers of the
+run_workers command. Workers claim the first due jobs by priority with
+SELECT ... FOR UPDATE SKIP LOCKED, so they never wait for each other.
+
+A failed job is retried with exponential backoff until it runs out of
+attempts and is dead. A job whose worker died is given up on after
+LOCK_SECONDS and retried, so tasks must be safe to run more than once.
+The lock of each claimed job is extended right before it runs, and a job
+given up on while it waited in its batch is skipped.
+"""
+
+import random
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .enums import JobStatus
+from .models import Job
+
+
+# Longest a job may wait in its batch, or run once started
+LOCK_SECONDS = 5 * 60
+RETRY_BASE_SECONDS = 10
+MAX_RETRY_SECONDS = 60 * 60
+SUCCEEDED_RETENTION = timedelta(days=1)
+
+TASKS = {}
+
+
+class Task:
+    def __init__(self, func, name, queue, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs):
+        """Enqueue a run of the task with the given JSON arguments."""
+        return enqueue(self.name, args, kwargs)
+
+    def __repr__(self):
+        return f"<Task {self.name}>"
+
+
+def task(name=None, queue="default", priority=0, max_attempts=5):
+    """
+    Register a function as a task that can be enqueued.
+
+    Usage:
+        @task(priority=10)
+        def send_sms(phone, message):
+            ...
+
+        send_sms.enqueue(phone, message)
+    """
+
+    def decorator(func):
+        registered = Task(
+            func,
+            name or f"{func.__module__}.{func.__qualname__}",
+            queue,
+            priority,
+            max_attempts,
+        )
+        TASKS[registered.name] = registered
+        return registered
+
+    return decorator
+
+
+def enqueue(
+    name, args=(), kwargs=None, priority=None, queue=None, run_at=None
+):
+    """
+    Enqueue a run of a registered task.
+
+    Runs it right away instead when JOBS_RUN_INLINE is set.
+    """
+    registered = TASKS[name]
+    kwargs = kwargs or {}
+    if getattr(settings, "JOBS_RUN_INLINE", False):
+        registered(*args, **kwargs)
+        return None
+    return Job.objects.create(
+        task=name,
+        args=list(args),
+        kwargs=kwargs,
+        queue=queue or registered.queue,
+        priority=registered.priority if priority is None else priority,
+        max_attempts=registered.max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def claim_jobs(worker, queues=None, limit=1, now=None):
+    """
+    Lock the first due jobs of the queues for a worker.
+
+    Returns:
+        list: Claimed jobs, by priority and due time.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due_jobs = Job.objects.select_for_update(skip_locked=True).filter(
+            status=JobStatus.QUEUED.value, run_at__lte=now
+        )
+        if queues:
+            due_jobs = due_jobs.filter(queue__in=queues)
+        ids = list(
+            due_jobs.order_by("-priority", "run_at", "id").values_list(
+                "id", flat=True
+            )[:limit]
+        )
+        if not ids:
+            return []
+        # Without row locks, like on SQLite, the status check settles races
+        Job.objects.filter(pk__in=ids, status=JobStatus.QUEUED.value).update(
+            status=JobStatus.RUNNING.value,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=LOCK_SECONDS),
+            started_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        Job.objects.filter(
+            pk__in=ids,
+            status=JobStatus.RUNNING.value,
+            locked_by=worker,
+            started_at=now,
+        ).order_by("-priority", "run_at", "id")
+    )
+
+
+def get_retry_delay(attempts):
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAX_RETRY_SECONDS)
+    # Spread out the retries of jobs that failed together
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def _get_claim(job):
+    # Matches only while the job is still ours, in case it was given up on
+    return Job.objects.filter(
+        pk=job.pk,
+        status=JobStatus.RUNNING.value,
+        locked_by=job.locked_by,
+        attempts=job.attempts,
+    )
+
+
+def _finish(job, error, now):
+    if error is None:
+        status = JobStatus.SUCCEEDED
+        changes = {"finished_at": now, "last_error": ""}
+    elif job.attempts < job.max_attempts:
+        status = JobStatus.QUEUED
+        changes = {
+            "run_at": now + get_retry_delay(job.attempts),
+            "last_error": error,
+        }
+    else:
+        status = JobStatus.DEAD
+        changes = {"finished_at": now, "last_error": error}
+    _get_claim(job).update(
+        status=status.value, locked_by="", locked_until=None, **changes
+    )
+    return status
+
+
+def run_job(job):
+    """
+    Run a claimed job and save how it went.
+
+    The job is skipped if it was given up on since it was claimed.
+
+    Returns:
+        tuple: New status of the job, or None if it was skipped, and run
+            duration in seconds.
+    """
+    locked_until = timezone.now() + timedelta(seconds=LOCK_SECONDS)
+    if not _get_claim(job).update(locked_until=locked_until):
+        return None, 0
+    job.locked_until = locked_until
+    started = time.perf_counter()
+    registered = TASKS.get(job.task)
+    error = None
+    if registered is None:
+        error = f"Unknown task: {job.task}"
+    else:
+        try:
+            registered(*job.args, **job.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+    duration = time.perf_counter() - started
+    return _finish(job, error, timezone.now()), duration
+
+
+def requeue_abandoned_jobs(now=None):
+    """Retry the running jobs whose worker didn't finish them in time."""
+    now = now or timezone.now()
+    abandoned = Job.objects.filter(
+        status=JobStatus.RUNNING.value, locked_until__lt=now
+    )
+    error = "Worker stopped before finishing the job"
+    dead = abandoned.filter(attempts__gte=F("max_attempts")).update(
+        status=JobStatus.DEAD.value,
+        locked_by="",
+        locked_until=None,
+        finished_at=now,
+        last_error=error,
+    )
+    requeued = abandoned.update(
+        status=JobStatus.QUEUED.value,
+        locked_by="",
+        locked_until=None,
+        run_at=now,
+        last_error=error,
+    )
+    return requeued, dead
+
+
+def retry_jobs(queryset, now=None):
+    """Queue the given jobs again, with fresh attempts."""
+    return queryset.exclude(status=JobStatus.RUNNING.value).update(
+        status=JobStatus.QUEUED.value,
+        attempts=0,
+        run_at=now or timezone.now(),
+        finished_at=None,
+    )
+
+
+def prune_jobs(now=None):
+    """Delete the jobs that succeeded before SUCCEEDED_RETENTION."""
+    now = now or timezone.now()
+    deleted, _ = Job.objects.filter(
+        status=JobStatus.SUCCEEDED.value,
+        finished_at__lt=now - SUCCEEDED_RETENTION,
+    ).delete()
+    return deleted
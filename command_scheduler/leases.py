@@ -0,0 +1,138 @@
+"""
+Leases of scheduled commands across scheduler nodes.
+
+A node runs a command only while it holds the command's lease, which it
+renews while the command runs and releases when it's done. A lease that
+wasn't renewed in time can be taken over, so a dead node holds up its
+commands for at most LEASE_SECONDS. A lease that expired while held was
+abandoned mid-run, and the node taking it over runs the command again.
+
+Each acquisition increases the lease's fencing token. Commands call
+check_lease inside the transaction of each step, before committing it:
+the lease row stays locked until the step commits, so a step commits only
+if its token is still current, and stops the command otherwise.
+"""
+
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import CommandLease
+
+
+LEASE_SECONDS = 60
+RENEW_SECONDS = LEASE_SECONDS / 3
+
+NODE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Lease of the command running in this thread
+_current = threading.local()
+
+
+class LeaseLost(Exception):
+    def __init__(self, name):
+        self.name = name
+        super().__init__(f"Lease of {name} was taken over")
+
+
+def acquire_lease(name, holder=None, now=None):
+    """
+    Take the lease of a command if it's free or expired.
+
+    Returns:
+        tuple: Fencing token, or None if another node holds the lease,
+            and whether the previous holder abandoned it.
+    """
+    holder = holder or NODE_ID
+    now = now or timezone.now()
+    CommandLease.objects.bulk_create(
+        [CommandLease(name=name, expires_at=now)], ignore_conflicts=True
+    )
+    lease = CommandLease.objects.filter(name=name)
+    previous = lease.values("holder", "token").get()
+    # The token changes on every acquisition, so only one node wins
+    acquired = lease.filter(
+        Q(holder="") | Q(expires_at__lt=now), token=previous["token"]
+    ).update(
+        holder=holder,
+        token=F("token") + 1,
+        expires_at=now + timedelta(seconds=LEASE_SECONDS),
+    )
+    if not acquired:
+        return None, False
+    return previous["token"] + 1, previous["holder"] != ""
+
+
+def renew_lease(name, token, holder=None):
+    """Extend a held lease. Returns whether it's still held."""
+    return bool(
+        CommandLease.objects.filter(
+            name=name, holder=holder or NODE_ID, token=token
+        ).update(expires_at=timezone.now() + timedelta(seconds=LEASE_SECONDS))
+    )
+
+
+def release_lease(name, token, holder=None):
+    CommandLease.objects.filter(
+        name=name, holder=holder or NODE_ID, token=token
+    ).update(holder="", expires_at=timezone.now())
+
+
+def get_abandoned_leases(names, now=None):
+    """Get the names of the commands whose holder stopped renewing."""
+    now = now or timezone.now()
+    return set(
+        CommandLease.objects.filter(expires_at__lt=now, name__in=names)
+        .exclude(holder="")
+        .values_list("name", flat=True)
+    )
+
+
+def get_free_leases(names, now=None):
+    """Get the names of the commands whose lease anybody can take."""
+    now = now or timezone.now()
+    return set(
+        CommandLease.objects.filter(name__in=names)
+        .filter(Q(holder="") | Q(expires_at__lt=now))
+        .values_list("name", flat=True)
+    )
+
+
+def get_next_lease_expiry(names):
+    """Get when the first held lease of the commands expires, if any."""
+    return (
+        CommandLease.objects.filter(name__in=names)
+        .exclude(holder="")
+        .order_by("expires_at")
+        .values_list("expires_at", flat=True)
+        .first()
+    )
+
+
+def set_current_lease(name, holder, token):
+    _current.lease = (name, holder, token) if token is not None else None
+
+
+def check_lease():
+    """
+    Make sure the running command still holds its lease.
+
+    Inside a transaction, the lease is locked until it commits, so it
+    can't be taken over before then. Does nothing outside of the scheduler.
+
+    Raises:
+        LeaseLost: If the lease was taken over by another node.
+    """
+    lease = getattr(_current, "lease", None)
+    if lease is None:
+        return
+    name, holder, token = lease
+    leases = CommandLease.objects.filter(name=name, holder=holder, token=token)
+    if connection.in_atomic_block:
+        leases = leases.select_for_update()
+    if not leases.exists():
+        raise LeaseLost(name)
@@ -1,40 +1,133 @@
+import time
 from django.conf import settings
-from django.core import management
 from django.core.management.base import (
     BaseCommand,
+    CommandError,
 )
 from django.utils import timezone
-from command_scheduler.enums import ScheduleType
+from command_scheduler.daemon import SchedulerDaemon
+from command_scheduler.enums import RunStatus
+from command_scheduler.leases import NODE_ID
+from command_scheduler.runner import run_commands
+from command_scheduler.schedules import (
+    claim_due_commands,
+    record_results,
+    sync_run_states,
+)
 
 
 class Command(BaseCommand):
-    help = "Run scheduled commands"
+    help = "Run the scheduled commands that are due, meant to run every minute"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Number of concurrency groups to run at once "
+            "(default: all of them)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            help="Seconds after which a command is stopped, "
+            "unless it has its own timeout",
+        )
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="Keep running and start the commands as they become due. "
+            "SIGTERM stops it gracefully, SIGHUP reloads it.",
+        )
+        parser.add_argument(
+            "--in-process",
+            action="store_true",
+            help="Run the commands in this process instead of child "
+            "processes, without timeouts",
+        )
+        parser.add_argument(
+            "--node-id",
+            default=NODE_ID,
+            help="Name of this scheduler node in the command leases "
+            "(default: host, process id and a random suffix)",
+        )
+        parser.add_argument(
+            "--max-shards",
+            type=int,
+            help="Number of shards of a sharded command to run at once "
+            "on this node (default: all of them)",
+        )
+
+    def handle(self, *args, **options):
+        command_configs = [
+            command_config
+            for command_config in settings.SCHEDULED_COMMANDS
+            if command_config.get("enabled", True)
+        ]
+        if options["daemon"]:
+            SchedulerDaemon(
+                command_configs,
+                options["workers"],
+                options["timeout"],
+                options["in_process"],
+                report=self._report,
+                holder=options["node_id"],
+                shard_limit=options["max_shards"],
+            ).run()
+            return
 
-    def handle(self, *args, **kwargs):
         now = timezone.now()
-        for command_config in settings.SCHEDULED_COMMANDS:
-            if not command_config.get("enabled", True):
-                return
-            if command_config["schedule"] == ScheduleType.DAILY:
-                self._call_command(command_config)
-
-            if (
-                command_config["schedule"] == ScheduleType.WEEKLY
-                and now.weekday() == 0
-            ):
-                self._call_command(command_config)
-
-            if (
-                command_config["schedule"] == ScheduleType.MONTHLY
-                and now.day == 1
-            ):
-                self._call_command(command_config)
-
-    def _call_command(self, command_config):
-        command_name = command_config["command"]
-        args = command_config.get("args", {})
-        positional_args = args.get("args", [])
-        optional_args = args.get("options", {})
-        management.call_command(
-            command_name, *positional_args, **optional_args
+        sync_run_states(command_configs, now)
+        due_commands = claim_due_commands(
+            command_configs,
+            now,
+            holder=options["node_id"],
+            shard_limit=options["max_shards"],
+        )
+        if not due_commands:
+            return
+
+        started = time.perf_counter()
+        results = run_commands(
+            due_commands,
+            options["workers"],
+            options["timeout"],
+            options["in_process"],
+        )
+        elapsed = time.perf_counter() - started
+        summaries = record_results(results)
+        self._report(results, elapsed, summaries)
+
+        failed = [
+            result["name"]
+            for result in results
+            if result["status"] != RunStatus.SUCCESS
+        ]
+        if failed:
+            raise CommandError(f"Failed commands: {', '.join(failed)}")
+
+    def _report(self, results, elapsed=None, summaries=()):
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<30} {result['status'].value:<8} "
+                f"{result['duration']:>8.2f}s  "
+                f"{result['started_at']:%H:%M:%S} - "
+                f"{result['ended_at']:%H:%M:%S}"
+            )
+        total = sum(result["duration"] for result in results)
+        if elapsed is None:
+            elapsed = max(result["ended_at"] for result in results) - min(
+                result["started_at"] for result in results
+            )
+            elapsed = elapsed.total_seconds()
+        self.stdout.write(
+            f"Ran {len(results)} commands in {elapsed:.2f}s "
+            f"({total:.2f}s of work)"
         )
+        for summary in summaries:
+            self.stdout.write(
+                f"{summary['name']} finished {summary['status'].value}: "
+                f"{summary['succeeded']}/{summary['shards']} shards "
+                f"succeeded in {summary['attempts']} attempts, "
+                f"{summary['duration']:.2f}s "
+                f"({summary['work']:.2f}s of work)"
+            )
@@ -0,0 +1,53 @@
+import os
+from django.core.management.base import BaseCommand
+from command_scheduler.workers import WorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run background jobs until stopped by SIGTERM or SIGINT"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Queue to take jobs from, can be repeated "
+            "(default: all of them)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Number of jobs a worker claims at once",
+        )
+
+    def handle(self, *args, **options):
+        WorkerPool(
+            options["workers"],
+            options["queues"],
+            options["batch_size"],
+            report=self._report,
+        ).run()
+
+    def _report(self, stats):
+        statuses = ", ".join(
+            f"{status}={count}" for status, count in stats["statuses"].items()
+        )
+        self.stdout.write(
+            f"Processed {stats['processed']} jobs in "
+            f"{stats['elapsed']:.0f}s ({stats['per_second']:.1f}/s"
+            f"{', ' + statuses if statuses else ''}), "
+            f"avg wait {stats['avg_wait']:.2f}s, "
+            f"avg run {stats['avg_run']:.3f}s, "
+            f"{stats['queued']} queued"
+        )
+        for name, count in sorted(
+            stats["tasks"].items(), key=lambda item: -item[1]
+        ):
+            self.stdout.write(f"  {name:<50} {count}")
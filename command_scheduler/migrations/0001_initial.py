@@ -0,0 +1,102 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="CommandRunState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Name of the scheduled command",
+                        max_length=255,
+                        unique=True,
+                        verbose_name="Name",
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.CharField(
+                        help_text="Schedule the next run was computed from",
+                        max_length=255,
+                        verbose_name="Schedule",
+                    ),
+                ),
+                (
+                    "next_run_at",
+                    models.DateTimeField(
+                        db_index=True,
+                        help_text="Date and time when the command is due next",
+                        verbose_name="Next Run At",
+                    ),
+                ),
+                (
+                    "last_started_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the command last started",
+                        null=True,
+                        verbose_name="Last Started At",
+                    ),
+                ),
+                (
+                    "last_finished_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the command last finished",
+                        null=True,
+                        verbose_name="Last Finished At",
+                    ),
+                ),
+                (
+                    "last_status",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("success", "Success"),
+                            ("failed", "Failed"),
+                            ("timeout", "Timeout"),
+                        ],
+                        help_text="Status of the last run",
+                        max_length=20,
+                        verbose_name="Last Status",
+                    ),
+                ),
+                (
+                    "last_duration",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Duration of the last run in seconds",
+                        null=True,
+                        verbose_name="Last Duration",
+                    ),
+                ),
+                (
+                    "last_exit_code",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Exit code of the last run",
+                        null=True,
+                        verbose_name="Last Exit Code",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("command_scheduler", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CommandLease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Name of the scheduled command",
+                        max_length=255,
+                        unique=True,
+                        verbose_name="Name",
+                    ),
+                ),
+                (
+                    "holder",
+                    models.CharField(
+                        blank=True,
+                        help_text="Scheduler node running the command, if any",
+                        max_length=255,
+                        verbose_name="Holder",
+                    ),
+                ),
+                (
+                    "token",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="Fencing token, increased on every acquisition",
+                        verbose_name="Token",
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        db_index=True,
+                        help_text="Date and time when the lease can be taken over",
+                        verbose_name="Expires At",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="commandrunstate",
+            name="last_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("success", "Success"),
+                    ("failed", "Failed"),
+                    ("timeout", "Timeout"),
+                    ("lost", "Lost"),
+                ],
+                help_text="Status of the last run",
+                max_length=20,
+                verbose_name="Last Status",
+            ),
+        ),
+    ]
@@ -0,0 +1,176 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("command_scheduler", "0002_commandlease"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "task",
+                    models.CharField(
+                        help_text="Name of the task to run",
+                        max_length=255,
+                        verbose_name="Task",
+                    ),
+                ),
+                (
+                    "args",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Positional arguments of the task",
+                        verbose_name="Arguments",
+                    ),
+                ),
+                (
+                    "kwargs",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Keyword arguments of the task",
+                        verbose_name="Keyword Arguments",
+                    ),
+                ),
+                (
+                    "queue",
+                    models.CharField(
+                        default="default",
+                        help_text="Queue the job is taken from",
+                        max_length=50,
+                        verbose_name="Queue",
+                    ),
+                ),
+                (
+                    "priority",
+                    models.SmallIntegerField(
+                        default=0,
+                        help_text="Jobs with a higher priority run first",
+                        verbose_name="Priority",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("dead", "Dead"),
+                        ],
+                        default="queued",
+                        help_text="Current status of the job",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0,
+                        help_text="Number of times the job was started",
+                        verbose_name="Attempts",
+                    ),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(
+                        default=5,
+                        help_text="Number of attempts before the job is dead",
+                        verbose_name="Max Attempts",
+                    ),
+                ),
+                (
+                    "run_at",
+                    models.DateTimeField(
+                        help_text="Date and time from when the job may run",
+                        verbose_name="Run At",
+                    ),
+                ),
+                (
+                    "locked_by",
+                    models.CharField(
+                        blank=True,
+                        help_text="Worker running the job, if any",
+                        max_length=255,
+                        verbose_name="Locked By",
+                    ),
+                ),
+                (
+                    "locked_until",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when a running job is given up on",
+                        null=True,
+                        verbose_name="Locked Until",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True,
+                        help_text="Traceback of the last failed attempt",
+                        verbose_name="Last Error",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Date and time when the job was enqueued",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the last attempt started",
+                        null=True,
+                        verbose_name="Started At",
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the job succeeded or died",
+                        null=True,
+                        verbose_name="Finished At",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "queue", "-priority", "run_at"],
+                        name="job_claim_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "locked_until"],
+                        name="job_locked_until_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "finished_at"],
+                        name="job_finished_at_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,189 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("command_scheduler", "0003_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShardedRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        db_index=True,
+                        help_text="Name of the sharded command",
+                        max_length=255,
+                        verbose_name="Name",
+                    ),
+                ),
+                (
+                    "shards",
+                    models.PositiveSmallIntegerField(
+                        help_text="Number of shards the command runs as",
+                        verbose_name="Shards",
+                    ),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(
+                        help_text="Number of times a failing shard is started",
+                        verbose_name="Max Attempts",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("success", "Success"),
+                            ("failed", "Failed"),
+                            ("timeout", "Timeout"),
+                            ("lost", "Lost"),
+                        ],
+                        help_text="Overall status, once every shard finished",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Date and time when the run was fanned out",
+                        verbose_name="Started At",
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True,
+                        db_index=True,
+                        help_text="Date and time when the last shard finished",
+                        null=True,
+                        verbose_name="Finished At",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ShardRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "index",
+                    models.PositiveSmallIntegerField(
+                        help_text="Index of the shard, from 0",
+                        verbose_name="Index",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("success", "Success"),
+                            ("failed", "Failed"),
+                            ("timeout", "Timeout"),
+                            ("lost", "Lost"),
+                        ],
+                        db_index=True,
+                        default="pending",
+                        help_text="Status of the shard",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0,
+                        help_text="Number of times the shard was started",
+                        verbose_name="Attempts",
+                    ),
+                ),
+                (
+                    "holder",
+                    models.CharField(
+                        blank=True,
+                        help_text="Scheduler node that ran the shard last",
+                        max_length=255,
+                        verbose_name="Holder",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the last attempt started",
+                        null=True,
+                        verbose_name="Started At",
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the last attempt finished",
+                        null=True,
+                        verbose_name="Finished At",
+                    ),
+                ),
+                (
+                    "duration",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Duration of the last attempt in seconds",
+                        null=True,
+                        verbose_name="Duration",
+                    ),
+                ),
+                (
+                    "exit_code",
+                    models.IntegerField(
+                        blank=True,
+                        help_text="Exit code of the last attempt",
+                        null=True,
+                        verbose_name="Exit Code",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        help_text="Run the shard belongs to",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shard_runs",
+                        to="command_scheduler.shardedrun",
+                        verbose_name="Run",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("run", "index")},
+            },
+        ),
+    ]
@@ -0,0 +1,294 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from .enums import JobStatus, RunStatus, ShardStatus
+
+
+class CommandRunState(models.Model):
+    name = models.CharField(
+        _("Name"),
+        max_length=255,
+        unique=True,
+        help_text=_("Name of the scheduled command"),
+    )
+    schedule = models.CharField(
+        _("Schedule"),
+        max_length=255,
+        help_text=_("Schedule the next run was computed from"),
+    )
+    next_run_at = models.DateTimeField(
+        _("Next Run At"),
+        db_index=True,
+        help_text=_("Date and time when the command is due next"),
+    )
+    last_started_at = models.DateTimeField(
+        _("Last Started At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the command last started"),
+    )
+    last_finished_at = models.DateTimeField(
+        _("Last Finished At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the command last finished"),
+    )
+    last_status = models.CharField(
+        _("Last Status"),
+        max_length=20,
+        blank=True,
+        choices=[(status.value, status.name.title()) for status in RunStatus],
+        help_text=_("Status of the last run"),
+    )
+    last_duration = models.FloatField(
+        _("Last Duration"),
+        null=True,
+        blank=True,
+        help_text=_("Duration of the last run in seconds"),
+    )
+    last_exit_code = models.IntegerField(
+        _("Last Exit Code"),
+        null=True,
+        blank=True,
+        help_text=_("Exit code of the last run"),
+    )
+
+    def __str__(self):
+        return f"{self.name} due at {self.next_run_at}"
+
+
+class CommandLease(models.Model):
+    name = models.CharField(
+        _("Name"),
+        max_length=255,
+        unique=True,
+        help_text=_("Name of the scheduled command"),
+    )
+    holder = models.CharField(
+        _("Holder"),
+        max_length=255,
+        blank=True,
+        help_text=_("Scheduler node running the command, if any"),
+    )
+    token = models.PositiveBigIntegerField(
+        _("Token"),
+        default=0,
+        help_text=_("Fencing token, increased on every acquisition"),
+    )
+    expires_at = models.DateTimeField(
+        _("Expires At"),
+        db_index=True,
+        help_text=_("Date and time when the lease can be taken over"),
+    )
+
+    def __str__(self):
+        return f"{self.name} leased by {self.holder or 'nobody'}"
+
+
+class ShardedRun(models.Model):
+    name = models.CharField(
+        _("Name"),
+        max_length=255,
+        db_index=True,
+        help_text=_("Name of the sharded command"),
+    )
+    shards = models.PositiveSmallIntegerField(
+        _("Shards"),
+        help_text=_("Number of shards the command runs as"),
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        _("Max Attempts"),
+        help_text=_("Number of times a failing shard is started"),
+    )
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        blank=True,
+        choices=[(status.value, status.name.title()) for status in RunStatus],
+        help_text=_("Overall status, once every shard finished"),
+    )
+    started_at = models.DateTimeField(
+        _("Started At"),
+        auto_now_add=True,
+        help_text=_("Date and time when the run was fanned out"),
+    )
+    finished_at = models.DateTimeField(
+        _("Finished At"),
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text=_("Date and time when the last shard finished"),
+    )
+
+    def __str__(self):
+        return f"{self.name} in {self.shards} shards at {self.started_at}"
+
+
+class ShardRun(models.Model):
+    run = models.ForeignKey(
+        ShardedRun,
+        on_delete=models.CASCADE,
+        related_name="shard_runs",
+        verbose_name=_("Run"),
+        help_text=_("Run the shard belongs to"),
+    )
+    index = models.PositiveSmallIntegerField(
+        _("Index"),
+        help_text=_("Index of the shard, from 0"),
+    )
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        default=ShardStatus.PENDING.value,
+        choices=[
+            (status.value, status.name.title()) for status in ShardStatus
+        ],
+        db_index=True,
+        help_text=_("Status of the shard"),
+    )
+    attempts = models.PositiveSmallIntegerField(
+        _("Attempts"),
+        default=0,
+        help_text=_("Number of times the shard was started"),
+    )
+    holder = models.CharField(
+        _("Holder"),
+        max_length=255,
+        blank=True,
+        help_text=_("Scheduler node that ran the shard last"),
+    )
+    started_at = models.DateTimeField(
+        _("Started At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the last attempt started"),
+    )
+    finished_at = models.DateTimeField(
+        _("Finished At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the last attempt finished"),
+    )
+    duration = models.FloatField(
+        _("Duration"),
+        null=True,
+        blank=True,
+        help_text=_("Duration of the last attempt in seconds"),
+    )
+    exit_code = models.IntegerField(
+        _("Exit Code"),
+        null=True,
+        blank=True,
+        help_text=_("Exit code of the last attempt"),
+    )
+
+    class Meta:
+        unique_together = ("run", "index")
+
+    def __str__(self):
+        return f"{self.run.name} shard {self.index} ({self.status})"
+
+
+class Job(models.Model):
+    task = models.CharField(
+        _("Task"),
+        max_length=255,
+        help_text=_("Name of the task to run"),
+    )
+    args = models.JSONField(
+        _("Arguments"),
+        default=list,
+        blank=True,
+        help_text=_("Positional arguments of the task"),
+    )
+    kwargs = models.JSONField(
+        _("Keyword Arguments"),
+        default=dict,
+        blank=True,
+        help_text=_("Keyword arguments of the task"),
+    )
+    queue = models.CharField(
+        _("Queue"),
+        max_length=50,
+        default="default",
+        help_text=_("Queue the job is taken from"),
+    )
+    priority = models.SmallIntegerField(
+        _("Priority"),
+        default=0,
+        help_text=_("Jobs with a higher priority run first"),
+    )
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        default=JobStatus.QUEUED.value,
+        choices=[(status.value, status.name.title()) for status in JobStatus],
+        help_text=_("Current status of the job"),
+    )
+    attempts = models.PositiveSmallIntegerField(
+        _("Attempts"),
+        default=0,
+        help_text=_("Number of times the job was started"),
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        _("Max Attempts"),
+        default=5,
+        help_text=_("Number of attempts before the job is dead"),
+    )
+    run_at = models.DateTimeField(
+        _("Run At"),
+        help_text=_("Date and time from when the job may run"),
+    )
+    locked_by = models.CharField(
+        _("Locked By"),
+        max_length=255,
+        blank=True,
+        help_text=_("Worker running the job, if any"),
+    )
+    locked_until = models.DateTimeField(
+        _("Locked Until"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when a running job is given up on"),
+    )
+    last_error = models.TextField(
+        _("Last Error"),
+        blank=True,
+        help_text=_("Traceback of the last failed attempt"),
+    )
+    created = models.DateTimeField(
+        _("Created"),
+        auto_now_add=True,
+        help_text=_("Date and time when the job was enqueued"),
+    )
+    started_at = models.DateTimeField(
+        _("Started At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the last attempt started"),
+    )
+    finished_at = models.DateTimeField(
+        _("Finished At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the job succeeded or died"),
+    )
+
+    class Meta:
+        indexes = [
+            # Workers take the first queued jobs by priority
+            models.Index(
+                fields=["status", "queue", "-priority", "run_at"],
+                name="job_claim_idx",
+            ),
+            models.Index(
+                fields=["status", "locked_until"],
+                name="job_locked_until_idx",
+            ),
+            models.Index(
+                fields=["status", "finished_at"],
+                name="job_finished_at_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,266 @@
+"""
+Parallel execution of scheduled commands.
+
+Every command runs in its own child process, so a hanging command can be
+stopped at its timeout and a crashing one can't take the others down.
+Commands can also run in the calling process, which skips the process
+start but gives up timeouts and isolation. Commands sharing a
+concurrency group run one after another in the order they're
+configured; separate groups run in parallel.
+
+The lease of a claimed command is renewed while it runs and released once
+its runs are done. A child whose lease can't be renewed is stopped, as
+another node may take the command over.
+"""
+
+import multiprocessing
+import signal
+import sys
+import time
+import threading
+import traceback
+import django
+from django.apps import apps
+from django.core import management
+from django.db import connections
+from django.utils import timezone
+from .enums import RunStatus
+from .leases import (
+    RENEW_SECONDS,
+    release_lease,
+    renew_lease,
+    set_current_lease,
+)
+from .schedules import get_schedule_name
+
+
+def get_command_name(command_config):
+    return command_config["command"]
+
+
+def call_command(command_config):
+    args = command_config.get("args", {})
+    positional_args = args.get("args", [])
+    optional_args = args.get("options", {})
+    management.call_command(
+        get_command_name(command_config), *positional_args, **optional_args
+    )
+
+
+def _set_current_lease(command_config):
+    lease = command_config.get("lease", {})
+    set_current_lease(
+        get_schedule_name(command_config),
+        lease.get("holder"),
+        lease.get("token"),
+    )
+
+
+def _renew(command_config):
+    lease = command_config.get("lease")
+    if lease is None:
+        return True
+    return renew_lease(
+        get_schedule_name(command_config), lease["token"], lease["holder"]
+    )
+
+
+def _run_in_child(command_config):
+    # Forked from the daemon with its handlers; a stop signal is for the
+    # daemon, which lets running commands finish.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if not apps.ready:
+        # Spawned instead of forked
+        django.setup()
+    _set_current_lease(command_config)
+    try:
+        call_command(command_config)
+    except Exception:
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        connections.close_all()
+
+
+def _keep_renewing(command_config, done):
+    try:
+        while not done.wait(RENEW_SECONDS):
+            if not _renew(command_config):
+                # Can't stop the command, which may check its lease itself
+                return
+    finally:
+        connections.close_all()
+
+
+def _run_in_process(command_config):
+    _set_current_lease(command_config)
+    done = threading.Event()
+    renewer = threading.Thread(
+        target=_keep_renewing, args=(command_config, done)
+    )
+    renewer.start()
+    try:
+        call_command(command_config)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        done.set()
+        renewer.join()
+        set_current_lease(None, None, None)
+        connections.close_all()
+    return 0
+
+
+def _wait(process, command_config, timeout):
+    """Wait for a child, renewing its lease, and get how it ended."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = RENEW_SECONDS
+        if deadline is not None:
+            wait = min(wait, max(deadline - time.monotonic(), 0))
+        process.join(wait)
+        if not process.is_alive():
+            return (
+                RunStatus.SUCCESS
+                if process.exitcode == 0
+                else RunStatus.FAILED
+            )
+        if deadline is not None and time.monotonic() >= deadline:
+            run_status = RunStatus.TIMEOUT
+        elif not _renew(command_config):
+            run_status = RunStatus.LOST
+        else:
+            continue
+        process.terminate()
+        process.join()
+        return run_status
+
+
+def get_process_context():
+    # Forked children reuse the loaded project instead of importing it again
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "fork" if "fork" in methods else "spawn"
+    )
+
+
+def run_command(command_config, timeout=None, in_process=False):
+    """
+    Run a command in a child process, or in this one, and wait for it.
+
+    Returns:
+        dict: The schedule name and command, start and end times,
+            duration in seconds, status, exit code and shard, if any.
+    """
+    timeout = command_config.get("timeout", timeout)
+    started_at = timezone.now()
+    started = time.perf_counter()
+    if in_process:
+        exit_code = _run_in_process(command_config)
+        run_status = RunStatus.SUCCESS if exit_code == 0 else RunStatus.FAILED
+    else:
+        process = get_process_context().Process(
+            target=_run_in_child,
+            args=(command_config,),
+            name=get_command_name(command_config),
+        )
+        process.start()
+        run_status = _wait(process, command_config, timeout)
+        exit_code = process.exitcode
+        # The renewals used this thread's connection
+        connections.close_all()
+
+    return {
+        "name": get_schedule_name(command_config),
+        "command": get_command_name(command_config),
+        "started_at": started_at,
+        "ended_at": timezone.now(),
+        "duration": time.perf_counter() - started,
+        "status": run_status,
+        "exit_code": exit_code,
+        "shard": command_config.get("shard"),
+    }
+
+
+def run_claimed_command(command_config, timeout=None, in_process=False):
+    """
+    Make the claimed runs of a command and release its lease.
+
+    Returns:
+        list: Result of every run, see run_command.
+    """
+    results = []
+    try:
+        for _ in range(command_config.get("runs", 1)):
+            results.append(run_command(command_config, timeout, in_process))
+            if results[-1]["status"] == RunStatus.LOST:
+                break
+    finally:
+        lease = command_config.get("lease")
+        if lease is not None:
+            release_lease(
+                get_schedule_name(command_config),
+                lease["token"],
+                lease["holder"],
+            )
+            connections.close_all()
+    return results
+
+
+def group_commands(command_configs):
+    """Group commands by concurrency group, keeping their order.
+
+    Commands without a group are a group of their own.
+    """
+    groups = {}
+    for index, command_config in enumerate(command_configs):
+        group = command_config.get("group", index)
+        groups.setdefault(group, []).append(command_config)
+    return list(groups.values())
+
+
+def run_commands(
+    command_configs, workers=None, timeout=None, in_process=False
+):
+    """
+    Run commands in parallel, one concurrency group per worker.
+
+    Returns:
+        list: Result of every command, see run_command.
+    """
+    groups = group_commands(command_configs)
+    if not groups:
+        return []
+
+    if not in_process:
+        # Children must open their own connections
+        connections.close_all()
+
+    # Plain threads, as concurrent.futures' exit hook breaks forked children
+    slots = threading.Semaphore(workers or len(groups))
+    results = [None] * len(groups)
+
+    def run_group(index, group):
+        with slots:
+            results[index] = [
+                result
+                for command_config in group
+                for result in run_claimed_command(
+                    command_config, timeout, in_process
+                )
+            ]
+
+    threads = [
+        threading.Thread(target=run_group, args=(index, group))
+        for index, group in enumerate(groups)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [result for group_results in results for result in group_results]
@@ -0,0 +1,269 @@
+"""
+Due-time bookkeeping of scheduled commands.
+
+Every scheduled command has a CommandRunState row holding when it's due
+next, so each tick only has to ask the next_run_at index what's due.
+Cron schedules are evaluated in the wall-clock time of TIME_ZONE. A
+command's lease makes sure only one scheduler node runs it at a time.
+Sharded commands are fanned out and their shards claimed as described in
+the shards module.
+"""
+
+from datetime import timedelta
+from django.utils import timezone
+from .cron import Cron
+from .enums import CatchUp, ScheduleType
+from .leases import (
+    NODE_ID,
+    acquire_lease,
+    get_abandoned_leases,
+    get_next_lease_expiry,
+    release_lease,
+)
+from .shards import (
+    claim_shards,
+    get_next_shard_time,
+    get_sharded_runs,
+    record_shard_results,
+    start_sharded_run,
+)
+from .models import CommandRunState
+
+
+CRON_BY_TYPE = {
+    ScheduleType.DAILY: "0 0 * * *",
+    ScheduleType.WEEKLY: "0 0 * * 1",
+    ScheduleType.MONTHLY: "0 0 1 * *",
+}
+MAX_CATCH_UP_RUNS = 24
+MISSED_AFTER = timedelta(minutes=5)
+
+
+def get_schedule_name(command_config):
+    return command_config.get("name", command_config["command"])
+
+
+def _get_interval(command_config):
+    interval = command_config["interval"]
+    if not isinstance(interval, timedelta):
+        interval = timedelta(seconds=interval)
+    return interval
+
+
+def _get_cron(command_config):
+    schedule = command_config["schedule"]
+    if schedule == ScheduleType.CRON:
+        return Cron(command_config["cron"])
+    return Cron(CRON_BY_TYPE[schedule])
+
+
+def describe_schedule(command_config):
+    if command_config["schedule"] == ScheduleType.INTERVAL:
+        seconds = _get_interval(command_config).total_seconds()
+        return f"every {seconds:g}s"
+    return str(_get_cron(command_config))
+
+
+def get_next_run(command_config, after):
+    """Get the first run of a command after the given time."""
+    if command_config["schedule"] == ScheduleType.INTERVAL:
+        return after + _get_interval(command_config)
+    tz = timezone.get_default_timezone()
+    local = timezone.localtime(after, tz).replace(tzinfo=None)
+    return timezone.make_aware(_get_cron(command_config).next_after(local), tz)
+
+
+def _get_first_run(command_config, now):
+    if command_config["schedule"] == ScheduleType.INTERVAL:
+        return now
+    return get_next_run(command_config, now)
+
+
+def _get_next_future_run(command_config, due_at, now):
+    if command_config["schedule"] == ScheduleType.INTERVAL:
+        # Stay aligned with the first run
+        interval = _get_interval(command_config)
+        return due_at + interval * ((now - due_at) // interval + 1)
+    return get_next_run(command_config, now)
+
+
+def _count_runs(command_config, due_at, now):
+    catch_up = command_config.get("catch_up", CatchUp.LATEST)
+    if catch_up == CatchUp.SKIP:
+        return 1 if now - due_at <= MISSED_AFTER else 0
+    if catch_up == CatchUp.LATEST:
+        return 1
+
+    runs = 0
+    while due_at <= now and runs < MAX_CATCH_UP_RUNS:
+        runs += 1
+        due_at = get_next_run(command_config, due_at)
+    return runs
+
+
+def sync_run_states(command_configs, now=None):
+    """Create the missing run states and reschedule changed schedules."""
+    now = now or timezone.now()
+    states = {state.name: state for state in CommandRunState.objects.all()}
+    new_states = []
+    for command_config in command_configs:
+        name = get_schedule_name(command_config)
+        schedule = describe_schedule(command_config)
+        state = states.get(name)
+        if state is None:
+            new_states.append(
+                CommandRunState(
+                    name=name,
+                    schedule=schedule,
+                    next_run_at=_get_first_run(command_config, now),
+                )
+            )
+        elif state.schedule != schedule:
+            CommandRunState.objects.filter(pk=state.pk).update(
+                schedule=schedule,
+                next_run_at=_get_first_run(command_config, now),
+            )
+    CommandRunState.objects.bulk_create(new_states, ignore_conflicts=True)
+
+
+def claim_due_commands(
+    command_configs, now=None, exclude=(), holder=None, shard_limit=None
+):
+    """
+    Reschedule the due commands and get the runs to make.
+
+    A command is claimed by taking its lease and moving its next run past
+    now with a conditional UPDATE, so neither a concurrent tick nor
+    another node can claim it again. A command whose lease was abandoned
+    by a dead node is claimed to run again. Missed runs are caught up
+    according to the command's ``catch_up`` policy. Excluded commands,
+    like ones still running, stay due.
+
+    A claimed sharded command is fanned out once, however many runs it
+    missed, and stays due while its shards run. The pending shards of
+    the sharded commands are claimed too, up to ``shard_limit`` running
+    on this node per command.
+
+    Returns:
+        list: Command configs to run in the configured order, with the
+            number of ``runs`` to make and the ``lease`` held for them,
+            followed by the claimed shards.
+    """
+    now = now or timezone.now()
+    holder = holder or NODE_ID
+    configs = {
+        get_schedule_name(command_config): command_config
+        for command_config in command_configs
+        if get_schedule_name(command_config) not in exclude
+    }
+    due_states = {
+        state.name: state
+        for state in CommandRunState.objects.filter(
+            next_run_at__lte=now, name__in=configs
+        )
+    }
+    abandoned = get_abandoned_leases(configs, now)
+    sharded = {
+        name: command_config
+        for name, command_config in configs.items()
+        if command_config.get("shards")
+    }
+    fanned_out = get_sharded_runs(sharded)
+
+    runs = []
+    for name, command_config in configs.items():
+        state = due_states.get(name)
+        if (state is None and name not in abandoned) or name in fanned_out:
+            continue
+        token, taken_over = acquire_lease(name, holder, now)
+        if token is None:
+            # Another node runs it
+            continue
+
+        count = 1 if taken_over else 0
+        if state is not None and (
+            CommandRunState.objects.filter(
+                pk=state.pk, next_run_at=state.next_run_at
+            ).update(
+                next_run_at=_get_next_future_run(
+                    command_config, state.next_run_at, now
+                ),
+            )
+        ):
+            count = max(
+                count, _count_runs(command_config, state.next_run_at, now)
+            )
+        if name in sharded:
+            if count:
+                start_sharded_run(command_config, name)
+            count = 0
+        if not count:
+            release_lease(name, token, holder)
+            continue
+
+        runs.append(
+            {
+                **command_config,
+                "runs": count,
+                "lease": {"holder": holder, "token": token},
+            }
+        )
+    return runs + claim_shards(sharded, holder, now, shard_limit)
+
+
+def record_results(results):
+    """
+    Save the outcome of the runs to their run states.
+
+    Returns:
+        list: Summary of every sharded run that finished, see
+            record_shard_results.
+    """
+    for result in results:
+        if result.get("shard"):
+            continue
+        CommandRunState.objects.filter(name=result["name"]).update(
+            last_started_at=result["started_at"],
+            last_finished_at=result["ended_at"],
+            last_status=result["status"].value,
+            last_duration=result["duration"],
+            last_exit_code=result["exit_code"],
+        )
+    return record_shard_results(
+        [result for result in results if result.get("shard")]
+    )
+
+
+def get_next_due_time(
+    command_configs, exclude=(), holder=None, shard_limit=None
+):
+    """
+    Get when the first of the commands is due, if any is scheduled.
+
+    A command leased by another node counts as due when its lease expires,
+    so it's taken over in time if that node died. Sharded commands count
+    as due when one of their shards can be claimed, see
+    get_next_shard_time.
+    """
+    sharded = [
+        get_schedule_name(command_config)
+        for command_config in command_configs
+        if command_config.get("shards")
+    ]
+    # Due again once their shards finished
+    fanned_out = get_sharded_runs(sharded)
+    names = [
+        get_schedule_name(command_config)
+        for command_config in command_configs
+        if get_schedule_name(command_config) not in {*exclude, *fanned_out}
+    ]
+    times = [
+        CommandRunState.objects.filter(name__in=names)
+        .order_by("next_run_at")
+        .values_list("next_run_at", flat=True)
+        .first(),
+        get_next_lease_expiry(names),
+        get_next_shard_time(sharded, holder or NODE_ID, shard_limit),
+    ]
+    times = [time for time in times if time is not None]
+    return min(times, default=None)
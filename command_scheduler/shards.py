@@ -0,0 +1,289 @@
+"""
+Sharded fan-out of scheduled commands.
+
+A command configured with ``"shards": K`` runs as K shards, each given
+``--shard i/K`` and working on the teachers whose id modulo K is i, see
+filter_shard. Fixed residues keep the shards disjoint even when teachers
+are added while they run.
+
+A due sharded command is fanned out into a ShardedRun with a pending
+ShardRun per shard. Every scheduler node claims pending shards under
+their own lease, so the shards spread over the nodes and their worker
+processes. A failed shard is retried on its own, up to the command's
+``retries``, and the node finishing the last shard records the result of
+the whole run.
+"""
+
+import argparse
+from django.db.models import F, IntegerField
+from django.db.models.functions import Mod
+from django.utils import timezone
+from .enums import RunStatus, ShardStatus
+from .leases import (
+    acquire_lease,
+    get_free_leases,
+    get_next_lease_expiry,
+    release_lease,
+)
+from .models import CommandRunState, ShardedRun, ShardRun
+
+
+SHARD_RETRIES = 2
+UNFINISHED = (ShardStatus.PENDING.value, ShardStatus.RUNNING.value)
+
+
+def parse_shard(value):
+    """Parse a ``--shard i/K`` option into (i, K)."""
+    index, separator, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index = count = None
+    if not separator or count is None or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(
+            f"Invalid shard {value!r}, expected i/K with 0 <= i < K"
+        )
+    return index, count
+
+
+def filter_shard(queryset, shard, field="pk"):
+    """Keep the rows of a shard, if any, by the given id field."""
+    if shard is None:
+        return queryset
+    index, count = shard
+    return queryset.alias(
+        _shard=Mod(F(field), count, output_field=IntegerField())
+    ).filter(_shard=index)
+
+
+def get_shard_name(name, index, count):
+    return f"{name}[{index}/{count}]"
+
+
+def get_sharded_runs(names):
+    """Get the names of the commands with an unfinished sharded run."""
+    return set(
+        ShardedRun.objects.filter(
+            name__in=names, finished_at__isnull=True
+        ).values_list("name", flat=True)
+    )
+
+
+def start_sharded_run(command_config, name):
+    run = ShardedRun.objects.create(
+        name=name,
+        shards=command_config["shards"],
+        max_attempts=1 + command_config.get("retries", SHARD_RETRIES),
+    )
+    ShardRun.objects.bulk_create(
+        [ShardRun(run=run, index=index) for index in range(run.shards)]
+    )
+    return run
+
+
+def _get_unfinished_shards(names):
+    return list(
+        ShardRun.objects.filter(
+            run__name__in=names,
+            run__finished_at__isnull=True,
+            status__in=UNFINISHED,
+        )
+        .select_related("run")
+        .order_by("run_id", "index")
+    )
+
+
+def _get_name(shard_run):
+    return get_shard_name(
+        shard_run.run.name, shard_run.index, shard_run.run.shards
+    )
+
+
+def _count_running(shard_runs, holder):
+    counts = {}
+    for shard_run in shard_runs:
+        if (
+            shard_run.status == ShardStatus.RUNNING.value
+            and shard_run.holder == holder
+        ):
+            counts[shard_run.run.name] = counts.get(shard_run.run.name, 0) + 1
+    return counts
+
+
+def claim_shards(command_configs, holder, now=None, limit=None):
+    """
+    Claim the pending shards of the sharded commands.
+
+    Running shards are claimed again once their node stopped renewing
+    their lease. At most ``limit`` shards of a command run on this node
+    at a time. Shards run in parallel, outside of their command's group.
+
+    Returns:
+        list: Command configs to run, one per shard.
+    """
+    now = now or timezone.now()
+    shard_runs = _get_unfinished_shards(command_configs)
+    free = get_free_leases(
+        [
+            _get_name(shard_run)
+            for shard_run in shard_runs
+            if shard_run.status == ShardStatus.RUNNING.value
+        ],
+        now,
+    )
+    running = _count_running(shard_runs, holder)
+
+    claimed = []
+    for shard_run in shard_runs:
+        name = shard_run.run.name
+        shard_name = _get_name(shard_run)
+        if limit and running.get(name, 0) >= limit:
+            continue
+        if (
+            shard_run.status == ShardStatus.RUNNING.value
+            and shard_name not in free
+        ):
+            continue
+        token, _ = acquire_lease(shard_name, holder, now)
+        if token is None:
+            continue
+        if not ShardRun.objects.filter(
+            pk=shard_run.pk,
+            status=shard_run.status,
+            attempts=shard_run.attempts,
+        ).update(
+            status=ShardStatus.RUNNING.value,
+            attempts=F("attempts") + 1,
+            holder=holder,
+            started_at=now,
+        ):
+            release_lease(shard_name, token, holder)
+            continue
+
+        running[name] = running.get(name, 0) + 1
+        command_config = command_configs[name]
+        args = command_config.get("args", {})
+        shard = f"--shard={shard_run.index}/{shard_run.run.shards}"
+        claimed.append(
+            {
+                **command_config,
+                "name": shard_name,
+                "group": shard_name,
+                "args": {
+                    **args,
+                    "args": [*args.get("args", []), shard],
+                },
+                "runs": 1,
+                "lease": {"holder": holder, "token": token},
+                "shard": {
+                    "id": shard_run.pk,
+                    "holder": holder,
+                    "attempts": shard_run.attempts + 1,
+                },
+            }
+        )
+    return claimed
+
+
+def _finish_run(run_id, now):
+    shard_runs = list(
+        ShardRun.objects.filter(run_id=run_id).values(
+            "status", "attempts", "duration"
+        )
+    )
+    if any(shard_run["status"] in UNFINISHED for shard_run in shard_runs):
+        return None
+    succeeded = sum(
+        shard_run["status"] == ShardStatus.SUCCESS.value
+        for shard_run in shard_runs
+    )
+    run_status = (
+        RunStatus.SUCCESS if succeeded == len(shard_runs) else RunStatus.FAILED
+    )
+    # Only one of the nodes finishing shards sees the run finish
+    if not ShardedRun.objects.filter(
+        pk=run_id, finished_at__isnull=True
+    ).update(status=run_status.value, finished_at=now):
+        return None
+
+    run = ShardedRun.objects.get(pk=run_id)
+    duration = (now - run.started_at).total_seconds()
+    CommandRunState.objects.filter(name=run.name).update(
+        last_started_at=run.started_at,
+        last_finished_at=now,
+        last_status=run_status.value,
+        last_duration=duration,
+        last_exit_code=0 if run_status == RunStatus.SUCCESS else 1,
+    )
+    return {
+        "name": run.name,
+        "shards": run.shards,
+        "succeeded": succeeded,
+        "failed": len(shard_runs) - succeeded,
+        "attempts": sum(shard_run["attempts"] for shard_run in shard_runs),
+        "status": run_status,
+        "started_at": run.started_at,
+        "ended_at": now,
+        "duration": duration,
+        "work": sum(shard_run["duration"] or 0 for shard_run in shard_runs),
+    }
+
+
+def record_shard_results(results):
+    """
+    Save the outcome of shard runs, queueing failed shards to retry.
+
+    Returns:
+        list: Summary of every sharded run that finished.
+    """
+    now = timezone.now()
+    run_ids = set()
+    for result in results:
+        shard = result["shard"]
+        shard_run = ShardRun.objects.select_related("run").get(pk=shard["id"])
+        status = ShardStatus(result["status"].value)
+        if (
+            status != ShardStatus.SUCCESS
+            and shard["attempts"] < shard_run.run.max_attempts
+        ):
+            status = ShardStatus.PENDING
+        # Unless the shard was taken over meanwhile
+        ShardRun.objects.filter(
+            pk=shard["id"],
+            status=ShardStatus.RUNNING.value,
+            holder=shard["holder"],
+            attempts=shard["attempts"],
+        ).update(
+            status=status.value,
+            finished_at=result["ended_at"],
+            duration=result["duration"],
+            exit_code=result["exit_code"],
+        )
+        run_ids.add(shard_run.run_id)
+
+    summaries = [_finish_run(run_id, now) for run_id in sorted(run_ids)]
+    return [summary for summary in summaries if summary is not None]
+
+
+def get_next_shard_time(names, holder, limit=None, now=None):
+    """
+    Get when a shard of the commands can be claimed next, if ever.
+
+    That's now for pending shards while this node runs less than
+    ``limit`` of them, or when the lease of a running shard expires.
+    """
+    now = now or timezone.now()
+    shard_runs = _get_unfinished_shards(names)
+    running = _count_running(shard_runs, holder)
+    for shard_run in shard_runs:
+        if shard_run.status == ShardStatus.PENDING.value and (
+            not limit or running.get(shard_run.run.name, 0) < limit
+        ):
+            return now
+    return get_next_lease_expiry(
+        [
+            _get_name(shard_run)
+            for shard_run in shard_runs
+            if shard_run.status == ShardStatus.RUNNING.value
+        ]
+    )
@@ -0,0 +1,171 @@
+"""
+Worker processes running background jobs.
+
+The pool forks its workers from the warm process and restarts the ones
+that die. Each worker claims a batch of due jobs, runs them and polls
+again, sleeping while the queues are empty. The pool gives up on jobs
+of dead workers, prunes old jobs and reports the throughput of the
+workers every REPORT_SECONDS.
+
+SIGTERM and SIGINT stop the workers once their current job finishes.
+"""
+
+import os
+import queue
+import signal
+import socket
+import threading
+import time
+import django
+from collections import Counter
+from django.apps import apps
+from django.db import close_old_connections, connections
+from django.utils.module_loading import autodiscover_modules
+from .enums import JobStatus
+from .jobs import claim_jobs, prune_jobs, requeue_abandoned_jobs, run_job
+from .models import Job
+from .runner import get_process_context
+
+
+POLL_SECONDS = 1
+REPORT_SECONDS = 60
+MAINTENANCE_SECONDS = 60
+
+
+def _new_metrics():
+    return {"statuses": Counter(), "tasks": Counter(), "wait": 0, "run": 0}
+
+
+def _work(worker, queues, batch_size, stop, metrics):
+    # The pool stops its workers through the stop event. Setting a
+    # process-shared event in a handler may deadlock, so use a local one.
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    if not apps.ready:
+        # Spawned instead of forked
+        django.setup()
+    autodiscover_modules("tasks")
+
+    batch = _new_metrics()
+    reported = time.monotonic()
+    try:
+        while not (stop.is_set() or stopping.is_set()):
+            jobs = claim_jobs(worker, queues, batch_size)
+            for job in jobs:
+                status, duration = run_job(job)
+                if status is None:
+                    continue
+                batch["statuses"][status.value] += 1
+                batch["tasks"][job.task] += 1
+                batch["wait"] += (job.started_at - job.run_at).total_seconds()
+                batch["run"] += duration
+            if time.monotonic() - reported >= REPORT_SECONDS / 2:
+                metrics.put(batch)
+                batch = _new_metrics()
+                reported = time.monotonic()
+            if not jobs:
+                stopping.wait(POLL_SECONDS)
+    finally:
+        metrics.put(batch)
+        connections.close_all()
+
+
+class WorkerPool:
+    def __init__(self, workers, queues=None, batch_size=1, report=None):
+        self.workers = workers
+        self.queues = queues
+        self.batch_size = batch_size
+        self.report = report or (lambda stats: None)
+        self._context = get_process_context()
+        self._stopping = threading.Event()
+        self._stop = self._context.Event()
+        self._metrics = self._context.Queue()
+        self._processes = {}
+        self._totals = _new_metrics()
+
+    def _handle_stop(self, signum, frame):
+        self._stopping.set()
+
+    def _start(self, index):
+        # Children must open their own connections
+        connections.close_all()
+        worker = f"{socket.gethostname()}:{os.getpid()}:{index}"
+        process = self._context.Process(
+            target=_work,
+            args=(
+                worker,
+                self.queues,
+                self.batch_size,
+                self._stop,
+                self._metrics,
+            ),
+            name=f"worker-{index}",
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _collect(self):
+        while True:
+            try:
+                batch = self._metrics.get_nowait()
+            except queue.Empty:
+                return
+            for key, value in batch.items():
+                self._totals[key] += value
+
+    def get_stats(self, elapsed):
+        """Get the throughput since the last report and reset it."""
+        self._collect()
+        totals, self._totals = self._totals, _new_metrics()
+        processed = sum(totals["statuses"].values())
+        queued = Job.objects.filter(status=JobStatus.QUEUED.value)
+        if self.queues:
+            queued = queued.filter(queue__in=self.queues)
+        return {
+            "elapsed": elapsed,
+            "processed": processed,
+            "per_second": processed / elapsed if elapsed else 0,
+            "statuses": dict(totals["statuses"]),
+            "tasks": dict(totals["tasks"]),
+            "avg_wait": totals["wait"] / processed if processed else 0,
+            "avg_run": totals["run"] / processed if processed else 0,
+            "queued": queued.count(),
+        }
+
+    def _maintain(self):
+        requeue_abandoned_jobs()
+        prune_jobs()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for index in range(self.workers):
+            self._start(index)
+        reported = maintained = time.monotonic()
+        while not self._stopping.is_set():
+            self._stopping.wait(POLL_SECONDS)
+            self._collect()
+            for index, process in list(self._processes.items()):
+                if not process.is_alive() and not self._stopping.is_set():
+                    process.join()
+                    self._start(index)
+            now = time.monotonic()
+            if now - maintained >= MAINTENANCE_SECONDS:
+                self._maintain()
+                maintained = now
+            if now - reported >= REPORT_SECONDS:
+                self.report(self.get_stats(now - reported))
+                reported = now
+            close_old_connections()
+
+        self._stop.set()
+        while any(p.is_alive() for p in self._processes.values()):
+            # Keep the metrics queue from filling up while they finish
+            self._collect()
+            for process in self._processes.values():
+                process.join(0.1)
+        self.report(self.get_stats(time.monotonic() - reported))
+        connections.close_all()
@@ -16,7 +16,7 @@ from corsheaders.defaults import (
     default_headers,
 )
 from environ import Env
-from command_scheduler.enums import ScheduleType
+from command_scheduler.enums import ScheduleType, CatchUp
 from command_scheduler.utils import args
 
 
@@ -66,12 +66,15 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
-    # "command_scheduler",
+    "command_scheduler",
     "tutor_khata.core",
     "tutor_khata.docs",
     "tutor_khata.accounts",
     "tutor_khata.teachers",
     "tutor_khata.billing",
+    "tutor_khata.analytics",
+    "tutor_khata.students",
+    "tutor_khata.sms",
     # "tutor_khata.referrals",
 ]
 
@@ -89,9 +92,10 @@ MIDDLEWARE = [
     "allauth.account.middleware.AccountMiddleware",
 ]
 
+# Same as Django's and allauth's, loading users with their teacher
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",
-    "allauth.account.auth_backends.AuthenticationBackend",
+    "tutor_khata.accounts.backends.ModelBackend",
+    "tutor_khata.accounts.backends.AuthenticationBackend",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -187,6 +191,19 @@ LOGGING = {
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache
+# Cached data is invalidated by bumping version counters kept in this
+# cache, so it must be shared by every process, the web workers,
+# run_workers and run_scheduled_commands, and count atomically: Redis or
+# memcached. Other backends fail the core.E001 system check.
+CACHES = {
+    "default": env.cache("CACHE_URL", default="redis://127.0.0.1:6379/1"),
+}
+
+# Sessions
+# Read through the cache, so checking that a session exists is cheap
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
 # CORS
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -208,8 +225,11 @@ REST_FRAMEWORK = {
     # Schema
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     # Authentication
+    # Caches sessions and users, see tutor_khata.accounts.authentication.
+    # Relies on CACHES being shared by every process, for logouts and
+    # password changes to apply to all of them.
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "allauth.headless.contrib.rest_framework.authentication.XSessionTokenAuthentication",
+        "tutor_khata.accounts.authentication.CachedSessionTokenAuthentication",
     ],
 }
 
@@ -254,3 +274,95 @@ SCHEMA_DIR = STATIC_ROOT / "docs"
 
 # teachers
 MAX_FEE_DAY = 25
+
+# command scheduler
+# run_scheduled_commands is meant to be invoked every minute. Cron
+# schedules are evaluated in TIME_ZONE, and missed runs are caught up as
+# set by "catch_up" (default: CatchUp.LATEST). Commands sharing a "group"
+# run one after another, in this order; other commands run in parallel.
+# A command running longer than its "timeout" (in seconds) is stopped.
+# It may run on several nodes: each due command is leased to one of them.
+# A command with "shards" runs as that many processes, each given
+# --shard i/K, which may run on different nodes; a failed shard is
+# retried on its own up to "retries" times (default: 2).
+SCHEDULED_COMMANDS = [
+    {
+        "command": "sweep_subscriptions",
+        "schedule": ScheduleType.INTERVAL,
+        "interval": timedelta(minutes=15),
+        "group": "subscriptions",
+        "timeout": 60 * 10,
+    },
+    {
+        "command": "summarize_billing",
+        "schedule": ScheduleType.INTERVAL,
+        "interval": timedelta(hours=1),
+        "group": "subscriptions",
+        "timeout": 60 * 30,
+    },
+    {
+        "command": "reset_feature_usage",
+        "schedule": ScheduleType.CRON,
+        "cron": "5 0 * * *",
+        "shards": 4,
+        "timeout": 60 * 60,
+    },
+    {
+        "command": "flush_feature_usage",
+        "schedule": ScheduleType.INTERVAL,
+        "interval": timedelta(minutes=1),
+        "catch_up": CatchUp.SKIP,
+        "timeout": 60 * 5,
+    },
+    {
+        "command": "rollup_feature_usage",
+        "schedule": ScheduleType.INTERVAL,
+        "interval": timedelta(hours=1),
+        "timeout": 60 * 30,
+    },
+    {
+        "command": "prune_idempotency_keys",
+        "schedule": ScheduleType.INTERVAL,
+        "interval": timedelta(hours=1),
+        "timeout": 60 * 10,
+    },
+]
+
+# background jobs
+# Tasks enqueued with command_scheduler.jobs are run by the run_workers
+# command. When JOBS_RUN_INLINE is set they run right away in the
+# enqueuing process instead, which needs no workers.
+JOBS_RUN_INLINE = env.bool("JOBS_RUN_INLINE", default=False)
+
+# sms
+# Messages are sent in the background by the run_workers command, OTPs
+# ahead of other messages, through PROVIDER created with OPTIONS. The rate
+# limit (messages per second, 0 for none) is kept in the cache of
+# CACHE_ALIAS, which must be shared by every worker to hold. For Twilio:
+#     "PROVIDER": "tutor_khata.sms.providers.TwilioProvider",
+#     "OPTIONS": {
+#         "account_sid": env("TWILIO_ACCOUNT_SID"),
+#         "auth_token": env("TWILIO_AUTH_TOKEN"),
+#         "from_number": env("TWILIO_FROM"),
+#         "pool_size": 10,
+#     },
+SMS = {
+    "PROVIDER": "tutor_khata.sms.providers.ConsoleProvider",
+    "OPTIONS": {},
+    "BATCH_SIZE": 100,
+    "RATE_LIMIT": 10,
+    "CACHE_ALIAS": "default",
+    "MAX_ATTEMPTS": 3,
+}
+
+# billing
+# Usage of the listed features is counted write-behind and merged into the
+# usage counters by the flush_feature_usage command, which also writes the
+# usage events of every feature. The counter store must be shared by every
+# process, so leave FEATURES empty on a per-process cache.
+BILLING_USAGE_BUFFER = {
+    "BACKEND": "tutor_khata.billing.buffer.CacheCounterStore",
+    "FEATURES": [],  # e.g. "custom_notifications", "auto_attendance"
+    "BUCKET_SECONDS": 60,
+    "MAX_STALENESS": 300,
+}
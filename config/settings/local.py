@@ -18,5 +18,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Writers queue up instead of failing when a read is upgraded
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+        # On disk, so tests can use more than one connection
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     },
 }
@@ -6,14 +6,6 @@ DEBUG = False
 
 ALLOWED_HOSTS = ["tutorkhata.pythonanywhere.com"]
 
-# CACHE NOT REQUIRED FOR NOW
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
-#         "LOCATION": "127.0.0.1:11211",
-#     }
-# }
-
 # EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 # EMAIL_HOST = "smtp.gmail.com"
 # EMAIL_PORT = 587
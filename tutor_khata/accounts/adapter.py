@@ -1,5 +1,8 @@
 from allauth.account.adapter import DefaultAccountAdapter
+from tutor_khata.core.utils import normalize_phone
 from .models import User
+from tutor_khata.sms.models import OutboundSMS
+from tutor_khata.sms.utils import send_sms
 
 class AccountAdapter(DefaultAccountAdapter):
 
@@ -18,10 +21,14 @@ class AccountAdapter(DefaultAccountAdapter):
 
 
     def get_user_by_phone(self, phone):
-        try:
-            return User.objects.get(phone_number=phone)
-        except User.DoesNotExist:
+        phone = normalize_phone(phone)
+        if phone is None:
             return None
+        return User.objects.filter(phone_number=phone).first()
 
     def send_verification_code_sms(self, user, phone, code, **kwargs):
-        print("Sending SMS to", phone, "with code", code)
+        send_sms(
+            str(phone),
+            f"Your verification code is {code}",
+            lane=OutboundSMS.Lane.OTP,
+        )
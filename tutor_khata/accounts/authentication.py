@@ -0,0 +1,111 @@
+"""
+Cached X-Session-Token authentication.
+
+allauth's XSessionTokenAuthentication checks that the session exists,
+loads it and loads its user on every request. This one remembers the
+user a session token belongs to in the shared cache and keeps the users
+themselves in a short-lived in-process cache. A request then checks that
+the session is still kept in the cache by the cached_db session engine,
+in the same lookup as the user's version, so it authenticates with two
+cache lookups and no queries.
+
+Both caches are checked against the user's version counter, see
+tutor_khata.accounts.cache, and logging out forgets the session, so
+changes are seen by every process on their next request.
+"""
+
+import copy
+import threading
+import time
+from django.contrib.auth import SESSION_KEY, get_user_model
+from allauth.headless.contrib.rest_framework.authentication import (
+    XSessionTokenAuthentication,
+)
+from allauth.headless import app_settings
+from allauth.headless.internal.sessionkit import session_store
+from .cache import (
+    cache_session,
+    forget_session,
+    get_cached_session,
+    get_session_state,
+    get_user_version,
+)
+
+
+USER_CACHE_SECONDS = 30
+USER_CACHE_SIZE = 1000
+
+_users = {}
+_users_lock = threading.Lock()
+
+
+def _get_local_user(user_id, version):
+    with _users_lock:
+        entry = _users.get(user_id)
+    if entry is None:
+        return None
+    cached_version, expires, user = entry
+    if cached_version != version or expires < time.monotonic():
+        return None
+    # Requests may change their user, so each gets its own copy
+    return copy.deepcopy(user)
+
+
+def _set_local_user(user, version):
+    with _users_lock:
+        if len(_users) >= USER_CACHE_SIZE:
+            _users.clear()
+        _users[user.pk] = (
+            version,
+            time.monotonic() + USER_CACHE_SECONDS,
+            copy.deepcopy(user),
+        )
+
+
+def clear_local_users():
+    with _users_lock:
+        _users.clear()
+
+
+def load_user(user_id):
+    users = get_user_model()._default_manager.with_teacher()
+    return users.filter(pk=user_id).first()
+
+
+class CachedSessionTokenAuthentication(XSessionTokenAuthentication):
+    def authenticate(self, request):
+        token = self.get_session_token(request)
+        if not token:
+            return None
+
+        cached = get_cached_session(token)
+        if cached is not None:
+            user_id, version = cached
+            session = session_store(token)
+            # A session missing from the cache is looked up again below,
+            # so deleted sessions stop authenticating right away
+            exists, current = get_session_state(session.cache_key, user_id)
+            if not exists:
+                forget_session(token)
+            elif current == version:
+                user = _get_local_user(user_id, version)
+                if user is None:
+                    user = load_user(user_id)
+                    if user is None or not user.is_active:
+                        return None
+                    _set_local_user(user, version)
+                # Loaded only if the view uses it
+                return (user, session)
+
+        session = app_settings.TOKEN_STRATEGY.lookup_session(token)
+        if session is None or session.get(SESSION_KEY) is None:
+            return None
+        user_id = get_user_model()._meta.pk.to_python(session[SESSION_KEY])
+        # Read before loading, so a change made meanwhile isn't hidden
+        version = get_user_version(user_id)
+        user = load_user(user_id)
+        if user is None or not user.is_active:
+            return None
+        cache_session(token, user_id, version, session.get_expiry_age())
+        _set_local_user(user, version)
+        return (user, session)
@@ -0,0 +1,40 @@
+"""
+Authentication backends loading users with their teacher.
+
+Nearly every request goes on to use request.user.teacher and its
+subscription, so they are joined into the query loading the user instead
+of being loaded by a query each.
+"""
+
+from django.contrib.auth import backends, get_user_model
+from allauth.account import auth_backends
+
+
+class TeacherUserMixin:
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.with_teacher().get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = await UserModel._default_manager.with_teacher().aget(
+                pk=user_id
+            )
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class ModelBackend(TeacherUserMixin, backends.ModelBackend):
+    pass
+
+
+class AuthenticationBackend(
+    TeacherUserMixin, auth_backends.AuthenticationBackend
+):
+    pass
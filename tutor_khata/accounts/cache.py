@@ -0,0 +1,73 @@
+"""
+Cache keys and version counters of the accounts app.
+
+Every user has a version counter, bumped whenever the user is saved, as
+on a password change or phone verification, and whenever their teacher
+or its subscription is, as cached users carry them. Cached sessions
+remember the version they were resolved with, so a change to the user
+makes every process resolve them again.
+"""
+
+from django.core.cache import cache
+from tutor_khata.core.utils import (
+    get_cache_version,
+    bump_cache_version,
+    bump_cache_versions,
+)
+
+
+# Longest the user of a session is remembered
+SESSION_TIMEOUT = 60 * 5
+
+
+def user_version_key(user_id):
+    return f"accounts:user:{user_id}:version"
+
+
+def session_key(token):
+    return f"accounts:session:{token}"
+
+
+def get_user_version(user_id):
+    return get_cache_version(user_version_key(user_id))
+
+
+def bump_user_version(user_id):
+    """Invalidate every cached session and copy of the user."""
+    return bump_cache_version(user_version_key(user_id))
+
+
+def bump_user_versions(user_ids):
+    bump_cache_versions([user_version_key(user_id) for user_id in user_ids])
+
+
+def get_cached_session(token):
+    """Get the user id and version a session token was resolved to."""
+    return cache.get(session_key(token))
+
+
+def get_session_state(session_cache_key, user_id):
+    """
+    Get whether a session is cached and the version of its user at once.
+
+    Sessions are kept in this cache by the cached_db engine, under
+    ``session_cache_key``, for as long as they exist.
+
+    Returns:
+        tuple: (whether the session is cached, the user's version or None)
+    """
+    version_key = user_version_key(user_id)
+    values = cache.get_many([session_cache_key, version_key])
+    return session_cache_key in values, values.get(version_key)
+
+
+def cache_session(token, user_id, version, timeout):
+    cache.set(
+        session_key(token),
+        (user_id, version),
+        min(timeout, SESSION_TIMEOUT),
+    )
+
+
+def forget_session(token):
+    cache.delete(session_key(token))
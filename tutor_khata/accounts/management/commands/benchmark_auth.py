@@ -0,0 +1,76 @@
+import time
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+)
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from allauth.headless.contrib.rest_framework.authentication import (
+    XSessionTokenAuthentication,
+)
+from allauth.headless.internal.sessionkit import new_session
+from tutor_khata.accounts.authentication import (
+    CachedSessionTokenAuthentication,
+    clear_local_users,
+)
+from tutor_khata.accounts.cache import forget_session
+from tutor_khata.accounts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-request overhead of session token authentication "
+        "with and without caching. The session used is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_id", type=int)
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(pk=options["user_id"])
+        except User.DoesNotExist as e:
+            raise CommandError(str(e))
+
+        session = new_session()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = (
+            "tutor_khata.accounts.backends.ModelBackend"
+        )
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        request = RequestFactory().get(
+            "/", HTTP_X_SESSION_TOKEN=session.session_key
+        )
+        clear_local_users()
+        try:
+            for label, authentication in (
+                ("Uncached", XSessionTokenAuthentication()),
+                ("Cached", CachedSessionTokenAuthentication()),
+            ):
+                queries, elapsed = self._measure(
+                    authentication, request, options["iterations"]
+                )
+                self.stdout.write(
+                    f"{label + ':':<10}{elapsed * 1_000_000:>8,.0f} µs "
+                    f"and {queries} queries per request"
+                )
+        finally:
+            forget_session(session.session_key)
+            session.delete()
+
+    def _measure(self, authentication, request, iterations):
+        # The first request fills the caches
+        if authentication.authenticate(request) is None:
+            raise CommandError("The session didn't authenticate")
+        with CaptureQueriesContext(connection) as context:
+            authentication.authenticate(request)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            authentication.authenticate(request)
+        elapsed = (time.perf_counter() - started) / iterations
+        return len(context.captured_queries), elapsed
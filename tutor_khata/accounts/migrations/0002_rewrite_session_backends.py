@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:12
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import caches
+from django.db import migrations
+from django.utils import timezone
+
+BACKENDS = {
+    "django.contrib.auth.backends.ModelBackend": (
+        "tutor_khata.accounts.backends.ModelBackend"
+    ),
+    "allauth.account.auth_backends.AuthenticationBackend": (
+        "tutor_khata.accounts.backends.AuthenticationBackend"
+    ),
+}
+BATCH_SIZE = 500
+
+
+def rewrite_session_backends(apps, schema_editor):
+    Session = apps.get_model("sessions", "Session")
+    store = SessionStore()
+    sessions = Session.objects.using(schema_editor.connection.alias).filter(
+        expire_date__gt=timezone.now()
+    )
+    changed = []
+    for session in sessions.iterator(chunk_size=BATCH_SIZE):
+        data = store.decode(session.session_data)
+        backend = BACKENDS.get(data.get(BACKEND_SESSION_KEY))
+        if backend is None:
+            continue
+        data[BACKEND_SESSION_KEY] = backend
+        session.session_data = store.encode(data)
+        changed.append(session)
+    Session.objects.using(schema_editor.connection.alias).bulk_update(
+        changed, ["session_data"], batch_size=BATCH_SIZE
+    )
+    # Cached copies would still carry the old paths
+    caches[settings.SESSION_CACHE_ALIAS].delete_many(
+        [KEY_PREFIX + session.session_key for session in changed]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("sessions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rewrite_session_backends, migrations.RunPython.noop
+        ),
+    ]
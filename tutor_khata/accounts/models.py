@@ -4,7 +4,9 @@ from django.contrib.auth.models import (
 from django.contrib.auth import (
     get_user_model,
 )
+from django.contrib.auth.signals import user_logged_out
 from django.db import models
+from django.dispatch import receiver
 from django.utils.translation import (
     gettext_lazy as _,
 )
@@ -15,6 +17,7 @@ from phonenumber_field.modelfields import (
     PhoneNumberField,
 )
 from tutor_khata.core.utils import LazyProxy
+from .cache import bump_user_version, forget_session
 
 
 class UserManager(BaseUserManager):
@@ -31,6 +34,12 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault("is_superuser", True)
         return self.create_user(phone_number, password, **extra_fields)
 
+    def with_teacher(self):
+        """Join in the teacher of the users, with its subscription."""
+        return self.select_related(
+            "teacher__subscription__plan", "teacher__subscription__price"
+        )
+
 
 class UserModel(AbstractUser):
     USERNAME_FIELD = "phone_number"
@@ -59,3 +68,19 @@ class UserModel(AbstractUser):
 
 
 User: UserModel = LazyProxy(get_user_model)
+
+
+@receiver(
+    [models.signals.post_save, models.signals.post_delete],
+    sender=UserModel,
+    dispatch_uid="invalidate_user",
+)
+def invalidate_user(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
+
+
+@receiver(user_logged_out, dispatch_uid="forget_logged_out_session")
+def forget_logged_out_session(sender, request, **kwargs):
+    # The session token of the headless API is the session key
+    if request is not None and request.session.session_key:
+        forget_session(request.session.session_key)
@@ -0,0 +1,48 @@
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+)
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from allauth.headless.internal.sessionkit import new_session, session_store
+from tutor_khata.core.models import AppSettings
+from .authentication import (
+    CachedSessionTokenAuthentication,
+    clear_local_users,
+)
+from .models import User
+
+
+class CachedSessionTokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AppSettings.set("teacher_capacity_per_day", "1000")
+        cls.user = User.objects.create_user("+8801711111111", "password")
+
+    def setUp(self):
+        # Versions and sessions of earlier tests are keyed by reused ids
+        cache.clear()
+        clear_local_users()
+        self.session = new_session()
+        self.session[SESSION_KEY] = str(self.user.pk)
+        self.session[BACKEND_SESSION_KEY] = (
+            "tutor_khata.accounts.backends.ModelBackend"
+        )
+        self.session[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+        self.session.save()
+        self.request = RequestFactory().get(
+            "/", HTTP_X_SESSION_TOKEN=self.session.session_key
+        )
+        self.authentication = CachedSessionTokenAuthentication()
+
+    def test_cached_session_takes_no_queries(self):
+        self.authentication.authenticate(self.request)
+        with self.assertNumQueries(0):
+            user, _ = self.authentication.authenticate(self.request)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_deleted_session_stops_authenticating(self):
+        self.authentication.authenticate(self.request)
+        session_store(self.session.session_key).delete()
+        self.assertIsNone(self.authentication.authenticate(self.request))
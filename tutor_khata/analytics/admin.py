@@ -0,0 +1,32 @@
+from django.contrib import admin
+from .models import BillingSummary
+
+
+@admin.register(BillingSummary)
+class BillingSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "day",
+        "price",
+        "active",
+        "trialing",
+        "started",
+        "converted",
+        "trials_expired",
+        "renewed",
+        "expired",
+        "revenue",
+    )
+    list_filter = ("price__plan",)
+    list_select_related = ("price__plan",)
+    date_hierarchy = "day"
+    ordering = ("-day", "price")
+
+    # Built by the summarize_billing command only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
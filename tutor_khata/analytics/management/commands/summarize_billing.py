@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from tutor_khata.analytics.utils import summarize_subscriptions
+
+
+class Command(BaseCommand):
+    help = (
+        "Folds the subscriptions modified since the last run "
+        "into the billing summaries"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = 0
+        for count in summarize_subscriptions(batch_size=options["batch_size"]):
+            total += count
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Summarized {total} subscriptions in {elapsed:.2f}s"
+        )
@@ -0,0 +1,167 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("billing", "0005_featureusageevent_featureusagedaily"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "subscription_id",
+                    models.BigIntegerField(
+                        help_text="Summarized subscription",
+                        unique=True,
+                        verbose_name="Subscription",
+                    ),
+                ),
+                (
+                    "price_id",
+                    models.BigIntegerField(
+                        help_text="Price of the subscription",
+                        verbose_name="Price",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("trial", "Trial"),
+                            ("active", "Active"),
+                            ("expired", "Expired"),
+                        ],
+                        help_text="Status of the subscription",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "ends_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the subscription ends",
+                        null=True,
+                        verbose_name="Ends At",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="BillingSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "day",
+                    models.DateField(
+                        help_text="Local day summarized", verbose_name="Day"
+                    ),
+                ),
+                (
+                    "active",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Active subscriptions at the end of the day",
+                        verbose_name="Active",
+                    ),
+                ),
+                (
+                    "trialing",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Subscriptions in trial at the end of the day",
+                        verbose_name="Trialing",
+                    ),
+                ),
+                (
+                    "started",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="New subscriptions",
+                        verbose_name="Started",
+                    ),
+                ),
+                (
+                    "converted",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Trials that became active",
+                        verbose_name="Converted",
+                    ),
+                ),
+                (
+                    "trials_expired",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Trials that expired without converting",
+                        verbose_name="Trials Expired",
+                    ),
+                ),
+                (
+                    "renewed",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Active or expired subscriptions that were renewed",
+                        verbose_name="Renewed",
+                    ),
+                ),
+                (
+                    "expired",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Active subscriptions that expired",
+                        verbose_name="Expired",
+                    ),
+                ),
+                (
+                    "revenue",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="Amount charged, in the currency of the price",
+                        verbose_name="Revenue",
+                    ),
+                ),
+                (
+                    "price",
+                    models.ForeignKey(
+                        help_text="Price of the summarized subscriptions",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="billing.price",
+                        verbose_name="Price",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Billing summaries",
+                "indexes": [
+                    models.Index(fields=["day"], name="billingsummary_day_idx")
+                ],
+                "unique_together": {("price", "day")},
+            },
+        ),
+    ]
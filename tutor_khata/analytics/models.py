@@ -0,0 +1,99 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+from tutor_khata.billing.models import Price, Subscription
+
+
+class BillingSummary(models.Model):
+    day = models.DateField(
+        _("Day"),
+        help_text=_("Local day summarized"),
+    )
+    price = models.ForeignKey(
+        Price,
+        on_delete=models.CASCADE,
+        verbose_name=_("Price"),
+        help_text=_("Price of the summarized subscriptions"),
+    )
+
+    # Number of subscriptions in the state at the end of the day
+    active = models.IntegerField(
+        _("Active"),
+        default=0,
+        help_text=_("Active subscriptions at the end of the day"),
+    )
+    trialing = models.IntegerField(
+        _("Trialing"),
+        default=0,
+        help_text=_("Subscriptions in trial at the end of the day"),
+    )
+
+    # Number of changes during the day
+    started = models.PositiveIntegerField(
+        _("Started"),
+        default=0,
+        help_text=_("New subscriptions"),
+    )
+    converted = models.PositiveIntegerField(
+        _("Converted"),
+        default=0,
+        help_text=_("Trials that became active"),
+    )
+    trials_expired = models.PositiveIntegerField(
+        _("Trials Expired"),
+        default=0,
+        help_text=_("Trials that expired without converting"),
+    )
+    renewed = models.PositiveIntegerField(
+        _("Renewed"),
+        default=0,
+        help_text=_("Active or expired subscriptions that were renewed"),
+    )
+    expired = models.PositiveIntegerField(
+        _("Expired"),
+        default=0,
+        help_text=_("Active subscriptions that expired"),
+    )
+    revenue = models.PositiveBigIntegerField(
+        _("Revenue"),
+        default=0,
+        help_text=_("Amount charged, in the currency of the price"),
+    )
+
+    class Meta:
+        unique_together = ("price", "day")
+        indexes = [
+            models.Index(fields=["day"], name="billingsummary_day_idx"),
+        ]
+        verbose_name_plural = _("Billing summaries")
+
+    def __str__(self):
+        return f"{self.price.plan} billing on {self.day}"
+
+
+class SubscriptionSnapshot(models.Model):
+    """The state of a subscription when it was last summarized."""
+
+    subscription_id = models.BigIntegerField(
+        _("Subscription"),
+        unique=True,
+        help_text=_("Summarized subscription"),
+    )
+    price_id = models.BigIntegerField(
+        _("Price"),
+        help_text=_("Price of the subscription"),
+    )
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=Subscription.Status,
+        help_text=_("Status of the subscription"),
+    )
+    ends_at = models.DateTimeField(
+        _("Ends At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the subscription ends"),
+    )
+
+    def __str__(self):
+        return f"Subscription {self.subscription_id} was {self.status}"
@@ -0,0 +1,57 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework import serializers
+
+
+MAX_SUMMARY_DAYS = 366
+
+
+class BillingSummaryQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        end = data.get("end") or timezone.localdate()
+        start = data.get("start") or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError(
+                {"start": "Start must not be after end."}
+            )
+        if (end - start).days >= MAX_SUMMARY_DAYS:
+            raise serializers.ValidationError(
+                f"At most {MAX_SUMMARY_DAYS} days can be summarized."
+            )
+        return {"start": start, "end": end}
+
+
+class BillingSummaryCountsSerializer(serializers.Serializer):
+    active = serializers.IntegerField()
+    trialing = serializers.IntegerField()
+    started = serializers.IntegerField()
+    converted = serializers.IntegerField()
+    trials_expired = serializers.IntegerField()
+    renewed = serializers.IntegerField()
+    expired = serializers.IntegerField()
+    revenue = serializers.IntegerField()
+
+
+class BillingSummaryDaySerializer(BillingSummaryCountsSerializer):
+    day = serializers.DateField()
+
+
+class BillingSummaryPriceSerializer(BillingSummaryCountsSerializer):
+    price = serializers.IntegerField()
+    plan = serializers.IntegerField()
+    currency = serializers.CharField()
+
+
+class BillingSummaryPlanSerializer(BillingSummaryCountsSerializer):
+    plan = serializers.IntegerField()
+    code = serializers.CharField()
+
+
+class BillingSummarySerializer(serializers.Serializer):
+    days = BillingSummaryDaySerializer(many=True)
+    prices = BillingSummaryPriceSerializer(many=True)
+    plans = BillingSummaryPlanSerializer(many=True)
+    trial_conversion_rate = serializers.FloatField(allow_null=True)
@@ -0,0 +1,11 @@
+from django.urls import path
+from .views import BillingSummaryView
+
+
+urlpatterns = [
+    path(
+        "analytics/billing/",
+        BillingSummaryView.as_view(),
+        name="billing-summary",
+    ),
+]
@@ -0,0 +1,276 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from command_scheduler.leases import check_lease
+from tutor_khata.billing.models import Price, Subscription
+from tutor_khata.core.models import AppSettings
+from .models import BillingSummary, SubscriptionSnapshot
+
+
+CURSOR_KEY = "billing_summary_cursor"
+# Subscriptions modified less than this ago may still be committing
+SETTLE_SECONDS = 60
+STATE_FIELDS = ("active", "trialing")
+CHANGE_FIELDS = (
+    "started",
+    "converted",
+    "trials_expired",
+    "renewed",
+    "expired",
+    "revenue",
+)
+STATE_BY_STATUS = {
+    Subscription.Status.ACTIVE: "active",
+    Subscription.Status.TRIAL: "trialing",
+}
+
+
+def _diff(old, new, amount):
+    """Get the summary changes of a subscription going from old to new.
+
+    Returns:
+        dict: {price_id: {field: change}}
+    """
+    Status = Subscription.Status
+    changes = defaultdict(lambda: defaultdict(int))
+    if old is not None and old["status"] in STATE_BY_STATUS:
+        changes[old["price_id"]][STATE_BY_STATUS[old["status"]]] -= 1
+    if new["status"] in STATE_BY_STATUS:
+        changes[new["price_id"]][STATE_BY_STATUS[new["status"]]] += 1
+
+    counts = changes[new["price_id"]]
+    if old is None:
+        counts["started"] += 1
+        if new["status"] == Status.ACTIVE:
+            counts["revenue"] += amount
+        return changes
+
+    transition = (old["status"], new["status"])
+    extended = (
+        old["ends_at"] is not None
+        and new["ends_at"] is not None
+        and new["ends_at"] > old["ends_at"]
+    )
+    if transition == (Status.TRIAL, Status.ACTIVE):
+        counts["converted"] += 1
+        counts["revenue"] += amount
+    elif transition == (Status.TRIAL, Status.EXPIRED):
+        counts["trials_expired"] += 1
+    elif transition == (Status.ACTIVE, Status.EXPIRED):
+        counts["expired"] += 1
+    elif transition == (Status.EXPIRED, Status.ACTIVE) or (
+        transition == (Status.ACTIVE, Status.ACTIVE) and extended
+    ):
+        counts["renewed"] += 1
+        counts["revenue"] += amount
+    return changes
+
+
+def _apply(day, price_id, counts):
+    summary = BillingSummary.objects.filter(day=day, price_id=price_id)
+    if not summary.exists():
+        # States carry over from the last summarized day
+        previous = (
+            BillingSummary.objects.filter(price_id=price_id, day__lt=day)
+            .order_by("-day")
+            .values(*STATE_FIELDS)
+            .first()
+        ) or {}
+        BillingSummary.objects.create(day=day, price_id=price_id, **previous)
+
+    changes = {
+        field: F(field) + counts[field]
+        for field in CHANGE_FIELDS
+        if counts[field]
+    }
+    if changes:
+        summary.update(**changes)
+
+    state_changes = {
+        field: F(field) + counts[field]
+        for field in STATE_FIELDS
+        if counts[field]
+    }
+    if state_changes:
+        # Later days were built on top of this one
+        BillingSummary.objects.filter(price_id=price_id, day__gte=day).update(
+            **state_changes
+        )
+
+
+def get_summary_cursor():
+    cursor = AppSettings.get(CURSOR_KEY)
+    if not cursor:
+        return None
+    modified, _, subscription_id = cursor.rpartition("|")
+    return parse_datetime(modified), int(subscription_id)
+
+
+def summarize_subscriptions(now=None, batch_size=1000):
+    """
+    Fold the subscriptions modified since the cursor into the summaries.
+
+    Each subscription is compared with its snapshot from the previous run
+    and the difference is counted on the local day it was modified. The
+    subscriptions are walked by (modified, id), and every batch saves its
+    snapshots in the same transaction as its counts, so an interrupted run
+    continues from the cursor of its last batch without counting twice.
+
+    Only the net change between two runs is seen, and deleted
+    subscriptions are not uncounted.
+
+    Yields:
+        int: Number of subscriptions of each batch
+    """
+    now = now or timezone.now()
+    cursor = get_summary_cursor()
+    amounts = dict(Price.objects.values_list("id", "amount"))
+    settled = now - timedelta(seconds=SETTLE_SECONDS)
+    while True:
+        batch = Subscription.objects.filter(modified__lte=settled)
+        if cursor is not None:
+            batch = batch.filter(
+                Q(modified__gt=cursor[0])
+                | Q(modified=cursor[0], id__gt=cursor[1])
+            )
+        subscriptions = list(
+            batch.order_by("modified", "id").values(
+                "id", "price_id", "status", "ends_at", "modified"
+            )[:batch_size]
+        )
+        if not subscriptions:
+            return
+
+        snapshots = {
+            snapshot["subscription_id"]: snapshot
+            for snapshot in SubscriptionSnapshot.objects.filter(
+                subscription_id__in=[s["id"] for s in subscriptions]
+            ).values("subscription_id", "price_id", "status", "ends_at")
+        }
+        totals = defaultdict(lambda: defaultdict(int))
+        for subscription in subscriptions:
+            day = timezone.localdate(subscription["modified"])
+            changes = _diff(
+                snapshots.get(subscription["id"]),
+                subscription,
+                amounts.get(subscription["price_id"], 0),
+            )
+            for price_id, counts in changes.items():
+                for field, change in counts.items():
+                    totals[(day, price_id)][field] += change
+
+        with transaction.atomic():
+            # Commits only while the command holds its scheduler lease
+            check_lease()
+            for (day, price_id), counts in sorted(totals.items()):
+                _apply(day, price_id, counts)
+            SubscriptionSnapshot.objects.bulk_create(
+                [
+                    SubscriptionSnapshot(
+                        subscription_id=subscription["id"],
+                        price_id=subscription["price_id"],
+                        status=subscription["status"],
+                        ends_at=subscription["ends_at"],
+                    )
+                    for subscription in subscriptions
+                ],
+                update_conflicts=True,
+                unique_fields=["subscription_id"],
+                update_fields=["price_id", "status", "ends_at"],
+            )
+            cursor = (subscriptions[-1]["modified"], subscriptions[-1]["id"])
+            AppSettings.set(CURSOR_KEY, f"{cursor[0].isoformat()}|{cursor[1]}")
+        yield len(subscriptions)
+
+
+def get_billing_summary(start, end):
+    """
+    Get the billing summary of the days from start through end.
+
+    Reads one summary row per price and day, and one row per price for
+    the states at the start.
+
+    Returns:
+        dict: Daily totals, totals per price and per plan over the days,
+            and the trial conversion rate.
+    """
+    prices = {
+        price.pk: price
+        for price in Price.objects.select_related("plan").annotate(
+            **{
+                field: Subquery(
+                    BillingSummary.objects.filter(
+                        price=OuterRef("pk"), day__lt=start
+                    )
+                    .order_by("-day")
+                    .values(field)[:1]
+                )
+                for field in STATE_FIELDS
+            }
+        )
+    }
+    rows = defaultdict(dict)
+    for summary in BillingSummary.objects.filter(
+        day__gte=start, day__lte=end
+    ).values("day", "price_id", *STATE_FIELDS, *CHANGE_FIELDS):
+        rows[summary["day"]][summary["price_id"]] = summary
+
+    states = {
+        price_id: {field: getattr(price, field) or 0 for field in STATE_FIELDS}
+        for price_id, price in prices.items()
+    }
+    price_totals = {
+        price_id: dict.fromkeys(CHANGE_FIELDS, 0) for price_id in prices
+    }
+    days = []
+    day = start
+    while day <= end:
+        day_total = dict.fromkeys((*STATE_FIELDS, *CHANGE_FIELDS), 0)
+        for price_id, summary in rows[day].items():
+            states[price_id] = {
+                field: summary[field] for field in STATE_FIELDS
+            }
+            for field in CHANGE_FIELDS:
+                day_total[field] += summary[field]
+                price_totals[price_id][field] += summary[field]
+        for state in states.values():
+            for field in STATE_FIELDS:
+                day_total[field] += state[field]
+        days.append({"day": day, **day_total})
+        day += timedelta(days=1)
+
+    plan_totals = {}
+    for price_id, price in prices.items():
+        price_totals[price_id].update(states[price_id])
+        plan_total = plan_totals.setdefault(
+            price.plan_id,
+            {
+                "plan": price.plan_id,
+                "code": price.plan.code,
+                **dict.fromkeys((*STATE_FIELDS, *CHANGE_FIELDS), 0),
+            },
+        )
+        for field in (*STATE_FIELDS, *CHANGE_FIELDS):
+            plan_total[field] += price_totals[price_id][field]
+
+    converted = sum(day["converted"] for day in days)
+    trials_ended = converted + sum(day["trials_expired"] for day in days)
+    return {
+        "days": days,
+        "prices": [
+            {
+                "price": price_id,
+                "plan": prices[price_id].plan_id,
+                "currency": prices[price_id].currency,
+                **totals,
+            }
+            for price_id, totals in price_totals.items()
+        ],
+        "plans": list(plan_totals.values()),
+        "trial_conversion_rate": (
+            converted / trials_ended if trials_ended else None
+        ),
+    }
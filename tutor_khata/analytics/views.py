@@ -0,0 +1,35 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema
+
+from .serializers import (
+    BillingSummaryQuerySerializer,
+    BillingSummarySerializer,
+)
+from .utils import get_billing_summary
+
+
+class BillingSummaryView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        parameters=[BillingSummaryQuerySerializer],
+        responses={
+            status.HTTP_200_OK: BillingSummarySerializer,
+            status.HTTP_400_BAD_REQUEST: None,
+        },
+    )
+    def get(self, request):
+        serializer = BillingSummaryQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        summary = get_billing_summary(
+            serializer.validated_data["start"],
+            serializer.validated_data["end"],
+        )
+        return Response(BillingSummarySerializer(summary).data)
@@ -1,17 +1,135 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils.translation import gettext_lazy as _, ngettext
+from tutor_khata.core.paginator import EstimatedCountPaginator
 from .models import (
     Plan,
     Price,
     Subscription,
     PlanFeature,
     FeatureUsage,
+    FeatureUsageEvent,
     Feature,
 )
+from .utils import extend_subscriptions, expire_subscriptions, reset_usage
 
 
-admin.site.register(Plan)
-admin.site.register(Price)
-admin.site.register(Subscription)
-admin.site.register(PlanFeature)
-admin.site.register(FeatureUsage)
-admin.site.register(Feature)
+@admin.register(Plan)
+class PlanAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "trial_months")
+    search_fields = ("code", "name")
+
+
+@admin.register(Feature)
+class FeatureAdmin(admin.ModelAdmin):
+    list_display = ("code", "name")
+    search_fields = ("code", "name")
+
+
+@admin.register(Price)
+class PriceAdmin(admin.ModelAdmin):
+    list_display = (
+        "plan",
+        "amount",
+        "currency",
+        "duration_months",
+        "is_active",
+    )
+    list_select_related = ("plan",)
+    list_filter = ("is_active", "plan")
+
+
+@admin.register(PlanFeature)
+class PlanFeatureAdmin(admin.ModelAdmin):
+    list_display = ("plan", "feature", "monthly_limit")
+    list_select_related = ("plan", "feature")
+    list_filter = ("plan",)
+    autocomplete_fields = ("feature",)
+
+
+@admin.register(Subscription)
+class SubscriptionAdmin(admin.ModelAdmin):
+    list_display = (
+        "teacher",
+        "plan",
+        "status",
+        "trial_ends_at",
+        "ends_at",
+        "auto_renew",
+    )
+    list_select_related = ("teacher", "plan")
+    list_filter = ("status", "plan")
+    search_fields = ("teacher__name", "teacher__user__phone_number")
+    autocomplete_fields = ("teacher",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("extend_by_month", "expire")
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "price":
+            # Price.__str__ shows the plan
+            kwargs["queryset"] = Price.objects.select_related("plan")
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    @admin.action(description=_("Extend selected subscriptions by 30 days"))
+    def extend_by_month(self, request, queryset):
+        extended = extend_subscriptions(queryset, days=30)
+        self.message_user(
+            request,
+            ngettext(
+                "%d subscription was extended.",
+                "%d subscriptions were extended.",
+                extended,
+            )
+            % extended,
+            messages.SUCCESS,
+        )
+
+    @admin.action(description=_("Expire selected subscriptions"))
+    def expire(self, request, queryset):
+        expired = expire_subscriptions(queryset)
+        self.message_user(
+            request,
+            ngettext(
+                "%d subscription was expired.",
+                "%d subscriptions were expired.",
+                expired,
+            )
+            % expired,
+            messages.SUCCESS,
+        )
+
+
+@admin.register(FeatureUsage)
+class FeatureUsageAdmin(admin.ModelAdmin):
+    list_display = ("teacher", "feature", "used", "last_reset_at")
+    list_select_related = ("teacher", "feature")
+    list_filter = ("feature",)
+    autocomplete_fields = ("teacher", "feature")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("reset",)
+
+    @admin.action(description=_("Reset selected usage counters"))
+    def reset(self, request, queryset):
+        reset = reset_usage(queryset)
+        self.message_user(
+            request,
+            ngettext(
+                "%d usage counter was reset.",
+                "%d usage counters were reset.",
+                reset,
+            )
+            % reset,
+            messages.SUCCESS,
+        )
+
+
+@admin.register(FeatureUsageEvent)
+class FeatureUsageEventAdmin(admin.ModelAdmin):
+    list_display = ("created", "teacher", "feature", "amount", "events")
+    list_select_related = ("teacher", "feature")
+    list_filter = ("feature",)
+    raw_id_fields = ("teacher",)
+    ordering = ("-created",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,411 @@
+"""
+Write-behind buffering of feature usage.
+
+Usage of high-frequency features is counted in a shared counter store
+instead of incrementing the FeatureUsage row on every event. Counts are
+grouped in time buckets; once a bucket is closed it never changes, and
+the flusher merges it into FeatureUsage with batched ``used = used + n``
+updates. Each flushed bucket is recorded in the same transaction as the
+updates, so a flush interrupted at any point is retried without counting
+anything twice.
+
+The last flushed bucket is also recorded in the store, before the bucket
+is cleared from it, and read along with the pending counts. Consumers
+count the buckets up to it from FeatureUsage and the later ones from the
+store, so every count is seen exactly once while a bucket is flushed.
+
+Usage events of every feature are counted in the store too, and written
+by the same flush as one FeatureUsageEvent per teacher, feature and
+bucket.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import UTC, datetime
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from tutor_khata.core.utils import is_cache_shared
+from .models import FeatureUsage, FeatureUsageEvent, FeatureUsageFlush
+from .cache import bump_teacher_versions
+
+
+FLUSH_BATCH_SIZE = 500
+# Buffered counts older than this are dropped by the counter store
+MAX_BACKLOG = 60 * 60 * 24
+MAX_FLUSHED_USAGE_ENTRIES = 10000
+
+DEFAULTS = {
+    "BACKEND": "tutor_khata.billing.buffer.CacheCounterStore",
+    "OPTIONS": {},
+    "FEATURES": [],
+    "BUCKET_SECONDS": 60,
+    "MAX_STALENESS": 300,
+}
+
+
+def get_buffer_setting(name):
+    return getattr(settings, "BILLING_USAGE_BUFFER", {}).get(
+        name, DEFAULTS[name]
+    )
+
+
+class BaseCounterStore:
+    """Counters grouped by time bucket.
+
+    A member is the ``"<teacher_id>:<feature_id>"`` pair being counted,
+    followed by ``":events"`` or ``":amount"`` for usage events.
+    """
+
+    def add(self, bucket, member, amount):
+        """Add to a counter and return its new value."""
+        raise NotImplementedError
+
+    def get_pending(self, buckets, member):
+        """
+        Get a member's counters over many buckets and the last flushed
+        bucket, in one lookup.
+
+        Returns:
+            tuple: (last flushed bucket or None, {bucket: count})
+        """
+        raise NotImplementedError
+
+    def set_flushed(self, bucket):
+        """Record the last bucket merged into FeatureUsage."""
+        raise NotImplementedError
+
+    def get_counts(self, bucket):
+        """Get every counter of a bucket as ``{member: count}``."""
+        raise NotImplementedError
+
+    def clear(self, bucket):
+        raise NotImplementedError
+
+
+class LocalCounterStore(BaseCounterStore):
+    """In-process counter store for tests and single-process setups."""
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._buckets = defaultdict(lambda: defaultdict(int))
+        self._flushed = None
+
+    def add(self, bucket, member, amount):
+        with self._lock:
+            self._buckets[bucket][member] += amount
+            return self._buckets[bucket][member]
+
+    def get_pending(self, buckets, member):
+        with self._lock:
+            return self._flushed, {
+                bucket: self._buckets[bucket][member]
+                for bucket in buckets
+                if member in self._buckets.get(bucket, {})
+            }
+
+    def set_flushed(self, bucket):
+        with self._lock:
+            self._flushed = bucket
+
+    def get_counts(self, bucket):
+        with self._lock:
+            return dict(self._buckets.get(bucket, {}))
+
+    def clear(self, bucket):
+        with self._lock:
+            self._buckets.pop(bucket, None)
+
+
+class CacheCounterStore(BaseCounterStore):
+    """Counter store on a Django cache shared by all processes.
+
+    Members of a bucket are indexed in numbered slots, which only needs
+    the atomic ``add`` and ``incr`` operations of the cache. Caches without
+    them would lose counts, and members, so they are refused.
+    """
+
+    def __init__(self, alias="default", timeout=MAX_BACKLOG, **options):
+        if not is_cache_shared(alias):
+            raise ImproperlyConfigured(
+                f"The {alias!r} cache can't hold usage counters, it must be "
+                "shared by every process and count atomically"
+            )
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def _key(self, bucket, *parts):
+        return ":".join(("billing:usage_buffer", str(bucket), *parts))
+
+    def add(self, bucket, member, amount):
+        key = self._key(bucket, "count", member)
+        if self.cache.add(key, amount, self.timeout):
+            slots_key = self._key(bucket, "slots")
+            self.cache.add(slots_key, 0, self.timeout)
+            slot = self.cache.incr(slots_key)
+            self.cache.set(
+                self._key(bucket, "slot", str(slot)), member, self.timeout
+            )
+            return amount
+        return self.cache.incr(key, amount)
+
+    def get_pending(self, buckets, member):
+        keys = {
+            self._key(bucket, "count", member): bucket for bucket in buckets
+        }
+        flushed_key = self._key("flushed")
+        values = self.cache.get_many([flushed_key, *keys])
+        flushed = values.pop(flushed_key, None)
+        return flushed, {keys[key]: count for key, count in values.items()}
+
+    def set_flushed(self, bucket):
+        self.cache.set(self._key("flushed"), bucket, None)
+
+    def _slot_keys(self, bucket):
+        slots = self.cache.get(self._key(bucket, "slots")) or 0
+        return [
+            self._key(bucket, "slot", str(slot))
+            for slot in range(1, slots + 1)
+        ]
+
+    def get_counts(self, bucket):
+        members = self.cache.get_many(self._slot_keys(bucket)).values()
+        keys = {
+            self._key(bucket, "count", member): member for member in members
+        }
+        counts = self.cache.get_many(list(keys))
+        return {keys[key]: count for key, count in counts.items()}
+
+    def clear(self, bucket):
+        slot_keys = self._slot_keys(bucket)
+        members = self.cache.get_many(slot_keys).values()
+        self.cache.delete_many(
+            [
+                *slot_keys,
+                *[self._key(bucket, "count", member) for member in members],
+                self._key(bucket, "slots"),
+            ]
+        )
+
+
+_store = None
+
+
+def get_counter_store():
+    global _store
+    if _store is None:
+        backend = import_string(get_buffer_setting("BACKEND"))
+        _store = backend(**get_buffer_setting("OPTIONS"))
+    return _store
+
+
+def is_buffered(feature_code):
+    return feature_code in get_buffer_setting("FEATURES")
+
+
+def get_bucket(now=None):
+    now = time.time() if now is None else now
+    return int(now // get_buffer_setting("BUCKET_SECONDS"))
+
+
+def _get_pending(store, member, now=None):
+    current = get_bucket(now)
+    lookback = get_buffer_setting("MAX_STALENESS") // get_buffer_setting(
+        "BUCKET_SECONDS"
+    )
+    flushed, counts = store.get_pending(
+        range(current - lookback, current + 1), member
+    )
+    # Flushed buckets may not be cleared yet, they're counted in the database
+    pending = sum(
+        count
+        for bucket, count in counts.items()
+        if flushed is None or bucket > flushed
+    )
+    return flushed, pending
+
+
+def get_pending_usage(teacher_id, feature_id, store=None, now=None):
+    """Get the usage counted in the store but not flushed yet."""
+    store = store or get_counter_store()
+    return _get_pending(store, f"{teacher_id}:{feature_id}", now)[1]
+
+
+_flushed_usage = {}
+
+
+def _get_flushed_usage(teacher_id, feature_id, flushed):
+    # Read again once another bucket is flushed, and at least every bucket
+    # as usage is also reset in the database
+    key = (teacher_id, feature_id)
+    now = time.monotonic()
+    used, cached_flushed, expires_at = _flushed_usage.get(key, (0, None, 0))
+    if cached_flushed != flushed or expires_at <= now:
+        if len(_flushed_usage) >= MAX_FLUSHED_USAGE_ENTRIES:
+            _flushed_usage.clear()
+        used = (
+            FeatureUsage.objects.filter(
+                teacher_id=teacher_id, feature_id=feature_id
+            )
+            .values_list("used", flat=True)
+            .first()
+        ) or 0
+        _flushed_usage[key] = (
+            used,
+            flushed,
+            now + get_buffer_setting("BUCKET_SECONDS"),
+        )
+    return used
+
+
+def buffer_usage(teacher_id, feature_id, amount, limit, store=None, now=None):
+    """
+    Count feature usage in the counter store.
+
+    The amount is counted first and taken back if the flushed usage plus
+    the pending usage goes over the limit, so concurrent consumers don't
+    overshoot it together. The flushed usage is read from the database
+    once per flushed bucket, and the pending usage from the buckets after
+    it. Pending usage older than MAX_STALENESS isn't seen, so the limit
+    may be overshot while the flusher is that far behind.
+
+    Returns:
+        tuple: (whether the amount was counted,
+            usage including pending counts or None if unlimited)
+    """
+    store = store or get_counter_store()
+    member = f"{teacher_id}:{feature_id}"
+    bucket = get_bucket(now)
+    store.add(bucket, member, amount)
+    if limit is None:
+        return True, None
+
+    # Read before the database, so a bucket flushed in between is counted
+    # twice rather than missed
+    flushed, pending = _get_pending(store, member, now)
+    used = _get_flushed_usage(teacher_id, feature_id, flushed) + pending
+    if used > limit:
+        store.add(bucket, member, -amount)
+        return False, used - amount
+    return True, used
+
+
+def buffer_usage_event(teacher_id, feature_id, amount, store=None, now=None):
+    """Count a usage event in the counter store, written by the flush."""
+    store = store or get_counter_store()
+    bucket = get_bucket(now)
+    store.add(bucket, f"{teacher_id}:{feature_id}:events", 1)
+    store.add(bucket, f"{teacher_id}:{feature_id}:amount", amount)
+
+
+def _apply_counts(bucket, counts):
+    pairs = []
+    by_amount = defaultdict(list)
+    events = defaultdict(dict)
+    for member, amount in counts.items():
+        if amount <= 0:
+            continue
+        teacher_id, feature_id, *kind = member.split(":")
+        teacher_id, feature_id = int(teacher_id), int(feature_id)
+        if kind:
+            events[teacher_id, feature_id][kind[0]] = amount
+            continue
+        pairs.append((teacher_id, feature_id))
+        by_amount[amount].append(
+            Q(teacher_id=teacher_id, feature_id=feature_id)
+        )
+
+    with transaction.atomic():
+        # Raises IntegrityError if the bucket was already flushed
+        FeatureUsageFlush.objects.create(bucket=bucket)
+        FeatureUsage.objects.bulk_create(
+            [
+                FeatureUsage(
+                    teacher_id=teacher_id,
+                    feature_id=feature_id,
+                    last_reset_at=timezone.now(),
+                )
+                for teacher_id, feature_id in pairs
+            ],
+            ignore_conflicts=True,
+        )
+        for amount, conditions in by_amount.items():
+            for start in range(0, len(conditions), FLUSH_BATCH_SIZE):
+                condition = Q()
+                for pair_condition in conditions[
+                    start : start + FLUSH_BATCH_SIZE
+                ]:
+                    condition |= pair_condition
+                FeatureUsage.objects.filter(condition).update(
+                    used=F("used") + amount
+                )
+        created = datetime.fromtimestamp(
+            bucket * get_buffer_setting("BUCKET_SECONDS"), UTC
+        )
+        FeatureUsageEvent.objects.bulk_create(
+            [
+                FeatureUsageEvent(
+                    teacher_id=teacher_id,
+                    feature_id=feature_id,
+                    amount=totals.get("amount", 0),
+                    events=totals.get("events", 0),
+                    created=created,
+                )
+                for (teacher_id, feature_id), totals in events.items()
+            ],
+            batch_size=FLUSH_BATCH_SIZE,
+        )
+    if pairs:
+        bump_teacher_versions({teacher_id for teacher_id, _ in pairs})
+    return len(pairs)
+
+
+def flush_usage(store=None, now=None):
+    """
+    Merge every closed bucket of the store into FeatureUsage.
+
+    The current and the previous bucket are left open for late writers.
+    Buckets are flushed in order and each one is marked as flushed in the
+    same transaction as its updates, then in the store before it's
+    cleared. Flushes are meant to run one at a time, as scheduled.
+
+    Returns:
+        tuple: (number of flushed buckets, number of updated rows)
+    """
+    store = store or get_counter_store()
+    bucket_seconds = get_buffer_setting("BUCKET_SECONDS")
+    window = get_buffer_setting("MAX_STALENESS") // bucket_seconds
+    backlog = MAX_BACKLOG // bucket_seconds
+    last_closed = get_bucket(now) - 2
+
+    last_flushed = FeatureUsageFlush.objects.aggregate(last=Max("bucket"))[
+        "last"
+    ]
+    if last_flushed is None:
+        last_flushed = last_closed - window - 1
+    else:
+        # Buckets flushed right before a crash may still be in the store
+        store.set_flushed(last_flushed)
+        for bucket in range(last_flushed - window, last_flushed + 1):
+            store.clear(bucket)
+
+    buckets = rows = 0
+    for bucket in range(
+        max(last_flushed + 1, last_closed - backlog), last_closed + 1
+    ):
+        try:
+            rows += _apply_counts(bucket, store.get_counts(bucket))
+        except IntegrityError:
+            # Flushed by a concurrent flusher
+            continue
+        store.set_flushed(bucket)
+        store.clear(bucket)
+        buckets += 1
+
+    FeatureUsageFlush.objects.filter(bucket__lt=last_closed - backlog).delete()
+    return buckets, rows
@@ -0,0 +1,102 @@
+"""
+Cache keys and version counters of the billing app.
+
+Cached billing data is keyed by version counters instead of being deleted
+on change: bumping a counter makes every entry built from the old version
+unreachable, and the entries expire on their own.
+"""
+
+from tutor_khata.accounts.cache import bump_user_versions
+from tutor_khata.teachers.models import Teacher
+from tutor_khata.core.utils import (
+    get_cache_version,
+    get_cache_versions,
+    bump_cache_version,
+    bump_cache_versions,
+)
+
+
+CATALOG_VERSION_KEY = "billing:catalog:version"
+CATALOG_TIMEOUT = 60 * 60 * 24
+ENTITLEMENTS_TIMEOUT = 60 * 60 * 24
+
+
+def get_catalog_version():
+    return get_cache_version(CATALOG_VERSION_KEY)
+
+
+def catalog_key(catalog_version):
+    return f"billing:catalog:data:{catalog_version}"
+
+
+def subscription_version_key(teacher_id):
+    return f"billing:subscription:{teacher_id}:version"
+
+
+def entitlements_key(teacher_id, catalog_version, subscription_version):
+    return (
+        f"billing:entitlements:{teacher_id}"
+        f":{catalog_version}:{subscription_version}"
+    )
+
+
+def get_entitlements_key(teacher_id):
+    """Get the cache key of the teacher's current entitlement snapshot."""
+    subscription_key = subscription_version_key(teacher_id)
+    versions = get_cache_versions([CATALOG_VERSION_KEY, subscription_key])
+    return entitlements_key(
+        teacher_id,
+        versions[CATALOG_VERSION_KEY],
+        versions[subscription_key],
+    )
+
+
+def teacher_version_key(user_id):
+    # Keyed by the user id, which is known before the teacher is loaded
+    return f"billing:teacher:{user_id}:version"
+
+
+def get_teacher_etag(user_id):
+    """Get an ETag of the teacher's subscription and usage in one lookup."""
+    teacher_key = teacher_version_key(user_id)
+    versions = get_cache_versions([teacher_key, CATALOG_VERSION_KEY])
+    return (
+        f'"{user_id}.{versions[teacher_key]}'
+        f'.{versions[CATALOG_VERSION_KEY]}"'
+    )
+
+
+def bump_catalog_version():
+    """Invalidate everything derived from plans, prices and features."""
+    return bump_cache_version(CATALOG_VERSION_KEY)
+
+
+def _get_user_ids(teacher_ids):
+    return Teacher.objects.filter(pk__in=teacher_ids).values_list(
+        "user_id", flat=True
+    )
+
+
+def bump_subscription_version(teacher_id):
+    """Invalidate everything derived from the teacher's subscription,
+    including the cached users carrying it."""
+    bump_user_versions(_get_user_ids([teacher_id]))
+    return bump_cache_version(subscription_version_key(teacher_id))
+
+
+def bump_subscription_versions(teacher_ids):
+    bump_user_versions(_get_user_ids(teacher_ids))
+    bump_cache_versions(
+        [subscription_version_key(teacher_id) for teacher_id in teacher_ids]
+    )
+
+
+def bump_teacher_version(user_id):
+    """Invalidate the ETags of the teacher's subscription and usage."""
+    return bump_cache_version(teacher_version_key(user_id))
+
+
+def bump_teacher_versions(teacher_ids):
+    """Same as bump_teacher_version, by teacher ids."""
+    user_ids = _get_user_ids(teacher_ids)
+    bump_cache_versions([teacher_version_key(user_id) for user_id in user_ids])
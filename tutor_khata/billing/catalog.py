@@ -0,0 +1,93 @@
+"""
+Prerendered plan catalog.
+
+Plans, prices and plan features rarely change, so the plan endpoints are
+served from response bodies rendered once per catalog version. The
+rendered catalog lives in the shared cache and is memoized per process
+for its version, which leaves a single cache lookup (the catalog version)
+per request.
+"""
+
+import gzip
+import hashlib
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from tutor_khata.core.utils import etag_matches
+from .cache import CATALOG_TIMEOUT, catalog_key, get_catalog_version
+from .models import Plan
+from .serializers import PlanListSerializer, PlanDetailSerializer
+
+
+_local_catalog = (None, None)
+
+
+def _render(data):
+    body = JSONRenderer().render(data)
+    compressed = gzip.compress(body)
+    return {
+        "body": body,
+        "gzip": compressed if len(compressed) < len(body) else None,
+        "etag": '"%s"' % hashlib.md5(body, usedforsecurity=False).hexdigest(),
+    }
+
+
+def build_catalog():
+    """Render the plan list and every plan detail response."""
+    plans = Plan.objects.prefetch_related(
+        "price_set", "planfeature_set__feature"
+    ).all()
+    return {
+        "plans": _render(PlanListSerializer(plans, many=True).data),
+        "plan_details": {
+            plan.pk: _render(PlanDetailSerializer(plan).data) for plan in plans
+        },
+    }
+
+
+def get_catalog():
+    """Get the rendered catalog of the current catalog version."""
+    global _local_catalog
+
+    version = get_catalog_version()
+    local_version, catalog = _local_catalog
+    if local_version == version:
+        return catalog
+
+    key = catalog_key(version)
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = build_catalog()
+        cache.set(key, catalog, CATALOG_TIMEOUT)
+    _local_catalog = (version, catalog)
+    return catalog
+
+
+def get_plans_entry():
+    return get_catalog()["plans"]
+
+
+def get_plan_detail_entry(pk):
+    try:
+        return get_catalog()["plan_details"][pk]
+    except KeyError:
+        raise Http404("No Plan matches the given query.")
+
+
+def catalog_response(request, entry):
+    """Build a conditional, optionally gzipped response of a catalog entry."""
+    if etag_matches(request, entry["etag"]):
+        response = HttpResponseNotModified()
+        response["ETag"] = entry["etag"]
+        return response
+
+    accept_encoding = request.headers.get("Accept-Encoding", "")
+    if entry["gzip"] and "gzip" in accept_encoding:
+        response = HttpResponse(entry["gzip"], content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(entry["body"], content_type="application/json")
+    response["ETag"] = entry["etag"]
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
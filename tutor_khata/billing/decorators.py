@@ -0,0 +1,35 @@
+from functools import wraps
+from rest_framework import status
+from rest_framework.response import Response
+from tutor_khata.core.utils import etag_matches, is_cache_shared
+from .cache import get_teacher_etag
+
+
+def teacher_etag(view_method):
+    """
+    Make a view of the teacher's billing data conditional.
+
+    The ETag only depends on version counters, so a matching
+    If-None-Match is answered with 304 after a single cache lookup.
+    Responses are only conditional with a shared cache, as per-process
+    versions miss the changes made by other processes.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not is_cache_shared():
+            return view_method(self, request, *args, **kwargs)
+
+        # Taken before reading, so a concurrent change gets a new ETag
+        etag = get_teacher_etag(request.user.pk)
+        if etag_matches(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+    return wrapper
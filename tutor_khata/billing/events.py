@@ -0,0 +1,130 @@
+"""
+Feature usage history.
+
+Every consumed feature is counted in the usage counter store, which costs
+no query on the consuming request, and the usage flush writes the counts
+of each closed bucket as a FeatureUsageEvent per teacher, feature and
+bucket (see ``buffer``). The rollup aggregates the events into a
+FeatureUsageDaily row per teacher, feature and local day, which is what
+usage charts are served from.
+
+A day keeps receiving events until every bucket of it is flushed, so the
+rollup recomputes whole days from a cursor that only moves past a day
+once it has settled. Recomputing a day overwrites its rows, which makes
+the rollup safe to run again.
+"""
+
+from datetime import UTC, datetime, timedelta
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .buffer import buffer_usage_event, get_buffer_setting
+from .models import FeatureUsageEvent, FeatureUsageDaily, FeatureUsageFlush
+
+
+# Days that ended less than this ago are recomputed by every rollup
+ROLLUP_SETTLE_SECONDS = 60 * 10
+ROLLUP_BATCH_SIZE = 1000
+EVENT_RETENTION_DAYS = 90
+PRUNE_BATCH_SIZE = 5000
+MAX_HISTORY_DAYS = 366
+
+
+def record_usage_event(teacher_id, feature_id, amount=1):
+    """Count a usage event, written with its bucket by the usage flush."""
+    buffer_usage_event(teacher_id, feature_id, amount)
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, start + timedelta(days=1)
+
+
+def rollup_usage_events(since, now=None):
+    """
+    Recompute the daily usage of every day from ``since`` through today.
+
+    Yields:
+        tuple: (day, number of daily rows written)
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    day = since
+    while day <= today:
+        start, end = _day_bounds(day)
+        totals = (
+            FeatureUsageEvent.objects.filter(
+                created__gte=start, created__lt=end
+            )
+            .annotate(day=TruncDate("created"))
+            .values("teacher_id", "feature_id", "day")
+            .annotate(used=Sum("amount"), events=Sum("events"))
+            .order_by()
+        )
+        rows = FeatureUsageDaily.objects.bulk_create(
+            [FeatureUsageDaily(**total) for total in totals],
+            batch_size=ROLLUP_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["teacher", "feature", "day"],
+            update_fields=["used", "events"],
+        )
+        yield day, len(rows)
+        day += timedelta(days=1)
+
+
+def get_settled_day(now=None):
+    """Get the first day that may still receive events."""
+    now = now or timezone.now()
+    settled = now - timedelta(seconds=ROLLUP_SETTLE_SECONDS)
+    last_flushed = FeatureUsageFlush.objects.aggregate(last=Max("bucket"))[
+        "last"
+    ]
+    if last_flushed is not None:
+        # Buckets after the last flushed one are still to be written
+        flushed_until = datetime.fromtimestamp(
+            (last_flushed + 1) * get_buffer_setting("BUCKET_SECONDS"), UTC
+        )
+        settled = min(settled, flushed_until)
+    return timezone.localdate(settled)
+
+
+def prune_usage_events(before):
+    """
+    Delete the events created before the given time in batches.
+
+    Returns:
+        int: Number of deleted events
+    """
+    deleted = 0
+    while True:
+        ids = list(
+            FeatureUsageEvent.objects.filter(created__lt=before)
+            .order_by("id")
+            .values_list("id", flat=True)[:PRUNE_BATCH_SIZE]
+        )
+        if not ids:
+            return deleted
+        deleted += FeatureUsageEvent.objects.filter(id__in=ids).delete()[0]
+
+
+def get_usage_history(teacher, feature, days=30, today=None):
+    """
+    Get the daily usage of a feature over the last days, oldest first.
+
+    Days without usage are included with zero usage.
+    """
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = FeatureUsageDaily.objects.filter(
+        teacher=teacher,
+        feature=feature,
+        day__gte=start,
+        day__lte=today,
+    ).values_list("day", "used", "events")
+    by_day = {day: (used, events) for day, used, events in rows}
+    history = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        used, events = by_day.get(day, (0, 0))
+        history.append({"day": day, "used": used, "events": events})
+    return history
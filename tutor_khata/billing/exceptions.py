@@ -0,0 +1,24 @@
+class FeatureUnavailable(Exception):
+    """Raised when a teacher can't use a feature at all."""
+
+    def __init__(self, feature_code, reason):
+        super().__init__(reason)
+        self.feature_code = feature_code
+        self.reason = reason
+
+
+class FeatureNotFound(FeatureUnavailable):
+    """Raised when no feature has the given code."""
+
+    def __init__(self, feature_code):
+        super().__init__(feature_code, "Feature not found")
+
+
+class FeatureLimitReached(FeatureUnavailable):
+    """Raised when consuming a feature would exceed its monthly limit."""
+
+    def __init__(self, feature_code, used, limit):
+        super().__init__(feature_code, "Monthly limit reached")
+        self.used = used
+        self.limit = limit
+        self.remaining = max(0, limit - used)
@@ -0,0 +1,57 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from tutor_khata.billing.buffer import LocalCounterStore, buffer_usage
+from tutor_khata.billing.models import Feature
+from tutor_khata.billing.utils import _increment_usage
+from tutor_khata.teachers.models import Teacher
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the throughput of direct and write-behind usage counting. "
+        "Nothing is persisted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("teacher_id", type=int)
+        parser.add_argument("feature_code")
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            teacher = Teacher.objects.get(pk=options["teacher_id"])
+            feature = Feature.objects.get(code=options["feature_code"])
+        except (Teacher.DoesNotExist, Feature.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        iterations = options["iterations"]
+        # Large enough to never be reached, but still checked
+        limit = 2**31 - 1
+        with transaction.atomic():
+            # Make sure the row exists, as it would after the first use
+            teacher.featureusage_set.get_or_create(
+                feature=feature, defaults={"last_reset_at": timezone.now()}
+            )
+            direct = self._measure(
+                lambda: _increment_usage(teacher.pk, feature.pk, 1, limit),
+                iterations,
+            )
+            store = LocalCounterStore()
+            buffered = self._measure(
+                lambda: buffer_usage(
+                    teacher.pk, feature.pk, 1, limit, store=store
+                ),
+                iterations,
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Direct writes:  {direct:,.0f} ops/s")
+        self.stdout.write(f"Write-behind:   {buffered:,.0f} ops/s")
+
+    def _measure(self, operation, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        return iterations / (time.perf_counter() - started)
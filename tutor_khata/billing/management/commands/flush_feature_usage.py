@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from tutor_khata.billing.buffer import flush_usage
+
+
+class Command(BaseCommand):
+    help = "Merges buffered feature usage into the usage counters"
+
+    def handle(self, *args, **options):
+        buckets, rows = flush_usage()
+        self.stdout.write(
+            f"Flushed {buckets} usage buckets into {rows} usage rows"
+        )
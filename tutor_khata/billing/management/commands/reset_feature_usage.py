@@ -0,0 +1,56 @@
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from command_scheduler.shards import parse_shard
+from tutor_khata.billing.utils import reset_feature_usage
+from tutor_khata.core.models import AppSettings
+
+
+CURSOR_KEY = "feature_usage_reset_cursor"
+
+
+class Command(BaseCommand):
+    help = (
+        "Resets the feature usage of every subscription whose cycle restarted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the progress saved by an interrupted run",
+        )
+        parser.add_argument(
+            "--shard",
+            type=parse_shard,
+            help="Reset only the teachers of shard i/K",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        run_date = timezone.localdate(now).isoformat()
+
+        # Resume an interrupted run of the same day
+        cursor_key = CURSOR_KEY
+        if options["shard"]:
+            cursor_key += ":{}/{}".format(*options["shard"])
+        start_after = 0
+        cursor = AppSettings.get(cursor_key, "")
+        cursor_date, _, cursor_id = cursor.partition(":")
+        if cursor_date == run_date and not options["restart"]:
+            start_after = int(cursor_id)
+
+        started = time.perf_counter()
+        total_rows = 0
+        for last_id, rows in reset_feature_usage(
+            now, start_after, options["batch_size"], options["shard"]
+        ):
+            total_rows += rows
+            AppSettings.set(cursor_key, f"{run_date}:{last_id}")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Reset {total_rows} usage rows in {elapsed:.2f}s "
+            f"({total_rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
@@ -0,0 +1,59 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tutor_khata.billing.events import (
+    EVENT_RETENTION_DAYS,
+    get_settled_day,
+    prune_usage_events,
+    rollup_usage_events,
+)
+from tutor_khata.billing.models import FeatureUsageEvent
+from tutor_khata.core.models import AppSettings
+
+
+CURSOR_KEY = "feature_usage_rollup_cursor"
+
+
+class Command(BaseCommand):
+    help = "Aggregates feature usage events into daily usage"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Recompute from this day instead of the saved cursor",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+
+        since = options["since"]
+        if since is None:
+            cursor = AppSettings.get(CURSOR_KEY)
+            if cursor:
+                since = date.fromisoformat(cursor)
+            else:
+                first = (
+                    FeatureUsageEvent.objects.order_by("created")
+                    .values_list("created", flat=True)
+                    .first()
+                )
+                since = timezone.localdate(first or now)
+
+        started = time.perf_counter()
+        total_rows = 0
+        for day, rows in rollup_usage_events(since, now):
+            total_rows += rows
+            self.stdout.write(f"{day}: {rows} daily rows")
+
+        settled = get_settled_day(now)
+        AppSettings.set(CURSOR_KEY, settled.isoformat())
+
+        # Long settled, so their days are final
+        pruned = prune_usage_events(now - timedelta(days=EVENT_RETENTION_DAYS))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Rolled up {total_rows} daily rows and pruned {pruned} events "
+            f"in {elapsed:.2f}s"
+        )
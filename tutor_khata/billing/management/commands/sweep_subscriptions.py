@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from command_scheduler.shards import parse_shard
+from tutor_khata.billing.utils import sweep_subscriptions
+
+
+class Command(BaseCommand):
+    help = "Expires or renews the subscriptions whose trial or period ended"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--shard",
+            type=parse_shard,
+            help="Sweep only the teachers of shard i/K",
+        )
+
+    def handle(self, *args, **options):
+        batches = 0
+        for metrics in sweep_subscriptions(
+            batch_size=options["batch_size"], shard=options["shard"]
+        ):
+            batches += 1
+            elapsed = metrics.pop("elapsed")
+            counts = ", ".join(
+                f"{name}={value}" for name, value in metrics.items()
+            )
+            self.stdout.write(
+                f"Batch {batches}: {counts} in {elapsed * 1000:.0f}ms"
+            )
+        self.stdout.write(f"Swept {batches} batches")
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeatureUsageFlush",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bucket",
+                    models.BigIntegerField(
+                        help_text="Time bucket of buffered usage merged into the counters",
+                        unique=True,
+                        verbose_name="Bucket",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Date and time when the bucket was flushed",
+                        verbose_name="Created",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0002_featureusageflush"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="featureusage",
+            index=models.Index(
+                fields=["teacher", "last_reset_at"],
+                name="featureusage_reset_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0003_featureusage_reset_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["status", "ends_at"], name="subscription_ends_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["status", "trial_ends_at"],
+                name="subscription_trial_ends_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0004_subscription_status_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeatureUsageEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.PositiveIntegerField(
+                        default=1,
+                        help_text="Amount of usage consumed",
+                        verbose_name="Amount",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        db_index=True,
+                        help_text="Date and time when the feature was used",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "feature",
+                    models.ForeignKey(
+                        help_text="Feature that was used",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="billing.feature",
+                        verbose_name="Feature",
+                    ),
+                ),
+                (
+                    "teacher",
+                    models.ForeignKey(
+                        help_text="Teacher who used the feature",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="teachers.teacher",
+                        verbose_name="Teacher",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="FeatureUsageDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "day",
+                    models.DateField(
+                        help_text="Local day of the usage", verbose_name="Day"
+                    ),
+                ),
+                (
+                    "used",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Total amount used during the day",
+                        verbose_name="Used",
+                    ),
+                ),
+                (
+                    "events",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of usage events during the day",
+                        verbose_name="Events",
+                    ),
+                ),
+                (
+                    "feature",
+                    models.ForeignKey(
+                        help_text="Feature that was used",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="billing.feature",
+                        verbose_name="Feature",
+                    ),
+                ),
+                (
+                    "teacher",
+                    models.ForeignKey(
+                        help_text="Teacher who used the feature",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="teachers.teacher",
+                        verbose_name="Teacher",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("teacher", "feature", "day")},
+            },
+        ),
+    ]
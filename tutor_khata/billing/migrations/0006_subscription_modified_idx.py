@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0005_featureusageevent_featureusagedaily"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["modified", "id"], name="subscription_modified_idx"
+            ),
+        ),
+    ]
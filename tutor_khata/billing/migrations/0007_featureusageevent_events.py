@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0006_subscription_modified_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="featureusageevent",
+            name="events",
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text="Number of times the feature was used",
+                verbose_name="Events",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="featureusageevent",
+            name="created",
+            field=models.DateTimeField(
+                db_index=True,
+                help_text="Start of the time bucket when the feature was used",
+                verbose_name="Created",
+            ),
+        ),
+    ]
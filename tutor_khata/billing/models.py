@@ -1,6 +1,13 @@
 from django.utils.translation import gettext_lazy as _
 from django.db import models
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
 from tutor_khata.teachers.models import Teacher
+from .cache import (
+    bump_catalog_version,
+    bump_subscription_version,
+    bump_teacher_versions,
+)
 
 
 class Plan(models.Model):
@@ -74,6 +81,27 @@ class PlanFeature(models.Model):
         return f"{self.plan.name}::{self.feature.name}"
 
 
+class FeatureUsageQuerySet(models.QuerySet):
+    def with_limits(self):
+        """Annotate the monthly limit of the teacher's plan
+        and the remaining usage of each row."""
+        monthly_limit = PlanFeature.objects.filter(
+            plan__subscription__teacher=models.OuterRef("teacher"),
+            feature=models.OuterRef("feature"),
+        ).values("monthly_limit")[:1]
+        return self.annotate(
+            monthly_limit=models.Subquery(monthly_limit),
+        ).annotate(
+            remaining=models.Case(
+                models.When(monthly_limit__isnull=True, then=None),
+                default=Greatest(
+                    models.F("monthly_limit") - models.F("used"),
+                    models.Value(0),
+                ),
+            ),
+        )
+
+
 class FeatureUsage(models.Model):
     teacher = models.ForeignKey(
         Teacher,
@@ -97,13 +125,105 @@ class FeatureUsage(models.Model):
         help_text=_("Last time the usage counter was reset"),
     )
 
+    objects = FeatureUsageQuerySet.as_manager()
+
     class Meta:
         unique_together = ("teacher", "feature")
+        indexes = [
+            models.Index(
+                fields=["teacher", "last_reset_at"],
+                name="featureusage_reset_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.teacher}'s {self.feature} usage is {self.used}"
 
 
+class FeatureUsageFlush(models.Model):
+    bucket = models.BigIntegerField(
+        _("Bucket"),
+        unique=True,
+        help_text=_("Time bucket of buffered usage merged into the counters"),
+    )
+    created = models.DateTimeField(
+        _("Created"),
+        auto_now_add=True,
+        help_text=_("Date and time when the bucket was flushed"),
+    )
+
+    def __str__(self):
+        return f"Usage bucket {self.bucket}"
+
+
+class FeatureUsageEvent(models.Model):
+    teacher = models.ForeignKey(
+        Teacher,
+        on_delete=models.CASCADE,
+        verbose_name=_("Teacher"),
+        help_text=_("Teacher who used the feature"),
+    )
+    feature = models.ForeignKey(
+        Feature,
+        on_delete=models.CASCADE,
+        verbose_name=_("Feature"),
+        help_text=_("Feature that was used"),
+    )
+    amount = models.PositiveIntegerField(
+        _("Amount"),
+        default=1,
+        help_text=_("Amount of usage consumed"),
+    )
+    events = models.PositiveIntegerField(
+        _("Events"),
+        default=1,
+        help_text=_("Number of times the feature was used"),
+    )
+    created = models.DateTimeField(
+        _("Created"),
+        db_index=True,
+        help_text=_("Start of the time bucket when the feature was used"),
+    )
+
+    def __str__(self):
+        return f"{self.teacher} used {self.feature} ({self.amount})"
+
+
+class FeatureUsageDaily(models.Model):
+    teacher = models.ForeignKey(
+        Teacher,
+        on_delete=models.CASCADE,
+        verbose_name=_("Teacher"),
+        help_text=_("Teacher who used the feature"),
+    )
+    feature = models.ForeignKey(
+        Feature,
+        on_delete=models.CASCADE,
+        verbose_name=_("Feature"),
+        help_text=_("Feature that was used"),
+    )
+    day = models.DateField(
+        _("Day"),
+        help_text=_("Local day of the usage"),
+    )
+    used = models.PositiveIntegerField(
+        _("Used"),
+        default=0,
+        help_text=_("Total amount used during the day"),
+    )
+    events = models.PositiveIntegerField(
+        _("Events"),
+        default=0,
+        help_text=_("Number of usage events during the day"),
+    )
+
+    class Meta:
+        unique_together = ("teacher", "feature", "day")
+
+    def __str__(self):
+        return f"{self.teacher}'s {self.feature} usage on {self.day}"
+
+
 class Price(models.Model):
     plan = models.ForeignKey(
         Plan,
@@ -200,5 +320,53 @@ class Subscription(models.Model):
         help_text=_("Date and time when the subscription was last modified"),
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "ends_at"],
+                name="subscription_ends_idx",
+            ),
+            models.Index(
+                fields=["status", "trial_ends_at"],
+                name="subscription_trial_ends_idx",
+            ),
+            # Summaries walk the subscriptions by modification
+            models.Index(
+                fields=["modified", "id"],
+                name="subscription_modified_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.teacher} subscribed to {self.plan}"
+
+
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+for catalog_model in (Plan, Feature, PlanFeature, Price):
+    receiver(
+        [models.signals.post_save, models.signals.post_delete],
+        sender=catalog_model,
+        dispatch_uid=f"invalidate_catalog_{catalog_model._meta.model_name}",
+    )(invalidate_catalog)
+
+
+@receiver(
+    [models.signals.post_save, models.signals.post_delete],
+    sender=Subscription,
+    dispatch_uid="invalidate_subscription",
+)
+def invalidate_subscription(sender, instance, **kwargs):
+    bump_subscription_version(instance.teacher_id)
+    bump_teacher_versions([instance.teacher_id])
+
+
+@receiver(
+    [models.signals.post_save, models.signals.post_delete],
+    sender=FeatureUsage,
+    dispatch_uid="invalidate_feature_usage",
+)
+def invalidate_feature_usage(sender, instance, **kwargs):
+    bump_teacher_versions([instance.teacher_id])
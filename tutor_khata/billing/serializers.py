@@ -7,7 +7,7 @@ from .models import (
     Subscription,
     FeatureUsage,
 )
-from .utils import get_feature_monthly_limit, get_feature_remaining
+from .events import MAX_HISTORY_DAYS
 
 
 class FeatureSerializer(serializers.ModelSerializer):
@@ -122,8 +122,8 @@ class SubscriptionUpdateSerializer(serializers.ModelSerializer):
 
 class FeatureUsageSerializer(serializers.ModelSerializer):
     feature = FeatureSerializer(read_only=True)
-    monthly_limit = serializers.SerializerMethodField()
-    remaining = serializers.SerializerMethodField()
+    monthly_limit = serializers.IntegerField(read_only=True, allow_null=True)
+    remaining = serializers.IntegerField(read_only=True, allow_null=True)
 
     class Meta:
         model = FeatureUsage
@@ -136,12 +136,6 @@ class FeatureUsageSerializer(serializers.ModelSerializer):
             "last_reset_at",
         )
 
-    def get_monthly_limit(self, obj):
-        return get_feature_monthly_limit(obj.teacher, obj.feature)
-
-    def get_remaining(self, obj):
-        return get_feature_remaining(obj.teacher, obj.feature)
-
 
 class FeatureCheckSerializer(serializers.Serializer):
     feature_code = serializers.CharField()
@@ -152,3 +146,39 @@ class FeatureCheckSerializer(serializers.Serializer):
         except Feature.DoesNotExist:
             raise serializers.ValidationError("Feature not found")
         return value
+
+
+class FeatureBatchCheckSerializer(serializers.Serializer):
+    features = serializers.JSONField(
+        help_text='List of feature codes, or "all" to check every feature'
+    )
+
+    def validate_features(self, value):
+        if value == "all":
+            return None
+        if (
+            not isinstance(value, list)
+            or not value
+            or not all(isinstance(code, str) for code in value)
+        ):
+            raise serializers.ValidationError(
+                'Must be a list of feature codes or "all"'
+            )
+        return list(dict.fromkeys(value))
+
+
+class FeatureConsumeSerializer(serializers.Serializer):
+    feature_code = serializers.CharField()
+    amount = serializers.IntegerField(min_value=1, default=1)
+
+
+class FeatureUsageHistoryQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(
+        min_value=1, max_value=MAX_HISTORY_DAYS, default=30
+    )
+
+
+class FeatureUsageDaySerializer(serializers.Serializer):
+    day = serializers.DateField()
+    used = serializers.IntegerField()
+    events = serializers.IntegerField()
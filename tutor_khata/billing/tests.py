@@ -0,0 +1,305 @@
+import threading
+import time
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from tutor_khata.accounts.models import User
+from tutor_khata.core.models import AppSettings
+from tutor_khata.core.utils import get_cache_version
+from .buffer import (
+    CacheCounterStore,
+    _apply_counts,
+    _flushed_usage,
+    buffer_usage,
+    buffer_usage_event,
+    flush_usage,
+    get_buffer_setting,
+    get_pending_usage,
+)
+from .cache import subscription_version_key
+from .exceptions import FeatureLimitReached
+from .models import (
+    Feature,
+    FeatureUsage,
+    FeatureUsageEvent,
+    PlanFeature,
+    Price,
+    Subscription,
+)
+from .utils import can_use_feature, consume_feature
+
+
+class FeatureUsageQueryCountTests(APITestCase):
+    fixtures = ["features", "plans", "prices", "plan_features"]
+
+    @classmethod
+    def setUpTestData(cls):
+        AppSettings.set("teacher_capacity_per_day", "1000")
+        cls.user = User.objects.create_user("+8801711111111", "password")
+        price = Price.objects.select_related("plan").first()
+        Subscription.objects.create(
+            teacher=cls.user.teacher,
+            plan=price.plan,
+            price=price,
+            status=Subscription.Status.ACTIVE,
+        )
+        cls.features = list(Feature.objects.all())
+
+    def setUp(self):
+        # Versions and snapshots of earlier tests are keyed by reused ids
+        cache.clear()
+        # Loaded as the authentication backends do
+        user = User.objects.with_teacher().get(pk=self.user.pk)
+        self.client.force_authenticate(user)
+
+    def _add_usage(self, features):
+        FeatureUsage.objects.bulk_create(
+            [
+                FeatureUsage(
+                    teacher=self.user.teacher,
+                    feature=feature,
+                    used=1,
+                    last_reset_at=timezone.now(),
+                )
+                for feature in features
+            ]
+        )
+
+    def test_list_takes_one_query_for_any_number_of_features(self):
+        self._add_usage(self.features[:1])
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("feature-usage-list"))
+        self.assertEqual(len(response.data), 1)
+
+        self._add_usage(self.features[1:])
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("feature-usage-list"))
+        self.assertEqual(len(response.data), len(self.features))
+
+    def test_warm_feature_check_takes_at_most_one_query(self):
+        plan_feature = (
+            PlanFeature.objects.filter(
+                plan__subscription__teacher=self.user.teacher
+            )
+            .select_related("feature")
+            .first()
+        )
+        plan_feature.monthly_limit = 10
+        plan_feature.save()
+        self._add_usage([plan_feature.feature])
+        teacher = User.objects.with_teacher().get(pk=self.user.pk).teacher
+        can_use_feature(teacher, plan_feature.feature.code)
+
+        # Only the usage is read live
+        with self.assertNumQueries(1):
+            result = can_use_feature(teacher, plan_feature.feature.code)
+        self.assertEqual(result["used"], 1)
+        self.assertEqual(result["remaining"], 9)
+
+    def test_detail_takes_one_query(self):
+        self._add_usage(self.features)
+        url = reverse(
+            "feature-usage-detail",
+            kwargs={"feature_code": self.features[0].code},
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["used"], 1)
+
+    def test_versions_are_bumped_again_on_commit(self):
+        key = subscription_version_key(self.user.teacher.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.teacher.subscription.save()
+            # Read by a request before the change is visible
+            version = get_cache_version(key)
+        self.assertGreater(get_cache_version(key), version)
+
+
+class SubscriptionIdempotencyTests(APITestCase):
+    fixtures = ["features", "plans", "prices", "plan_features"]
+
+    @classmethod
+    def setUpTestData(cls):
+        AppSettings.set("teacher_capacity_per_day", "1000")
+        cls.user = User.objects.create_user("+8801711111111", "password")
+        cls.prices = list(Price.objects.all()[:2])
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.with_teacher().get(pk=self.user.pk)
+        self.client.force_authenticate(user)
+
+    def _create(self, price, key):
+        return self.client.post(
+            reverse("subscription-create"),
+            {"price": price.pk},
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retry_is_replayed_without_running_the_view(self):
+        first = self._create(self.prices[0], "key")
+        self.assertEqual(first.status_code, 201)
+
+        retry = self._create(self.prices[0], "key")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Subscription.objects.count(), 1)
+
+    def test_key_reused_with_another_request_is_rejected(self):
+        self._create(self.prices[0], "key")
+        response = self._create(self.prices[1], "key")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Subscription.objects.count(), 1)
+
+
+class UsageBufferTests(APITestCase):
+    fixtures = ["features"]
+
+    @classmethod
+    def setUpTestData(cls):
+        AppSettings.set("teacher_capacity_per_day", "1000")
+        cls.teacher = User.objects.create_user(
+            "+8801711111111", "password"
+        ).teacher
+        cls.feature = Feature.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        _flushed_usage.clear()
+        self.store = CacheCounterStore()
+        self.bucket_seconds = get_buffer_setting("BUCKET_SECONDS")
+        self.now = time.time()
+
+    def _buffer(self, amount=1, limit=None, now=None):
+        return buffer_usage(
+            self.teacher.pk,
+            self.feature.pk,
+            amount,
+            limit,
+            store=self.store,
+            now=self.now if now is None else now,
+        )
+
+    def _used(self):
+        return FeatureUsage.objects.get(
+            teacher=self.teacher, feature=self.feature
+        ).used
+
+    def test_flush_merges_closed_buckets(self):
+        self._buffer(2)
+        self._buffer(3, now=self.now + self.bucket_seconds)
+        later = self.now + 3 * self.bucket_seconds
+
+        buckets, rows = flush_usage(self.store, now=later)
+        self.assertEqual(rows, 2)
+        self.assertEqual(self._used(), 5)
+        self.assertEqual(
+            get_pending_usage(
+                self.teacher.pk, self.feature.pk, self.store, now=later
+            ),
+            0,
+        )
+
+    def test_flush_writes_usage_events_by_bucket(self):
+        buffer_usage_event(
+            self.teacher.pk, self.feature.pk, 2, self.store, now=self.now
+        )
+        buffer_usage_event(
+            self.teacher.pk, self.feature.pk, 3, self.store, now=self.now
+        )
+        flush_usage(self.store, now=self.now + 2 * self.bucket_seconds)
+
+        event = FeatureUsageEvent.objects.get()
+        self.assertEqual((event.amount, event.events), (5, 2))
+        self.assertFalse(FeatureUsage.objects.exists())
+
+    def test_bucket_flushed_before_a_crash_is_not_counted_again(self):
+        self._buffer(2)
+        bucket = int(self.now // self.bucket_seconds)
+        # Crashed after committing, before clearing the store
+        _apply_counts(bucket, self.store.get_counts(bucket))
+
+        later = self.now + 2 * self.bucket_seconds
+        self.assertEqual(flush_usage(self.store, now=later)[1], 0)
+        self.assertEqual(self._used(), 2)
+        self.assertEqual(self.store.get_counts(bucket), {})
+
+    def test_limit_holds_across_a_flush(self):
+        self.assertEqual(self._buffer(limit=3), (True, 1))
+        self.assertEqual(self._buffer(limit=3), (True, 2))
+        later = self.now + 2 * self.bucket_seconds
+        flush_usage(self.store, now=later)
+
+        self.assertEqual(self._buffer(limit=3, now=later), (True, 3))
+        self.assertEqual(self._buffer(limit=3, now=later), (False, 3))
+
+
+class ConsumeFeatureConcurrencyTests(TransactionTestCase):
+    fixtures = ["features", "plans", "prices", "plan_features"]
+    threads = 5
+    consumes = 20
+    limit = 30
+
+    def setUp(self):
+        cache.clear()
+        AppSettings.set("teacher_capacity_per_day", "1000")
+        self.user = User.objects.create_user("+8801711111111", "password")
+        price = Price.objects.select_related("plan").first()
+        Subscription.objects.create(
+            teacher=self.user.teacher,
+            plan=price.plan,
+            price=price,
+            status=Subscription.Status.ACTIVE,
+        )
+        self.plan_feature = (
+            PlanFeature.objects.filter(plan=price.plan)
+            .select_related("feature")
+            .first()
+        )
+        self.plan_feature.monthly_limit = self.limit
+        self.plan_feature.save()
+
+    def _consume(self, results):
+        teacher = User.objects.with_teacher().get(pk=self.user.pk).teacher
+        self.barrier.wait()
+        try:
+            for _ in range(self.consumes):
+                try:
+                    consume_feature(teacher, self.plan_feature.feature.code)
+                except FeatureLimitReached:
+                    results.append(False)
+                else:
+                    results.append(True)
+        finally:
+            connection.close()
+
+    def test_concurrent_consumes_never_exceed_the_limit(self):
+        self.barrier = threading.Barrier(self.threads)
+        results = []
+        threads = [
+            threading.Thread(target=self._consume, args=(results,))
+            for _ in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        usage = FeatureUsage.objects.get(
+            teacher=self.user.teacher, feature=self.plan_feature.feature
+        )
+        self.assertEqual(len(results), self.threads * self.consumes)
+        self.assertLessEqual(usage.used, self.limit)
+        self.assertEqual(usage.used, results.count(True))
+        # Every counted consume has its event, and no refused one has
+        flush_usage(now=time.time() + 2 * get_buffer_setting("BUCKET_SECONDS"))
+        events = FeatureUsageEvent.objects.aggregate(
+            events=Sum("events"), used=Sum("amount")
+        )
+        self.assertEqual(events, {"events": usage.used, "used": usage.used})
@@ -9,7 +9,10 @@ from .views import (
     SubscriptionRenewView,
     FeatureUsageListView,
     FeatureUsageDetailView,
+    FeatureUsageHistoryView,
     FeatureCheckView,
+    FeatureBatchCheckView,
+    FeatureConsumeView,
 )
 
 
@@ -45,10 +48,25 @@ urlpatterns = [
     ),
     # Feature Usage
     path("usage/", FeatureUsageListView.as_view(), name="feature-usage-list"),
+    path("usage/check/", FeatureCheckView.as_view(), name="feature-check"),
+    path(
+        "usage/check/batch/",
+        FeatureBatchCheckView.as_view(),
+        name="feature-batch-check",
+    ),
+    path(
+        "usage/consume/",
+        FeatureConsumeView.as_view(),
+        name="feature-consume",
+    ),
     path(
         "usage/<str:feature_code>/",
         FeatureUsageDetailView.as_view(),
         name="feature-usage-detail",
     ),
-    path("usage/check/", FeatureCheckView.as_view(), name="feature-check"),
+    path(
+        "usage/<str:feature_code>/history/",
+        FeatureUsageHistoryView.as_view(),
+        name="feature-usage-history",
+    ),
 ]
@@ -1,23 +1,108 @@
-from .models import Feature, PlanFeature, FeatureUsage
+import calendar
+import time
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from command_scheduler.leases import check_lease
+from command_scheduler.shards import filter_shard
+from .models import Feature, PlanFeature, FeatureUsage, Subscription, Price
+from .cache import (
+    ENTITLEMENTS_TIMEOUT,
+    get_entitlements_key,
+    bump_subscription_versions,
+    bump_teacher_version,
+    bump_teacher_versions,
+)
+from .buffer import is_buffered, buffer_usage, get_pending_usage
+from .events import record_usage_event
+from .exceptions import (
+    FeatureUnavailable,
+    FeatureNotFound,
+    FeatureLimitReached,
+)
+
+
+def get_subscription(teacher):
+    """Get the teacher's subscription or None,
+    without a query if it was preloaded."""
+    try:
+        return teacher.subscription
+    except Subscription.DoesNotExist:
+        return None
+
+
+def build_entitlements(teacher):
+    """Compile the feature limits of the teacher's subscription plan."""
+    if type(teacher).subscription.is_cached(teacher):
+        subscription = get_subscription(teacher)
+        plan_id = subscription.plan_id if subscription else None
+    else:
+        plan_id = (
+            Subscription.objects.filter(teacher_id=teacher.pk)
+            .values_list("plan_id", flat=True)
+            .first()
+        )
+    limits = {}
+    if plan_id is not None:
+        limits = dict(
+            PlanFeature.objects.filter(plan_id=plan_id).values_list(
+                "feature_id", "monthly_limit"
+            )
+        )
+
+    features = {}
+    for feature_id, code in Feature.objects.values_list("id", "code"):
+        features[code] = {
+            "id": feature_id,
+            "included": feature_id in limits,
+            "limit": limits.get(feature_id),
+        }
+    return {"subscribed": plan_id is not None, "features": features}
+
+
+def get_entitlements(teacher):
+    """
+    Get the cached entitlement snapshot of a teacher.
+
+    The snapshot is keyed by the catalog and subscription versions, so it
+    is rebuilt only after the plan or the subscription changed.
+
+    Returns:
+        dict: {
+            "subscribed": bool,
+            "features": {
+                code: {"id": int, "included": bool, "limit": int or None},
+            },
+        }
+    """
+    key = get_entitlements_key(teacher.pk)
+    entitlements = cache.get(key)
+    if entitlements is None:
+        entitlements = build_entitlements(teacher)
+        cache.set(key, entitlements, ENTITLEMENTS_TIMEOUT)
+    return entitlements
 
 
 def get_feature_monthly_limit(teacher, feature):
     """Get the monthly limit for a feature
     based on teacher's subscription plan."""
-    if hasattr(teacher, "subscription"):
-        plan_feature = PlanFeature.objects.filter(
-            plan=teacher.subscription.plan, feature=feature
-        ).first()
-        return plan_feature.monthly_limit if plan_feature else None
-    return None
+    entitlement = get_entitlements(teacher)["features"].get(feature.code)
+    return entitlement["limit"] if entitlement else None
 
 
 def get_feature_usage(teacher, feature):
     """Get current usage count for a feature."""
-    usage = FeatureUsage.objects.filter(
-        teacher=teacher, feature=feature
-    ).first()
-    return usage.used if usage else 0
+    used = (
+        FeatureUsage.objects.filter(teacher=teacher, feature=feature)
+        .values_list("used", flat=True)
+        .first()
+    )
+    return used or 0
 
 
 def get_feature_remaining(teacher, feature):
@@ -43,9 +128,20 @@ def can_use_feature(teacher, feature_code):
             "remaining": int or None (optional),
         }
     """
-    try:
-        feature = Feature.objects.get(code=feature_code)
-    except Feature.DoesNotExist:
+    return check_features(teacher, [feature_code])[feature_code]
+
+
+def _is_limited(entitlements, entitlement):
+    return (
+        entitlements["subscribed"]
+        and entitlement["included"]
+        and entitlement["limit"] is not None
+    )
+
+
+def _check_feature(entitlements, feature_code, usage):
+    entitlement = entitlements["features"].get(feature_code)
+    if entitlement is None:
         return {
             "can_use": False,
             "reason": "Feature not found",
@@ -53,7 +149,7 @@ def can_use_feature(teacher, feature_code):
         }
 
     # Check if teacher has subscription
-    if not hasattr(teacher, "subscription"):
+    if not entitlements["subscribed"]:
         return {
             "can_use": False,
             "reason": "No active subscription",
@@ -61,11 +157,7 @@ def can_use_feature(teacher, feature_code):
         }
 
     # Check if feature is in plan
-    plan_feature = PlanFeature.objects.filter(
-        plan=teacher.subscription.plan, feature=feature
-    ).first()
-
-    if not plan_feature:
+    if not entitlement["included"]:
         return {
             "can_use": False,
             "reason": "Feature not included in your plan",
@@ -73,7 +165,8 @@ def can_use_feature(teacher, feature_code):
         }
 
     # Check usage limit
-    if plan_feature.monthly_limit is None:
+    monthly_limit = entitlement["limit"]
+    if monthly_limit is None:
         return {
             "can_use": True,
             "reason": "Unlimited usage",
@@ -83,15 +176,15 @@ def can_use_feature(teacher, feature_code):
         }
 
     # Get current usage
-    used = get_feature_usage(teacher, feature)
+    used = usage.get(entitlement["id"], 0)
 
-    if used >= plan_feature.monthly_limit:
+    if used >= monthly_limit:
         return {
             "can_use": False,
             "reason": "Monthly limit reached",
             "feature": feature_code,
             "used": used,
-            "limit": plan_feature.monthly_limit,
+            "limit": monthly_limit,
             "remaining": 0,
         }
 
@@ -100,11 +193,141 @@ def can_use_feature(teacher, feature_code):
         "reason": "Within usage limit",
         "feature": feature_code,
         "used": used,
-        "limit": plan_feature.monthly_limit,
-        "remaining": plan_feature.monthly_limit - used,
+        "limit": monthly_limit,
+        "remaining": monthly_limit - used,
+    }
+
+
+def check_features(teacher, feature_codes=None):
+    """
+    Check many features at once, in at most one query.
+
+    Args:
+        feature_codes: Codes of the features to check, or None for all.
+
+    Returns:
+        dict: {feature_code: result of can_use_feature}
+    """
+    entitlements = get_entitlements(teacher)
+    if feature_codes is None:
+        feature_codes = list(entitlements["features"])
+
+    limited = {}
+    for code in feature_codes:
+        entitlement = entitlements["features"].get(code)
+        if entitlement and _is_limited(entitlements, entitlement):
+            limited[code] = entitlement["id"]
+
+    usage = {}
+    if limited:
+        usage = dict(
+            FeatureUsage.objects.filter(
+                teacher=teacher, feature_id__in=limited.values()
+            ).values_list("feature_id", "used")
+        )
+        for code, feature_id in limited.items():
+            if is_buffered(code):
+                usage[feature_id] = usage.get(feature_id, 0) + (
+                    get_pending_usage(teacher.pk, feature_id)
+                )
+
+    return {
+        code: _check_feature(entitlements, code, usage)
+        for code in feature_codes
     }
 
 
+def _increment_usage(teacher_id, feature_id, amount, limit):
+    """Increment a usage counter in a single conditional UPDATE.
+
+    Returns the new usage, or None when no row was updated because the
+    row doesn't exist or the increment would exceed the limit.
+    """
+    quote_name = connection.ops.quote_name
+    sql = (
+        f"UPDATE {quote_name(FeatureUsage._meta.db_table)}"
+        f" SET {quote_name('used')} = {quote_name('used')} + %s"
+        f" WHERE {quote_name('teacher_id')} = %s"
+        f" AND {quote_name('feature_id')} = %s"
+    )
+    params = [amount, teacher_id, feature_id]
+    if limit is not None:
+        sql += f" AND {quote_name('used')} + %s <= %s"
+        params += [amount, limit]
+    sql += f" RETURNING {quote_name('used')}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def consume_feature(teacher, feature_code, amount=1):
+    """
+    Check the monthly limit of a feature and record its usage atomically.
+
+    The limit check and the increment happen in the same UPDATE statement,
+    so concurrent consumers can never push the usage over the limit.
+    Features listed in BILLING_USAGE_BUFFER are counted write-behind
+    instead (see ``buffer.buffer_usage``). Every consumption is also
+    recorded in the usage history (see ``events``) once its usage is
+    committed.
+
+    Returns:
+        int or None: Remaining usage after consuming,
+            or None if the feature is unlimited.
+
+    Raises:
+        FeatureNotFound: If no feature has the given code.
+        FeatureUnavailable: If the feature isn't in the teacher's plan.
+        FeatureLimitReached: If the amount exceeds the remaining usage.
+    """
+    entitlements = get_entitlements(teacher)
+    entitlement = entitlements["features"].get(feature_code)
+    if entitlement is None:
+        raise FeatureNotFound(feature_code)
+    if not entitlements["subscribed"]:
+        raise FeatureUnavailable(feature_code, "No active subscription")
+    if not entitlement["included"]:
+        raise FeatureUnavailable(
+            feature_code, "Feature not included in your plan"
+        )
+
+    feature_id = entitlement["id"]
+    limit = entitlement["limit"]
+    if is_buffered(feature_code):
+        counted, used = buffer_usage(teacher.pk, feature_id, amount, limit)
+        if not counted:
+            raise FeatureLimitReached(feature_code, used, limit)
+        record_usage_event(teacher.pk, feature_id, amount)
+        return None if limit is None else limit - used
+
+    used = _increment_usage(teacher.pk, feature_id, amount, limit)
+    if used is None:
+        # The usage row is created on first use
+        FeatureUsage.objects.bulk_create(
+            [
+                FeatureUsage(
+                    teacher_id=teacher.pk,
+                    feature_id=feature_id,
+                    last_reset_at=timezone.now(),
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        used = _increment_usage(teacher.pk, feature_id, amount, limit)
+    if used is None:
+        raise FeatureLimitReached(
+            feature_code, get_feature_usage(teacher, feature_id), limit
+        )
+    bump_teacher_version(teacher.user_id)
+    # Counted only once the usage it records is committed
+    transaction.on_commit(
+        partial(record_usage_event, teacher.pk, feature_id, amount)
+    )
+    return None if limit is None else limit - used
+
+
 def get_feature_usage_details(teacher, feature):
     """
     Get detailed usage information for a feature.
@@ -141,3 +364,257 @@ def get_feature_usage_details(teacher, feature):
         "remaining": monthly_limit,
         "last_reset_at": None,
     }
+
+
+def _add_months(value, months):
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def get_cycle_start(anchor, now=None):
+    """Get the start of the current monthly usage cycle.
+
+    Cycles start at midnight (in TIME_ZONE) on the anchor's day of the
+    month, or on the last day of shorter months."""
+    now = timezone.localtime(now)
+    anchor = timezone.localtime(anchor).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    months = (now.year - anchor.year) * 12 + now.month - anchor.month
+    cycle_start = _add_months(anchor, months)
+    if cycle_start > now:
+        cycle_start = _add_months(anchor, months - 1)
+    return cycle_start
+
+
+def reset_feature_usage(now=None, start_after=0, batch_size=1000, shard=None):
+    """
+    Reset the usage counters whose monthly cycle has restarted.
+
+    Each subscription's cycle is anchored at its creation date. The
+    subscriptions are walked in id order, and the usage rows of each batch
+    that were last reset before their cycle start are reset with one
+    UPDATE per distinct cycle start. Rows reset in the current cycle are
+    skipped, so it's safe to run again or to resume after ``start_after``.
+    Only the teachers of the given ``shard`` are reset, if any.
+
+    Yields:
+        tuple: (last subscription id of the batch, number of reset rows)
+    """
+    now = now or timezone.now()
+    last_id = start_after
+    while True:
+        subscriptions = list(
+            filter_shard(
+                Subscription.objects.filter(id__gt=last_id),
+                shard,
+                "teacher_id",
+            )
+            .order_by("id")
+            .values_list("id", "teacher_id", "created")[:batch_size]
+        )
+        if not subscriptions:
+            return
+
+        teachers_by_cycle = defaultdict(list)
+        for _, teacher_id, created in subscriptions:
+            cycle_start = get_cycle_start(created, now)
+            teachers_by_cycle[cycle_start].append(teacher_id)
+
+        rows = 0
+        reset_teacher_ids = []
+        with transaction.atomic():
+            # Commits only while the command holds its scheduler lease
+            check_lease()
+            for cycle_start, teacher_ids in teachers_by_cycle.items():
+                reset = FeatureUsage.objects.filter(
+                    teacher_id__in=teacher_ids,
+                    last_reset_at__lt=cycle_start,
+                ).update(used=0, last_reset_at=now)
+                if reset:
+                    rows += reset
+                    reset_teacher_ids += teacher_ids
+        if reset_teacher_ids:
+            bump_teacher_versions(reset_teacher_ids)
+
+        last_id = subscriptions[-1][0]
+        yield last_id, rows
+
+
+def _sweep(queryset, date_field, now, batch_size, process):
+    # Keyset pagination over the (status, <date_field>) index
+    last = None
+    while True:
+        batch = queryset.filter(**{f"{date_field}__lte": now})
+        if last is not None:
+            batch = batch.filter(
+                Q(**{f"{date_field}__gt": last[0]})
+                | Q(**{date_field: last[0], "id__gt": last[1]})
+            )
+        subscriptions = list(
+            batch.order_by(date_field, "id").values(
+                "id", "teacher_id", "price_id", "auto_renew", date_field
+            )[:batch_size]
+        )
+        if not subscriptions:
+            return
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            # Commits only while the command holds its scheduler lease
+            check_lease()
+            # Stamped per batch, as a sweep may run for a long time
+            metrics = process(subscriptions, timezone.now())
+        teacher_ids = [
+            subscription["teacher_id"] for subscription in subscriptions
+        ]
+        bump_subscription_versions(teacher_ids)
+        bump_teacher_versions(teacher_ids)
+        metrics["scanned"] = len(subscriptions)
+        metrics["elapsed"] = time.perf_counter() - started
+        yield metrics
+
+        last = (subscriptions[-1][date_field], subscriptions[-1]["id"])
+
+
+def sweep_subscriptions(now=None, batch_size=1000, shard=None):
+    """
+    Move subscriptions whose trial or period ended to their next status.
+
+    Ended trials become active if they auto-renew and expire otherwise.
+    Ended active periods are renewed by the price's duration if they
+    auto-renew and expire otherwise. Every batch is handled with a few
+    bulk UPDATEs, guarded by the status they were selected with. Only the
+    teachers of the given ``shard`` are swept, if any.
+
+    Yields:
+        dict: Metrics of each processed batch.
+    """
+    now = now or timezone.now()
+    Status = Subscription.Status
+    durations = dict(Price.objects.values_list("id", "duration_months"))
+
+    def end_trials(subscriptions, modified):
+        activate, expire = [], []
+        for subscription in subscriptions:
+            if subscription["auto_renew"]:
+                activate.append(subscription["id"])
+            else:
+                expire.append(subscription["id"])
+        trials = Subscription.objects.filter(status=Status.TRIAL)
+        return {
+            "phase": "trials",
+            "activated": trials.filter(id__in=activate).update(
+                status=Status.ACTIVE, modified=modified
+            ),
+            "expired": trials.filter(id__in=expire).update(
+                status=Status.EXPIRED, modified=modified
+            ),
+        }
+
+    def end_periods(subscriptions, modified):
+        renew_by_price, expire = defaultdict(list), []
+        for subscription in subscriptions:
+            if subscription["auto_renew"]:
+                renew_by_price[subscription["price_id"]].append(
+                    subscription["id"]
+                )
+            else:
+                expire.append(subscription["id"])
+        active = Subscription.objects.filter(status=Status.ACTIVE)
+        renewed = 0
+        for price_id, ids in renew_by_price.items():
+            renewed += active.filter(id__in=ids).update(
+                ends_at=F("ends_at")
+                + timedelta(days=durations[price_id] * 30),
+                modified=modified,
+            )
+        return {
+            "phase": "periods",
+            "renewed": renewed,
+            "expired": active.filter(id__in=expire).update(
+                status=Status.EXPIRED, modified=modified
+            ),
+        }
+
+    subscriptions = filter_shard(
+        Subscription.objects.all(), shard, "teacher_id"
+    )
+    yield from _sweep(
+        subscriptions.filter(status=Status.TRIAL),
+        "trial_ends_at",
+        now,
+        batch_size,
+        end_trials,
+    )
+    yield from _sweep(
+        subscriptions.filter(status=Status.ACTIVE),
+        "ends_at",
+        now,
+        batch_size,
+        end_periods,
+    )
+
+
+def _bump_versions(teacher_ids):
+    bump_subscription_versions(teacher_ids)
+    bump_teacher_versions(teacher_ids)
+
+
+def extend_subscriptions(subscriptions, days, now=None):
+    """
+    Extend the subscriptions by the given days with a single UPDATE.
+
+    Ended subscriptions are extended from now and become active again.
+
+    Returns:
+        int: Number of extended subscriptions
+    """
+    now = now or timezone.now()
+    Status = Subscription.Status
+    teacher_ids = list(subscriptions.values_list("teacher_id", flat=True))
+    extended = subscriptions.update(
+        ends_at=Greatest(Coalesce("ends_at", Value(now)), Value(now))
+        + timedelta(days=days),
+        status=Case(
+            When(status=Status.EXPIRED, then=Value(Status.ACTIVE)),
+            default=F("status"),
+        ),
+        modified=now,
+    )
+    _bump_versions(teacher_ids)
+    return extended
+
+
+def expire_subscriptions(subscriptions, now=None):
+    """
+    Expire the subscriptions with a single UPDATE.
+
+    Returns:
+        int: Number of expired subscriptions
+    """
+    now = now or timezone.now()
+    subscriptions = subscriptions.exclude(status=Subscription.Status.EXPIRED)
+    teacher_ids = list(subscriptions.values_list("teacher_id", flat=True))
+    expired = subscriptions.update(
+        status=Subscription.Status.EXPIRED, modified=now
+    )
+    _bump_versions(teacher_ids)
+    return expired
+
+
+def reset_usage(usages, now=None):
+    """
+    Reset the usage counters with a single UPDATE.
+
+    Returns:
+        int: Number of reset counters
+    """
+    now = now or timezone.now()
+    teacher_ids = list(usages.values_list("teacher_id", flat=True).distinct())
+    reset = usages.update(used=0, last_reset_at=now)
+    bump_teacher_versions(teacher_ids)
+    return reset
@@ -16,9 +16,33 @@ from .serializers import (
     SubscriptionUpdateSerializer,
     FeatureUsageSerializer,
     FeatureCheckSerializer,
+    FeatureBatchCheckSerializer,
+    FeatureConsumeSerializer,
+    FeatureUsageHistoryQuerySerializer,
+    FeatureUsageDaySerializer,
     FeatureSerializer,
 )
-from .utils import can_use_feature, get_feature_usage_details
+from tutor_khata.core.decorators import idempotent
+from tutor_khata.teachers.utils import get_request_teacher
+from .utils import (
+    get_subscription,
+    can_use_feature,
+    check_features,
+    consume_feature,
+    get_feature_monthly_limit,
+)
+from .exceptions import (
+    FeatureUnavailable,
+    FeatureNotFound,
+    FeatureLimitReached,
+)
+from .events import get_usage_history
+from .decorators import teacher_etag
+from .catalog import (
+    catalog_response,
+    get_plans_entry,
+    get_plan_detail_entry,
+)
 
 
 class PlansView(ListAPIView):
@@ -27,6 +51,9 @@ class PlansView(ListAPIView):
     ).all()
     serializer_class = PlanListSerializer
 
+    def list(self, request, *args, **kwargs):
+        return catalog_response(request, get_plans_entry())
+
 
 class PlanDetailView(RetrieveAPIView):
     queryset = Plan.objects.prefetch_related(
@@ -34,6 +61,9 @@ class PlanDetailView(RetrieveAPIView):
     ).all()
     serializer_class = PlanDetailSerializer
 
+    def retrieve(self, request, pk, *args, **kwargs):
+        return catalog_response(request, get_plan_detail_entry(pk))
+
 
 class MySubscriptionView(APIView):
     permission_classes = [IsAuthenticated]
@@ -44,19 +74,18 @@ class MySubscriptionView(APIView):
             status.HTTP_404_NOT_FOUND: None,
         }
     )
+    @teacher_etag
     def get(self, request):
-        try:
-            subscription = Subscription.objects.get(
-                teacher=request.user.teacher
-            )
-            serializer = SubscriptionSerializer(subscription)
-            return Response(serializer.data)
-        except Subscription.DoesNotExist:
+        subscription = get_subscription(get_request_teacher(request))
+        if subscription is None:
             return Response(
                 {"detail": "No active subscription found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+        serializer = SubscriptionSerializer(subscription)
+        return Response(serializer.data)
+
 
 class SubscriptionCreateView(APIView):
     permission_classes = [IsAuthenticated]
@@ -68,9 +97,11 @@ class SubscriptionCreateView(APIView):
             status.HTTP_400_BAD_REQUEST: None,
         },
     )
+    @idempotent
     def post(self, request):
         # Check if teacher already has a subscription
-        if hasattr(request.user.teacher, "subscription"):
+        teacher = get_request_teacher(request)
+        if get_subscription(teacher) is not None:
             return Response(
                 {"detail": "You already have an active subscription"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -94,7 +125,7 @@ class SubscriptionCreateView(APIView):
 
             # Create subscription
             subscription = Subscription.objects.create(
-                teacher=request.user.teacher,
+                teacher=teacher,
                 plan=plan,
                 price=price,
                 trial_ends_at=trial_ends_at,
@@ -121,11 +152,8 @@ class SubscriptionUpdateView(APIView):
         },
     )
     def patch(self, request):
-        try:
-            subscription = Subscription.objects.get(
-                teacher=request.user.teacher
-            )
-        except Subscription.DoesNotExist:
+        subscription = get_subscription(get_request_teacher(request))
+        if subscription is None:
             return Response(
                 {"detail": "No active subscription found"},
                 status=status.HTTP_404_NOT_FOUND,
@@ -151,12 +179,10 @@ class SubscriptionCancelView(APIView):
             status.HTTP_404_NOT_FOUND: None,
         }
     )
+    @idempotent
     def post(self, request):
-        try:
-            subscription = Subscription.objects.get(
-                teacher=request.user.teacher
-            )
-        except Subscription.DoesNotExist:
+        subscription = get_subscription(get_request_teacher(request))
+        if subscription is None:
             return Response(
                 {"detail": "No active subscription found"},
                 status=status.HTTP_404_NOT_FOUND,
@@ -182,12 +208,10 @@ class SubscriptionRenewView(APIView):
             status.HTTP_404_NOT_FOUND: None,
         }
     )
+    @idempotent
     def post(self, request):
-        try:
-            subscription = Subscription.objects.get(
-                teacher=request.user.teacher
-            )
-        except Subscription.DoesNotExist:
+        subscription = get_subscription(get_request_teacher(request))
+        if subscription is None:
             return Response(
                 {"detail": "No active subscription found"},
                 status=status.HTTP_404_NOT_FOUND,
@@ -213,10 +237,13 @@ class SubscriptionRenewView(APIView):
 class FeatureUsageListView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @teacher_etag
     def get(self, request):
-        usage = FeatureUsage.objects.filter(
-            teacher=request.user.teacher
-        ).select_related("feature")
+        usage = (
+            FeatureUsage.objects.with_limits()
+            .filter(teacher=get_request_teacher(request))
+            .select_related("feature")
+        )
         serializer = FeatureUsageSerializer(usage, many=True)
         return Response(serializer.data)
 
@@ -224,7 +251,21 @@ class FeatureUsageListView(APIView):
 class FeatureUsageDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @teacher_etag
     def get(self, request, feature_code):
+        usage = (
+            FeatureUsage.objects.with_limits()
+            .filter(
+                teacher=get_request_teacher(request),
+                feature__code=feature_code,
+            )
+            .select_related("feature")
+            .first()
+        )
+        if usage:
+            serializer = FeatureUsageSerializer(usage)
+            return Response(serializer.data)
+
         try:
             feature = Feature.objects.get(code=feature_code)
         except Feature.DoesNotExist:
@@ -233,26 +274,56 @@ class FeatureUsageDetailView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        try:
-            usage = FeatureUsage.objects.select_related("feature").get(
-                teacher=request.user.teacher, feature=feature
-            )
-            serializer = FeatureUsageSerializer(usage)
-            return Response(serializer.data)
-        except FeatureUsage.DoesNotExist:
-            usage_details = get_feature_usage_details(
-                request.user.teacher, feature
+        # No usage recorded yet
+        monthly_limit = get_feature_monthly_limit(
+            get_request_teacher(request), feature
+        )
+        return Response(
+            {
+                "feature": FeatureSerializer(feature).data,
+                "used": 0,
+                "monthly_limit": monthly_limit,
+                "remaining": monthly_limit,
+                "last_reset_at": None,
+            }
+        )
+
+
+class FeatureUsageHistoryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[FeatureUsageHistoryQuerySerializer],
+        responses={
+            status.HTTP_200_OK: FeatureUsageDaySerializer(many=True),
+            status.HTTP_400_BAD_REQUEST: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+    )
+    def get(self, request, feature_code):
+        serializer = FeatureUsageHistoryQuerySerializer(
+            data=request.query_params
+        )
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
             )
+
+        try:
+            feature = Feature.objects.get(code=feature_code)
+        except Feature.DoesNotExist:
             return Response(
-                {
-                    "feature": FeatureSerializer(feature).data,
-                    "used": usage_details["used"],
-                    "monthly_limit": usage_details["monthly_limit"],
-                    "remaining": usage_details["remaining"],
-                    "last_reset_at": usage_details["last_reset_at"],
-                }
+                {"detail": "Feature not found"},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
+        history = get_usage_history(
+            get_request_teacher(request),
+            feature,
+            serializer.validated_data["days"],
+        )
+        return Response(FeatureUsageDaySerializer(history, many=True).data)
+
 
 class FeatureCheckView(APIView):
     permission_classes = [IsAuthenticated]
@@ -265,6 +336,85 @@ class FeatureCheckView(APIView):
             )
 
         feature_code = serializer.validated_data["feature_code"]
-        result = can_use_feature(request.user.teacher, feature_code)
+        result = can_use_feature(get_request_teacher(request), feature_code)
 
         return Response(result)
+
+
+class FeatureBatchCheckView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=FeatureBatchCheckSerializer,
+        responses={
+            status.HTTP_200_OK: None,
+            status.HTTP_400_BAD_REQUEST: None,
+        },
+    )
+    def post(self, request):
+        serializer = FeatureBatchCheckSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = check_features(
+            get_request_teacher(request), serializer.validated_data["features"]
+        )
+        return Response({"features": results})
+
+
+class FeatureConsumeView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=FeatureConsumeSerializer,
+        responses={
+            status.HTTP_200_OK: None,
+            status.HTTP_400_BAD_REQUEST: None,
+            status.HTTP_403_FORBIDDEN: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+    )
+    def post(self, request):
+        serializer = FeatureConsumeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        feature_code = serializer.validated_data["feature_code"]
+        amount = serializer.validated_data["amount"]
+        try:
+            remaining = consume_feature(
+                get_request_teacher(request), feature_code, amount
+            )
+        except FeatureLimitReached as e:
+            return Response(
+                {
+                    "detail": e.reason,
+                    "feature": feature_code,
+                    "used": e.used,
+                    "limit": e.limit,
+                    "remaining": e.remaining,
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        except FeatureNotFound as e:
+            return Response(
+                {"detail": e.reason, "feature": feature_code},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        except FeatureUnavailable as e:
+            return Response(
+                {"detail": e.reason, "feature": feature_code},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        return Response(
+            {
+                "feature": feature_code,
+                "consumed": amount,
+                "remaining": remaining,
+            }
+        )
@@ -1,4 +1,9 @@
 from django.contrib import admin
 from .models import AppSettings
 
-admin.site.register(AppSettings)
+
+@admin.register(AppSettings)
+class AppSettingsAdmin(admin.ModelAdmin):
+    list_display = ("key", "value", "modified")
+    search_fields = ("key",)
+    ordering = ("key",)
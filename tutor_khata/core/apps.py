@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'tutor_khata.core'
+
+    def ready(self):
+        from . import checks  # noqa: F401
@@ -0,0 +1,18 @@
+from django.core.checks import Error, Tags, register
+from .utils import is_cache_shared
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    # Version counters, sessions, buffered usage and rate limits are kept
+    # in the default cache, and are only correct if it's shared
+    if is_cache_shared():
+        return []
+    return [
+        Error(
+            "The default cache must be shared by every process and "
+            "count atomically.",
+            hint="Set CACHE_URL to a Redis URL, e.g. redis://127.0.0.1:6379/1",
+            id="core.E001",
+        )
+    ]
@@ -0,0 +1,99 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# How long a response is replayed for
+IDEMPOTENCY_TTL = 60 * 60
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(
+        f"{request.method}:{request.path}:{body}".encode()
+    ).hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored.fingerprint != fingerprint:
+        return Response(
+            {
+                "detail": f"{IDEMPOTENCY_HEADER} was already used "
+                "with a different request"
+            },
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        stored.response,
+        status=stored.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _in_progress():
+    return Response(
+        {
+            "detail": f"A request with this {IDEMPOTENCY_HEADER} "
+            "is still in progress"
+        },
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def idempotent(view_method):
+    """
+    Make a view method safe to retry with an Idempotency-Key header.
+
+    The key is claimed by inserting an IdempotencyKey row, unique per user
+    and key, in the same transaction as the view, which stores its response
+    in the row before committing. Retries of the same request are replayed
+    that response for IDEMPOTENCY_TTL without running the view again. A
+    duplicate that can't see the response yet gets 409 and may retry. Server
+    errors roll the key back with the view, so they can be retried. Requests
+    without the header run as usual.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} is too long"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = _fingerprint(request)
+        keys = IdempotencyKey.objects.filter(user=request.user, key=key)
+        expired = timezone.now() - timedelta(seconds=IDEMPOTENCY_TTL)
+        with transaction.atomic():
+            keys.filter(created__lt=expired).delete()
+            try:
+                with transaction.atomic():
+                    claimed = IdempotencyKey.objects.create(
+                        user=request.user, key=key, fingerprint=fingerprint
+                    )
+            except IntegrityError:
+                stored = keys.first()
+                if stored is None or stored.status_code is None:
+                    return _in_progress()
+                return _replay(stored, fingerprint)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+                return response
+            claimed.status_code = response.status_code
+            claimed.response = response.data
+            claimed.save(update_fields=["status_code", "response"])
+            return response
+
+    return wrapper
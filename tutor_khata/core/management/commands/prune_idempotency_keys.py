@@ -0,0 +1,16 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tutor_khata.core.decorators import IDEMPOTENCY_TTL
+from tutor_khata.core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Deletes the Idempotency-Keys whose responses expired"
+
+    def handle(self, *args, **options):
+        expired = timezone.now() - timedelta(seconds=IDEMPOTENCY_TTL)
+        deleted, _ = IdempotencyKey.objects.filter(
+            created__lt=expired
+        ).delete()
+        self.stdout.write(f"Pruned {deleted} idempotency keys")
@@ -0,0 +1,31 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates the count of large unfiltered tables.
+
+    Counting every row of a large table is a full scan on PostgreSQL, so
+    unfiltered querysets are counted from the planner statistics instead.
+    Small tables, filtered querysets and other databases are counted
+    exactly.
+    """
+
+    estimate_threshold = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.estimate_threshold:
+                return int(row[0])
+        return super().count
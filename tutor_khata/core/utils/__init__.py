@@ -1,7 +1,25 @@
 from .queryset import chunk_queryset
 from .proxy import LazyProxy
+from .cache import (
+    get_cache_version,
+    get_cache_versions,
+    bump_cache_version,
+    bump_cache_versions,
+    is_cache_shared,
+)
+from .http import etag_matches
+from .phone import parse_phone, normalize_phone, normalize_many
 
 __all__ = [
     "chunk_queryset",
     "LazyProxy",
+    "get_cache_version",
+    "get_cache_versions",
+    "bump_cache_version",
+    "bump_cache_versions",
+    "is_cache_shared",
+    "etag_matches",
+    "parse_phone",
+    "normalize_phone",
+    "normalize_many",
 ]
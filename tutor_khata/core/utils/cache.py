@@ -0,0 +1,79 @@
+import time
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connection, transaction
+
+
+# Caches shared by every process, whose add and incr are atomic
+SHARED_CACHE_BACKENDS = (RedisCache, BaseMemcachedCache)
+
+
+def _new_version():
+    # Seeded from the clock so a version evicted from the cache never
+    # comes back with a number that an old cache entry was keyed with.
+    return time.time_ns() // 1000
+
+
+def get_cache_version(key):
+    """Get the version number stored under the given cache key."""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_cache_versions(keys):
+    """Get the version numbers of many keys in a single cache lookup."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = get_cache_version(key)
+    return versions
+
+
+def _bump(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _new_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def _bump_on_commit(keys):
+    # Until the transaction commits, other requests still read the old data
+    # and may cache it under the new version, so bump once more after it.
+    if connection.in_atomic_block:
+        transaction.on_commit(
+            lambda: [_bump(key) for key in keys], robust=True
+        )
+
+
+def bump_cache_version(key):
+    """
+    Invalidate everything cached under the current version of a key.
+
+    Inside a transaction, the version is bumped again once it commits.
+    """
+    version = _bump(key)
+    _bump_on_commit([key])
+    return version
+
+
+def bump_cache_versions(keys):
+    """Bump the versions of many keys at once."""
+    keys = list(keys)
+    for key in keys:
+        _bump(key)
+    _bump_on_commit(keys)
+
+
+def is_cache_shared(alias=DEFAULT_CACHE_ALIAS):
+    """Whether a cache is shared by every process and counts atomically.
+
+    Versions kept in a per-process cache are only bumped in the process
+    that made the change, and the database cache loses concurrent bumps,
+    so neither can prove data unchanged elsewhere."""
+    return isinstance(caches[alias], SHARED_CACHE_BACKENDS)
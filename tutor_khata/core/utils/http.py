@@ -0,0 +1,10 @@
+from django.utils.http import parse_etags
+
+
+def etag_matches(request, etag):
+    """Check whether the If-None-Match header of a request matches an ETag."""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags
@@ -0,0 +1,62 @@
+from functools import lru_cache
+import phonenumbers
+from django.conf import settings
+from phonenumber_field.phonenumber import PhoneNumber
+
+
+# Distinct phone numbers whose parsing is remembered
+PHONE_CACHE_SIZE = 10_000
+
+
+def _get_region(region):
+    return region or getattr(settings, "PHONENUMBER_DEFAULT_REGION", None)
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _parse(value, region):
+    try:
+        number = PhoneNumber.from_string(value, region=region)
+    except phonenumbers.NumberParseException:
+        return None, None
+    if not number.is_valid():
+        return None, None
+    return number, number.as_e164
+
+
+def parse_phone(value, region=None):
+    """Parse a phone number, or get None if it isn't a valid one.
+
+    Parsing is memoized, so the number is shared and must not be changed."""
+    if not value:
+        return None
+    return _parse(str(value).strip(), _get_region(region))[0]
+
+
+def normalize_phone(value, region=None):
+    """Get the E.164 form of a phone number, or None if it isn't valid."""
+    if isinstance(value, phonenumbers.PhoneNumber):
+        if not phonenumbers.is_valid_number(value):
+            return None
+        return phonenumbers.format_number(
+            value, phonenumbers.PhoneNumberFormat.E164
+        )
+    if not value:
+        return None
+    return _parse(str(value).strip(), _get_region(region))[1]
+
+
+def normalize_many(values, region=None):
+    """Get the E.164 form of many phone numbers, in order, parsing each
+    distinct one once."""
+    normalized = {}
+    result = []
+    for value in values:
+        key = str(value)
+        if key not in normalized:
+            normalized[key] = normalize_phone(value, region)
+        result.append(normalized[key])
+    return result
+
+
+def clear_phone_cache():
+    _parse.cache_clear()
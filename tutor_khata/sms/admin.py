@@ -0,0 +1,42 @@
+from django.contrib import admin, messages
+from django.utils.translation import gettext_lazy as _, ngettext
+from .models import OutboundSMS
+from .utils import retry_sms
+
+
+@admin.register(OutboundSMS)
+class OutboundSMSAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "phone",
+        "lane",
+        "status",
+        "attempts",
+        "created",
+        "sent_at",
+        "latency",
+    )
+    list_filter = ("status", "lane", "provider")
+    search_fields = ("phone", "provider_message_id")
+    ordering = ("-id",)
+    actions = ("retry",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description=_("Retry selected messages"))
+    def retry(self, request, queryset):
+        retried = retry_sms(queryset)
+        self.message_user(
+            request,
+            ngettext(
+                "%d message was queued again.",
+                "%d messages were queued again.",
+                retried,
+            )
+            % retried,
+            messages.SUCCESS,
+        )
@@ -0,0 +1,32 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tutor_khata.sms.models import OutboundSMS
+from tutor_khata.sms.utils import get_delivery_stats
+
+
+def _format(seconds):
+    return "-" if seconds is None else f"{seconds:.2f}s"
+
+
+class Command(BaseCommand):
+    help = "Shows the delivery latency of outbound SMS per lane"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=60,
+            help="Look at the messages of the last minutes",
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(minutes=options["minutes"])
+        for stats in get_delivery_stats(since):
+            lane = OutboundSMS.Lane(stats["lane"]).label
+            self.stdout.write(
+                f"{lane}: {stats['sent']} sent, {stats['failed']} failed, "
+                f"{stats['queued']} queued, latency avg "
+                f"{_format(stats['avg'])} p50 {_format(stats['p50'])} "
+                f"p95 {_format(stats['p95'])} max {_format(stats['max'])}"
+            )
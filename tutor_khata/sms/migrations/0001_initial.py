@@ -0,0 +1,159 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboundSMS",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "phone",
+                    models.CharField(
+                        help_text="Recipient's phone number in E.164 format",
+                        max_length=20,
+                        verbose_name="Phone",
+                    ),
+                ),
+                (
+                    "message",
+                    models.TextField(
+                        help_text="Text of the message", verbose_name="Message"
+                    ),
+                ),
+                (
+                    "lane",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Bulk"),
+                            (5, "Transactional"),
+                            (10, "OTP"),
+                        ],
+                        default=5,
+                        help_text="Priority lane of the message",
+                        verbose_name="Lane",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("sending", "Sending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        help_text="Delivery status of the message",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0,
+                        help_text="Number of times sending was attempted",
+                        verbose_name="Attempts",
+                    ),
+                ),
+                (
+                    "send_after",
+                    models.DateTimeField(
+                        help_text="Date and time from when the message may be sent",
+                        verbose_name="Send After",
+                    ),
+                ),
+                (
+                    "claimed_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the last attempt started",
+                        null=True,
+                        verbose_name="Claimed At",
+                    ),
+                ),
+                (
+                    "provider",
+                    models.CharField(
+                        blank=True,
+                        help_text="Gateway the message was sent through",
+                        max_length=50,
+                        verbose_name="Provider",
+                    ),
+                ),
+                (
+                    "provider_message_id",
+                    models.CharField(
+                        blank=True,
+                        help_text="ID of the message at the gateway",
+                        max_length=100,
+                        verbose_name="Provider Message ID",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True,
+                        help_text="Error of the last failed attempt",
+                        verbose_name="Error",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Date and time when the message was queued",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Date and time when the gateway accepted the message",
+                        null=True,
+                        verbose_name="Sent At",
+                    ),
+                ),
+                (
+                    "latency",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Seconds from queueing to being sent",
+                        null=True,
+                        verbose_name="Latency",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Outbound SMS",
+                "verbose_name_plural": "Outbound SMS",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "-lane", "send_after"],
+                        name="outboundsms_claim_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "sent_at"],
+                        name="outboundsms_sent_at_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
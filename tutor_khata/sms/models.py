@@ -0,0 +1,105 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+
+class OutboundSMS(models.Model):
+    class Lane(models.IntegerChoices):
+        # Higher lanes are sent first
+        BULK = 0, _("Bulk")
+        TRANSACTIONAL = 5, _("Transactional")
+        OTP = 10, _("OTP")
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", _("Queued")
+        SENDING = "sending", _("Sending")
+        SENT = "sent", _("Sent")
+        FAILED = "failed", _("Failed")
+
+    phone = models.CharField(
+        _("Phone"),
+        max_length=20,
+        help_text=_("Recipient's phone number in E.164 format"),
+    )
+    message = models.TextField(
+        _("Message"),
+        help_text=_("Text of the message"),
+    )
+    lane = models.PositiveSmallIntegerField(
+        _("Lane"),
+        choices=Lane,
+        default=Lane.TRANSACTIONAL,
+        help_text=_("Priority lane of the message"),
+    )
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=Status,
+        default=Status.QUEUED,
+        help_text=_("Delivery status of the message"),
+    )
+    attempts = models.PositiveSmallIntegerField(
+        _("Attempts"),
+        default=0,
+        help_text=_("Number of times sending was attempted"),
+    )
+    send_after = models.DateTimeField(
+        _("Send After"),
+        help_text=_("Date and time from when the message may be sent"),
+    )
+    claimed_at = models.DateTimeField(
+        _("Claimed At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the last attempt started"),
+    )
+    provider = models.CharField(
+        _("Provider"),
+        max_length=50,
+        blank=True,
+        help_text=_("Gateway the message was sent through"),
+    )
+    provider_message_id = models.CharField(
+        _("Provider Message ID"),
+        max_length=100,
+        blank=True,
+        help_text=_("ID of the message at the gateway"),
+    )
+    error = models.TextField(
+        _("Error"),
+        blank=True,
+        help_text=_("Error of the last failed attempt"),
+    )
+    created = models.DateTimeField(
+        _("Created"),
+        auto_now_add=True,
+        help_text=_("Date and time when the message was queued"),
+    )
+    sent_at = models.DateTimeField(
+        _("Sent At"),
+        null=True,
+        blank=True,
+        help_text=_("Date and time when the gateway accepted the message"),
+    )
+    latency = models.FloatField(
+        _("Latency"),
+        null=True,
+        blank=True,
+        help_text=_("Seconds from queueing to being sent"),
+    )
+
+    class Meta:
+        verbose_name = _("Outbound SMS")
+        verbose_name_plural = _("Outbound SMS")
+        indexes = [
+            models.Index(
+                fields=["status", "-lane", "send_after"],
+                name="outboundsms_claim_idx",
+            ),
+            models.Index(
+                fields=["status", "sent_at"],
+                name="outboundsms_sent_at_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"SMS to {self.phone} ({self.status})"
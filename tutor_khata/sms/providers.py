@@ -0,0 +1,100 @@
+"""
+SMS gateways.
+
+A provider sends one message to a batch of recipients, as many as its
+gateway takes in one request. Providers are created once per process,
+so HTTP gateways reuse the pooled connections of their session.
+"""
+
+import sys
+import time
+import uuid
+from collections import namedtuple
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# message_id is None if the recipient failed, with the reason in error
+SendResult = namedtuple("SendResult", ("phone", "message_id", "error"))
+
+
+class BaseProvider:
+    name = None
+    # Recipients of one message the gateway takes in a single request
+    max_recipients = 1
+
+    def send(self, phones, message):
+        """
+        Send a message to at most max_recipients phone numbers.
+
+        Returns:
+            list: SendResult of every phone number, in order.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ConsoleProvider(BaseProvider):
+    """Local stand-in writing the messages to stdout."""
+
+    name = "console"
+    max_recipients = 100
+
+    def __init__(self, delay=0, **options):
+        # Seconds a request takes, to play a real gateway
+        self.delay = delay
+
+    def send(self, phones, message):
+        if self.delay:
+            time.sleep(self.delay)
+        sys.stdout.write(f"SMS to {', '.join(phones)}: {message}\n")
+        return [SendResult(phone, uuid.uuid4().hex, None) for phone in phones]
+
+
+class HTTPProvider(BaseProvider):
+    """Gateway with an HTTP API, called through a pooled session."""
+
+    def __init__(self, pool_size=10, timeout=10, **options):
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Every worker thread may hold a connection
+        self.session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=pool_size),
+        )
+
+    def close(self):
+        self.session.close()
+
+
+class TwilioProvider(HTTPProvider):
+    name = "twilio"
+    api_url = "https://api.twilio.com/2010-04-01/Accounts/{}/Messages.json"
+
+    def __init__(self, account_sid, auth_token, from_number, **options):
+        super().__init__(**options)
+        self.url = self.api_url.format(account_sid)
+        self.auth = (account_sid, auth_token)
+        self.from_number = from_number
+
+    def send(self, phones, message):
+        results = []
+        for phone in phones:
+            try:
+                response = self.session.post(
+                    self.url,
+                    data={
+                        "To": phone,
+                        "From": self.from_number,
+                        "Body": message,
+                    },
+                    auth=self.auth,
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                results.append(SendResult(phone, response.json()["sid"], None))
+            except (requests.RequestException, KeyError, ValueError) as e:
+                results.append(SendResult(phone, None, str(e)))
+        return results
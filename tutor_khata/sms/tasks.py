@@ -0,0 +1,8 @@
+from command_scheduler.jobs import task
+from .utils import dispatch_outbox
+
+
+# Enqueued with the priority of the lane it's sending, so OTPs go first
+@task(queue="sms", max_attempts=3)
+def dispatch_sms():
+    dispatch_outbox()
@@ -0,0 +1,265 @@
+"""
+Outbound SMS pipeline.
+
+Messages are queued in the OutboundSMS outbox, in the caller's
+transaction, and a job in the sms queue is enqueued to send them, so
+sending takes a couple of INSERTs on the request path. The jobs claim
+batches of queued messages, highest lane first, group the recipients of
+the same text into multi-recipient requests where the provider allows,
+and keep under the provider's RATE_LIMIT. Failed messages are retried
+with backoff until they run out of attempts.
+"""
+
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from command_scheduler.jobs import enqueue
+from .models import OutboundSMS
+from .providers import SendResult
+
+
+DEFAULTS = {
+    "PROVIDER": "tutor_khata.sms.providers.ConsoleProvider",
+    "OPTIONS": {},
+    "BATCH_SIZE": 100,
+    # Messages per second per provider, 0 for no limit
+    "RATE_LIMIT": 0,
+    "CACHE_ALIAS": "default",
+    "MAX_ATTEMPTS": 3,
+}
+RETRY_SECONDS = 30
+# Messages still sending after this long were given up by their worker
+SENDING_TIMEOUT = timedelta(minutes=5)
+
+
+def get_sms_setting(name):
+    return getattr(settings, "SMS", {}).get(name, DEFAULTS[name])
+
+
+_provider = None
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        provider = import_string(get_sms_setting("PROVIDER"))
+        _provider = provider(**get_sms_setting("OPTIONS"))
+    return _provider
+
+
+def _enqueue_dispatch(lane, run_at=None):
+    # Imported here, as the tasks module imports this one
+    from .tasks import dispatch_sms
+
+    enqueue(dispatch_sms.name, priority=lane, run_at=run_at)
+
+
+def send_sms(phone, message, lane=OutboundSMS.Lane.TRANSACTIONAL):
+    """Queue a message to be sent in the background."""
+    return send_bulk_sms([phone], message, lane)[0]
+
+
+def send_bulk_sms(phones, message, lane=OutboundSMS.Lane.BULK):
+    """Queue a message to many recipients to be sent in the background."""
+    now = timezone.now()
+    messages = OutboundSMS.objects.bulk_create(
+        [
+            OutboundSMS(
+                phone=str(phone), message=message, lane=lane, send_after=now
+            )
+            for phone in phones
+        ]
+    )
+    for _ in range(0, len(messages), get_sms_setting("BATCH_SIZE")):
+        _enqueue_dispatch(lane)
+    return messages
+
+
+def _wait_for_rate(provider, count):
+    """Block until the provider may take count more messages."""
+    limit = get_sms_setting("RATE_LIMIT")
+    if not limit:
+        return
+    cache = caches[get_sms_setting("CACHE_ALIAS")]
+    while True:
+        window = int(time.time())
+        key = f"sms:rate:{provider.name}:{window}"
+        cache.add(key, 0, 2)
+        if cache.incr(key, count) <= limit:
+            return
+        cache.decr(key, count)
+        time.sleep(max(window + 1 - time.time(), 0))
+
+
+def _claim(batch_size, now):
+    with transaction.atomic():
+        ids = list(
+            OutboundSMS.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundSMS.Status.QUEUED, send_after__lte=now)
+            .order_by("-lane", "send_after", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        # Without row locks, like on SQLite, the status check settles races
+        OutboundSMS.objects.filter(
+            pk__in=ids, status=OutboundSMS.Status.QUEUED
+        ).update(
+            status=OutboundSMS.Status.SENDING,
+            claimed_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        OutboundSMS.objects.filter(
+            pk__in=ids, status=OutboundSMS.Status.SENDING, claimed_at=now
+        ).order_by("-lane", "send_after", "id")
+    )
+
+
+def _requeue_stale(now):
+    OutboundSMS.objects.filter(
+        status=OutboundSMS.Status.SENDING,
+        claimed_at__lt=now - SENDING_TIMEOUT,
+    ).update(status=OutboundSMS.Status.QUEUED, send_after=now)
+
+
+def _send(provider, messages):
+    try:
+        return provider.send(
+            [sms.phone for sms in messages], messages[0].message
+        )
+    except Exception as e:
+        return [SendResult(sms.phone, None, str(e)) for sms in messages]
+
+
+def dispatch_outbox(batch_size=None):
+    """
+    Send a batch of queued messages.
+
+    Returns:
+        dict: Number of messages sent, retried and failed.
+    """
+    batch_size = batch_size or get_sms_setting("BATCH_SIZE")
+    now = timezone.now()
+    _requeue_stale(now)
+    claimed = _claim(batch_size, now)
+    provider = get_provider()
+    chunk_size = provider.max_recipients
+    if get_sms_setting("RATE_LIMIT"):
+        chunk_size = min(chunk_size, get_sms_setting("RATE_LIMIT"))
+
+    groups = {}
+    for sms in claimed:
+        groups.setdefault((sms.lane, sms.message), []).append(sms)
+
+    counts = {"sent": 0, "retried": 0, "failed": 0}
+    retry_lanes = {}
+    for messages in groups.values():
+        for start in range(0, len(messages), chunk_size):
+            chunk = messages[start : start + chunk_size]
+            _wait_for_rate(provider, len(chunk))
+            results = _send(provider, chunk)
+            sent_at = timezone.now()
+            for sms, result in zip(chunk, results):
+                sms.provider = provider.name
+                sms.error = result.error or ""
+                if result.error is None:
+                    sms.status = OutboundSMS.Status.SENT
+                    sms.provider_message_id = result.message_id
+                    sms.sent_at = sent_at
+                    sms.latency = (sent_at - sms.created).total_seconds()
+                    counts["sent"] += 1
+                elif sms.attempts < get_sms_setting("MAX_ATTEMPTS"):
+                    sms.status = OutboundSMS.Status.QUEUED
+                    sms.send_after = sent_at + timedelta(
+                        seconds=RETRY_SECONDS * 2 ** (sms.attempts - 1)
+                    )
+                    retry_lanes[sms.lane] = min(
+                        sms.send_after,
+                        retry_lanes.get(sms.lane, sms.send_after),
+                    )
+                    counts["retried"] += 1
+                else:
+                    sms.status = OutboundSMS.Status.FAILED
+                    counts["failed"] += 1
+            OutboundSMS.objects.bulk_update(
+                chunk,
+                [
+                    "status",
+                    "provider",
+                    "provider_message_id",
+                    "error",
+                    "send_after",
+                    "sent_at",
+                    "latency",
+                ],
+            )
+
+    for lane, run_at in retry_lanes.items():
+        _enqueue_dispatch(lane, run_at)
+    if len(claimed) == batch_size:
+        # There may be more, don't wait for their own jobs
+        _enqueue_dispatch(claimed[-1].lane)
+    return counts
+
+
+def _percentile(values, percent):
+    return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+
+def get_delivery_stats(since):
+    """
+    Get the delivery latency of every lane since the given time.
+
+    Returns:
+        list: Per lane, the number of messages sent, failed and still
+            queued, and the average, median, 95th percentile and maximum
+            seconds from queueing to being sent.
+    """
+    stats = []
+    for lane in OutboundSMS.Lane:
+        messages = OutboundSMS.objects.filter(lane=lane)
+        latencies = list(
+            messages.filter(status=OutboundSMS.Status.SENT, sent_at__gte=since)
+            .order_by("latency")
+            .values_list("latency", flat=True)
+        )
+        stats.append(
+            {
+                "lane": lane,
+                "sent": len(latencies),
+                "failed": messages.filter(
+                    status=OutboundSMS.Status.FAILED, created__gte=since
+                ).count(),
+                "queued": messages.filter(
+                    status=OutboundSMS.Status.QUEUED
+                ).count(),
+                "avg": (
+                    sum(latencies) / len(latencies) if latencies else None
+                ),
+                "p50": _percentile(latencies, 50) if latencies else None,
+                "p95": _percentile(latencies, 95) if latencies else None,
+                "max": latencies[-1] if latencies else None,
+            }
+        )
+    return stats
+
+
+def retry_sms(queryset, now=None):
+    """Queue the given unsent messages again, with fresh attempts."""
+    now = now or timezone.now()
+    queryset = queryset.exclude(
+        status__in=(OutboundSMS.Status.SENDING, OutboundSMS.Status.SENT)
+    )
+    lanes = set(queryset.values_list("lane", flat=True))
+    retried = queryset.update(
+        status=OutboundSMS.Status.QUEUED, attempts=0, send_after=now
+    )
+    for lane in lanes:
+        _enqueue_dispatch(lane)
+    return retried
@@ -0,0 +1,5 @@
+class ImportFormatError(Exception):
+    """Raised when an import file can't be read as a roster."""
+
+    # Report of the chunks imported before the error, see import_roster
+    report = None
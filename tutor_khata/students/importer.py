@@ -0,0 +1,303 @@
+"""
+Bulk import of student rosters.
+
+A roster is a CSV or XLSX file with a header row and a student per row:
+
+    batch, grade, name, phone, guardian_name, guardian_phone
+
+Rows are read one at a time, so files of any size take constant memory,
+and imported in chunks of CHUNK_SIZE rows, each in its own transaction.
+Guardians are matched by their normalized phone number to the existing
+GuardianDevice rows, or created once, and batches of the teacher are
+matched by name and grade, or created. Invalid rows, including rows that
+aren't valid UTF-8, are skipped and reported with their row number and
+errors.
+
+A file found to be malformed midway raises ImportFormatError after the
+chunks before it were imported, carrying their report.
+"""
+
+import csv
+import io
+import os
+import openpyxl
+from django.db import transaction
+from tutor_khata.core.utils import normalize_many, parse_phone
+from .exceptions import ImportFormatError
+from .models import Batch, Grade, GuardianDevice, Student
+
+
+CHUNK_SIZE = 1000
+COLUMNS = (
+    "batch",
+    "grade",
+    "name",
+    "phone",
+    "guardian_name",
+    "guardian_phone",
+)
+NAME_MAX_LENGTH = 100
+FORMATS = ("csv", "xlsx")
+
+
+def get_format(file_name):
+    """Guess the format of an import file from its extension."""
+    extension = os.path.splitext(file_name or "")[1].lower().lstrip(".")
+    if extension not in FORMATS:
+        raise ImportFormatError(
+            f"Unsupported file type, expected one of: {', '.join(FORMATS)}"
+        )
+    return extension
+
+
+def _read_csv(file):
+    # Binary files, like uploads, are decoded as they are read, keeping
+    # undecodable bytes as lone surrogates to be reported by their row
+    if not isinstance(file, io.TextIOBase):
+        file = io.TextIOWrapper(
+            file, encoding="utf-8-sig", errors="surrogateescape", newline=""
+        )
+    try:
+        yield from csv.reader(file)
+    except csv.Error as e:
+        raise ImportFormatError(f"Invalid CSV file: {e}")
+
+
+def _is_decoded(value):
+    try:
+        value.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _read_xlsx(file):
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Invalid XLSX file: {e}")
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def read_rows(file, file_format):
+    """
+    Stream the rows of an import file.
+
+    Yields:
+        tuple: Row number, counting the header as 1, and the row as a dict
+            of the COLUMNS.
+    """
+    reader = _read_xlsx(file) if file_format == "xlsx" else _read_csv(file)
+    header = next(reader, None)
+    if header is None:
+        raise ImportFormatError("The file is empty")
+    header = [column.strip().lower().replace(" ", "_") for column in header]
+    missing = [column for column in COLUMNS if column not in header]
+    if missing:
+        raise ImportFormatError(f"Missing columns: {', '.join(missing)}")
+    indexes = {column: header.index(column) for column in COLUMNS}
+
+    for number, row in enumerate(reader, start=2):
+        if not any(value.strip() for value in row):
+            continue
+        yield number, {
+            column: row[index].strip() if index < len(row) else ""
+            for column, index in indexes.items()
+        }
+
+
+def _validate(row, phones, grades):
+    errors = {}
+    for column in ("batch", "name", "guardian_name"):
+        if not row[column]:
+            errors[column] = "This field is required."
+        elif len(row[column]) > NAME_MAX_LENGTH:
+            errors[column] = (
+                f"Ensure this field has no more than {NAME_MAX_LENGTH} "
+                "characters."
+            )
+    for column in ("phone", "guardian_phone"):
+        if phones[column] is None:
+            errors[column] = "Enter a valid phone number."
+    if row["grade"].lower() not in grades:
+        errors["grade"] = "Unknown grade."
+    for column, value in row.items():
+        if not _is_decoded(value):
+            errors[column] = "Invalid UTF-8 text."
+    return errors
+
+
+class RosterImport:
+    """Import of a roster for a teacher, keeping state between chunks."""
+
+    def __init__(self, teacher, region=None, chunk_size=CHUNK_SIZE):
+        self.teacher = teacher
+        self.region = region
+        self.chunk_size = chunk_size
+        # Grades by lowercased slug and name
+        self.grades = {}
+        for grade in Grade.objects.all():
+            self.grades[grade.slug.lower()] = grade
+            self.grades.setdefault(grade.name.lower(), grade)
+        self.batches = {
+            (batch.grade_id, batch.name.lower()): batch
+            for batch in Batch.objects.filter(teacher=teacher)
+        }
+        # Guardians by E.164 phone number, of the rows imported so far
+        self.guardians = {}
+
+    def _get_batches(self, rows):
+        for row in rows:
+            key = (row["grade"].pk, row["batch"].lower())
+            if key not in self.batches:
+                self.batches[key] = Batch.objects.create(
+                    teacher=self.teacher,
+                    grade=row["grade"],
+                    name=row["batch"],
+                )
+                row["batch_created"] = True
+            row["batch"] = self.batches[key]
+
+    def _get_guardians(self, rows):
+        phones = {row["guardian_phone"] for row in rows} - set(self.guardians)
+        for guardian in GuardianDevice.objects.filter(
+            phone_e164__in=phones
+        ).order_by("-id"):
+            # The oldest of duplicated guardians wins
+            self.guardians[guardian.phone_e164] = guardian
+        created = {}
+        for row in rows:
+            phone = row["guardian_phone"]
+            if phone not in self.guardians and phone not in created:
+                created[phone] = GuardianDevice(
+                    owner_name=row["guardian_name"],
+                    phone_number=row["guardian_number"],
+                    phone_e164=phone,
+                )
+        GuardianDevice.objects.bulk_create(created.values())
+        self.guardians.update(created)
+        return len(phones) - len(created), len(created)
+
+    def _import_chunk(self, chunk):
+        numbers = [number for number, _ in chunk]
+        rows = [row for _, row in chunk]
+        phones = normalize_many(
+            [
+                phone
+                for row in rows
+                for phone in (row["phone"], row["guardian_phone"])
+            ],
+            self.region,
+        )
+        errors = []
+        valid = []
+        for index, row in enumerate(rows):
+            row_phones = {
+                "phone": phones[2 * index],
+                "guardian_phone": phones[2 * index + 1],
+            }
+            row_errors = _validate(row, row_phones, self.grades)
+            if row_errors:
+                errors.append({"row": numbers[index], "errors": row_errors})
+                continue
+            valid.append(
+                {
+                    **row,
+                    **row_phones,
+                    "grade": self.grades[row["grade"].lower()],
+                    # Parsed already, so the model doesn't parse them again
+                    "number": parse_phone(row["phone"], self.region),
+                    "guardian_number": parse_phone(
+                        row["guardian_phone"], self.region
+                    ),
+                }
+            )
+
+        matched = created = 0
+        if valid:
+            with transaction.atomic():
+                self._get_batches(valid)
+                matched, created = self._get_guardians(valid)
+                Student.objects.bulk_create(
+                    [
+                        Student(
+                            guardian_device=self.guardians[
+                                row["guardian_phone"]
+                            ],
+                            batch=row["batch"],
+                            name=row["name"],
+                            phone_number=row["number"],
+                            phone_e164=row["phone"],
+                        )
+                        for row in valid
+                    ]
+                )
+        return {
+            "rows": len(rows),
+            "created": len(valid),
+            "guardians_matched": matched,
+            "guardians_created": created,
+            "batches_created": sum(
+                row.get("batch_created", False) for row in valid
+            ),
+            "errors": errors,
+        }
+
+    def run(self, rows):
+        """
+        Import the rows of a roster, see read_rows.
+
+        Yields:
+            dict: Metrics and row errors of every imported chunk.
+        """
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.chunk_size:
+                yield self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield self._import_chunk(chunk)
+
+
+def import_roster(teacher, file, file_format, region=None, errors_limit=None):
+    """
+    Import a roster file for a teacher.
+
+    Returns:
+        dict: Number of rows read, students created, guardians matched and
+            created and batches created, and the errors of the skipped
+            rows, the first errors_limit of them if given.
+
+    Raises:
+        ImportFormatError: If the file can't be read, with the report of
+            the chunks imported before, if any.
+    """
+    report = {
+        "rows": 0,
+        "created": 0,
+        "guardians_matched": 0,
+        "guardians_created": 0,
+        "batches_created": 0,
+        "skipped": 0,
+        "errors": [],
+    }
+    roster_import = RosterImport(teacher, region)
+    try:
+        for metrics in roster_import.run(read_rows(file, file_format)):
+            errors = metrics.pop("errors")
+            for key, value in metrics.items():
+                report[key] += value
+            report["skipped"] += len(errors)
+            if errors_limit is not None:
+                errors = errors[: errors_limit - len(report["errors"])]
+            report["errors"].extend(errors)
+    except ImportFormatError as e:
+        if report["rows"]:
+            e.report = report
+        raise
+    return report
@@ -0,0 +1,83 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from phonenumber_field.phonenumber import PhoneNumber
+from tutor_khata.core.utils import normalize_many, normalize_phone
+from tutor_khata.core.utils.phone import clear_phone_cache
+from tutor_khata.students.models import GuardianDevice
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the throughput of phone number parsing and lookups with "
+        "and without normalization. Nothing is persisted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--guardians", type=int, default=10_000)
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count, iterations = options["guardians"], options["iterations"]
+        numbers = [
+            f"+8801{random.choice('3456789')}{random.randrange(10**8):08d}"
+            for _ in range(count)
+        ]
+        # Guardians have a few students each, so imports repeat numbers
+        values = [random.choice(numbers[: count // 4 or 1]) for _ in numbers]
+
+        parsed = self._measure(
+            lambda: [self._parse(value) for value in values], len(values)
+        )
+        clear_phone_cache()
+        batched = self._measure(lambda: normalize_many(values), len(values))
+        # Every number is in the cache by now, as for repeated sign ins
+        cached = self._measure(
+            lambda: [normalize_phone(value) for value in values], len(values)
+        )
+        self.stdout.write(f"Parse:           {parsed:,.0f} numbers/s")
+        self.stdout.write(f"normalize_many:  {batched:,.0f} numbers/s")
+        self.stdout.write(f"Cached:          {cached:,.0f} numbers/s")
+
+        lookups = random.sample(numbers, min(iterations, count))
+        with transaction.atomic():
+            GuardianDevice.objects.bulk_create(
+                [
+                    GuardianDevice(
+                        owner_name="Guardian",
+                        phone_number=number,
+                        phone_e164=normalize_phone(number),
+                    )
+                    for number in numbers
+                ],
+                batch_size=1000,
+            )
+            by_field = self._measure(
+                lambda: [
+                    GuardianDevice.objects.filter(phone_number=number).exists()
+                    for number in lookups
+                ],
+                len(lookups),
+            )
+            by_index = self._measure(
+                lambda: [
+                    GuardianDevice.objects.with_phone(number).exists()
+                    for number in lookups
+                ],
+                len(lookups),
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Lookup by field: {by_field:,.0f} lookups/s")
+        self.stdout.write(f"Lookup by E.164: {by_index:,.0f} lookups/s")
+
+    def _parse(self, value):
+        # What normalizing takes without memoization
+        number = PhoneNumber.from_string(value)
+        return number.as_e164 if number.is_valid() else None
+
+    def _measure(self, operation, count):
+        started = time.perf_counter()
+        operation()
+        return count / (time.perf_counter() - started)
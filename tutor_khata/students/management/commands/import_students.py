@@ -0,0 +1,71 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from tutor_khata.students.exceptions import ImportFormatError
+from tutor_khata.students.importer import (
+    CHUNK_SIZE,
+    RosterImport,
+    get_format,
+    read_rows,
+)
+from tutor_khata.teachers.models import Teacher
+
+
+class Command(BaseCommand):
+    help = "Imports a CSV or XLSX roster of students for a teacher"
+
+    def add_arguments(self, parser):
+        parser.add_argument("teacher_id", type=int)
+        parser.add_argument("path")
+        parser.add_argument(
+            "--region",
+            help="Region of phone numbers without a country code, e.g. BD",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            teacher = Teacher.objects.get(pk=options["teacher_id"])
+        except Teacher.DoesNotExist as e:
+            raise CommandError(str(e))
+
+        roster_import = RosterImport(
+            teacher, options["region"], options["chunk_size"]
+        )
+        started = time.perf_counter()
+        total_rows = total_created = total_skipped = 0
+        try:
+            file_format = get_format(options["path"])
+            with open(options["path"], "rb") as file:
+                rows = read_rows(file, file_format)
+                for metrics in roster_import.run(rows):
+                    total_rows += metrics["rows"]
+                    total_created += metrics["created"]
+                    total_skipped += len(metrics["errors"])
+                    for error in metrics["errors"]:
+                        self.stderr.write(
+                            f"Row {error['row']}: "
+                            + "; ".join(
+                                f"{column}: {message}"
+                                for column, message in error["errors"].items()
+                            )
+                        )
+                    self.stdout.write(
+                        f"{metrics['rows']} rows: {metrics['created']} "
+                        f"students, {metrics['guardians_created']} new and "
+                        f"{metrics['guardians_matched']} existing guardians, "
+                        f"{metrics['batches_created']} new batches"
+                    )
+        except (ImportFormatError, OSError) as e:
+            if total_rows:
+                self.stderr.write(
+                    f"Stopped after importing {total_created} of "
+                    f"{total_rows} rows"
+                )
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Imported {total_created} of {total_rows} rows, skipped "
+            f"{total_skipped}, in {elapsed:.2f}s "
+            f"({total_rows / elapsed if elapsed else 0:,.0f} rows/s)"
+        )
@@ -2,9 +2,45 @@ from django.db import models
 from phonenumber_field.modelfields import (
     PhoneNumberField,
 )
+from tutor_khata.core.utils import normalize_many, normalize_phone
 from tutor_khata.teachers.models import Teacher
 
 
+class PhoneQuerySet(models.QuerySet):
+    def with_phone(self, phone):
+        """Filter by a phone number in any format, through the E.164
+        index."""
+        phone = normalize_phone(phone)
+        if phone is None:
+            return self.none()
+        return self.filter(phone_e164=phone)
+
+    def with_phones(self, phones):
+        phones = {phone for phone in normalize_many(phones) if phone}
+        return self.filter(phone_e164__in=phones)
+
+
+class PhoneE164Model(models.Model):
+    """Keeps phone_e164 the canonical form of phone_number, so lookups are
+    exact index hits without parsing, see PhoneQuerySet."""
+
+    phone_e164 = models.CharField(
+        max_length=16, blank=True, db_index=True, editable=False
+    )
+
+    objects = PhoneQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.phone_e164 = normalize_phone(self.phone_number) or ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone_number" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_e164"}
+        super().save(*args, **kwargs)
+
+
 class Grade(models.Model):
     slug = models.SlugField(unique=True)
     name = models.CharField(max_length=100)
@@ -22,7 +58,7 @@ class Batch(models.Model):
         return self.name
 
 
-class GuardianDevice(models.Model):
+class GuardianDevice(PhoneE164Model):
     owner_name = models.CharField(max_length=100)
     phone_number = PhoneNumberField()
     os_name = models.CharField(max_length=100, null=True, blank=True)
@@ -31,7 +67,7 @@ class GuardianDevice(models.Model):
         return self.owner_name
 
 
-class Student(models.Model):
+class Student(PhoneE164Model):
     guardian_device = models.ForeignKey(
         GuardianDevice, on_delete=models.PROTECT
     )
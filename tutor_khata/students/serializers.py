@@ -0,0 +1,26 @@
+import phonenumbers
+from rest_framework import serializers
+
+
+class RosterImportSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="CSV or XLSX roster")
+    region = serializers.ChoiceField(
+        choices=sorted(phonenumbers.SUPPORTED_REGIONS),
+        required=False,
+        help_text="Region of phone numbers without a country code",
+    )
+
+
+class RosterImportErrorSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    errors = serializers.DictField(child=serializers.CharField())
+
+
+class RosterImportReportSerializer(serializers.Serializer):
+    rows = serializers.IntegerField()
+    created = serializers.IntegerField()
+    guardians_matched = serializers.IntegerField()
+    guardians_created = serializers.IntegerField()
+    batches_created = serializers.IntegerField()
+    skipped = serializers.IntegerField()
+    errors = RosterImportErrorSerializer(many=True)
@@ -1,3 +1,70 @@
-from django.test import TestCase
+import io
+import openpyxl
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from tutor_khata.accounts.models import User
+from tutor_khata.core.models import AppSettings
+from .importer import CHUNK_SIZE
+from .models import Grade, Student
 
-# Create your tests here.
+
+HEADER = b"batch,grade,name,phone,guardian_name,guardian_phone\r\n"
+
+
+def _row(number, name=b"Student"):
+    return (
+        b"Morning,class-8,"
+        + name
+        + f",+8801711{number:06d},Guardian,+8801811{number:06d}\r\n".encode()
+    )
+
+
+class RosterImportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AppSettings.set("teacher_capacity_per_day", "1000")
+        cls.user = User.objects.create_user("+8801711111111", "password")
+        Grade.objects.create(slug="class-8", name="Class 8")
+
+    def setUp(self):
+        user = User.objects.with_teacher().get(pk=self.user.pk)
+        self.client.force_authenticate(user)
+
+    def _import(self, content, name="roster.csv"):
+        return self.client.post(
+            reverse("students_import"),
+            {"file": SimpleUploadedFile(name, content)},
+            format="multipart",
+        )
+
+    def test_xlsx_roster_is_imported(self):
+        workbook = openpyxl.Workbook()
+        for line in (HEADER + _row(1) + _row(2)).decode().splitlines():
+            workbook.active.append(line.split(","))
+        file = io.BytesIO()
+        workbook.save(file)
+        response = self._import(file.getvalue(), "roster.xlsx")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 2)
+
+    def test_rows_with_invalid_utf8_are_reported(self):
+        response = self._import(
+            HEADER + _row(1) + _row(2, name=b"\xff\xfe") + _row(3)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["skipped"], 1)
+        self.assertEqual(
+            response.data["errors"],
+            [{"row": 3, "errors": {"name": "Invalid UTF-8 text."}}],
+        )
+
+    def test_malformed_file_reports_the_imported_chunks(self):
+        rows = b"".join(_row(number) for number in range(CHUNK_SIZE))
+        # Longer than the csv module accepts
+        too_long = _row(CHUNK_SIZE, name=b"x" * 200_000)
+        response = self._import(HEADER + rows + too_long)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["report"]["created"], CHUNK_SIZE)
+        self.assertEqual(Student.objects.count(), CHUNK_SIZE)
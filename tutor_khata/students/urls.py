@@ -0,0 +1,11 @@
+from django.urls import path
+from .views import RosterImportView
+
+
+urlpatterns = [
+    path(
+        "students/import/",
+        RosterImportView.as_view(),
+        name="students_import",
+    ),
+]
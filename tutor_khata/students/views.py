@@ -1,3 +1,47 @@
-from django.shortcuts import render
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema
 
-# Create your views here.
+from tutor_khata.teachers.utils import get_request_teacher
+from .exceptions import ImportFormatError
+from .importer import get_format, import_roster
+from .serializers import RosterImportSerializer, RosterImportReportSerializer
+
+
+# Errors in the response, the rest are only counted
+ERRORS_LIMIT = 1000
+
+
+class RosterImportView(APIView):
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (MultiPartParser,)
+
+    @extend_schema(
+        request=RosterImportSerializer,
+        responses={
+            status.HTTP_200_OK: RosterImportReportSerializer,
+            status.HTTP_400_BAD_REQUEST: None,
+        },
+    )
+    def post(self, request):
+        serializer = RosterImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        file = serializer.validated_data["file"]
+        try:
+            report = import_roster(
+                get_request_teacher(request),
+                file.file,
+                get_format(file.name),
+                region=serializer.validated_data.get("region"),
+                errors_limit=ERRORS_LIMIT,
+            )
+        except ImportFormatError as e:
+            data = {"detail": str(e)}
+            if e.report is not None:
+                # The rows before the error were imported already
+                data["report"] = RosterImportReportSerializer(e.report).data
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(RosterImportReportSerializer(report).data)
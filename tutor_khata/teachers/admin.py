@@ -1,4 +1,19 @@
 from django.contrib import admin
+from tutor_khata.core.paginator import EstimatedCountPaginator
 from .models import Teacher
 
-admin.site.register(Teacher)
+
+@admin.register(Teacher)
+class TeacherAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "user",
+        "fee_day",
+        "sms_tokens_count",
+        "free_sms_tokens_count",
+    )
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    search_fields = ("name", "user__phone_number")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvatarUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the uploaded file', max_length=255, verbose_name='Name')),
+                ('content', models.BinaryField(help_text='Content of the uploaded file', verbose_name='Content')),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='Date and time when the avatar was uploaded', verbose_name='Created')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='avatar_uploads', to='teachers.teacher')),
+            ],
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.dispatch import receiver
 from django.utils.translation import (
     gettext_lazy as _,
 )
+from tutor_khata.accounts.cache import bump_user_version
 from tutor_khata.core.fields import ImgBBImageField
 from tutor_khata.core.models import AppSettings
 from .utils import get_best_fee_day
@@ -56,6 +57,36 @@ class Teacher(models.Model):
         return self.name
 
 
+class AvatarUpload(models.Model):
+    """An uploaded avatar waiting for a worker to upload it to ImgBB.
+
+    Kept in the database, which every worker shares, unlike the local
+    default storage."""
+
+    teacher = models.ForeignKey(
+        Teacher,
+        on_delete=models.CASCADE,
+        related_name="avatar_uploads",
+    )
+    name = models.CharField(
+        _("Name"),
+        max_length=255,
+        help_text=_("Name of the uploaded file"),
+    )
+    content = models.BinaryField(
+        _("Content"),
+        help_text=_("Content of the uploaded file"),
+    )
+    created = models.DateTimeField(
+        _("Created"),
+        auto_now_add=True,
+        help_text=_("Date and time when the avatar was uploaded"),
+    )
+
+    def __str__(self):
+        return self.name
+
+
 @receiver(
     models.signals.post_save,
     sender=settings.AUTH_USER_MODEL,
@@ -73,3 +104,13 @@ def create_teacher(sender, instance, created, **kwargs):
         fee_day=get_best_fee_day(),
         free_sms_tokens_count=monthly_free_sms_tokens_count,
     )
+
+
+@receiver(
+    [models.signals.post_save, models.signals.post_delete],
+    sender=Teacher,
+    dispatch_uid="invalidate_teacher_user",
+)
+def invalidate_teacher_user(sender, instance, **kwargs):
+    # Users are cached with their teacher
+    bump_user_version(instance.user_id)
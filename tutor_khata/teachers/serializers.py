@@ -4,6 +4,7 @@ from drf_spectacular.utils import extend_schema_field, inline_serializer
 from tutor_khata.accounts.models import User
 from .models import Teacher
 from .mixins import TeacherAvatarLinkSerializerMixin
+from .tasks import stage_avatar, upload_avatar
 from .utils import is_day_available_for_fee
 
 
@@ -82,6 +83,17 @@ class SelfTeacherDetailsSerializer(serializers.ModelSerializer):
             "free_sms_tokens_count",
         )
 
+    def update(self, teacher, validated_data):
+        # A cleared avatar is saved as usual
+        avatar = validated_data.get("avatar")
+        if avatar:
+            del validated_data["avatar"]
+        teacher = super().update(teacher, validated_data)
+        if avatar:
+            # Uploading to ImgBB is slow, the new avatar shows up once done
+            upload_avatar.enqueue(stage_avatar(teacher, avatar))
+        return teacher
+
     def validate_fee_day(self, value):
         if not is_day_available_for_fee(value):
             raise serializers.ValidationError("Huge number of teachers are taking fees on this day! Please choose another day.")
@@ -0,0 +1,39 @@
+from django.core.files.base import ContentFile
+from command_scheduler.jobs import task
+from tutor_khata.accounts.cache import bump_user_version
+from .models import AvatarUpload, Teacher
+
+
+def stage_avatar(teacher, avatar):
+    """Keep an uploaded avatar in the database for upload_avatar.
+
+    Returns:
+        int: Id of the staged AvatarUpload.
+    """
+    avatar.seek(0)
+    return AvatarUpload.objects.create(
+        teacher=teacher, name=avatar.name, content=avatar.read()
+    ).pk
+
+
+@task(queue="uploads")
+def upload_avatar(upload_id):
+    """Upload an avatar staged by stage_avatar to ImgBB and set it."""
+    upload = (
+        AvatarUpload.objects.select_related("teacher")
+        .filter(pk=upload_id)
+        .first()
+    )
+    if upload is None:
+        # Uploaded by an earlier run already, or the teacher is gone
+        return
+    teacher = upload.teacher
+    teacher.avatar.save(
+        upload.name, ContentFile(bytes(upload.content)), save=False
+    )
+    # Leave the other fields alone, they may have changed meanwhile
+    Teacher.objects.filter(pk=teacher.pk).update(avatar=teacher.avatar.name)
+    # update() sends no post_save, and users are cached with their teacher
+    bump_user_version(teacher.user_id)
+    # Kept until now, so a failed upload can be retried
+    upload.delete()
@@ -35,3 +35,22 @@ def get_best_fee_day():
 
 def is_day_available_for_fee(day):
     return day in get_available_fee_days()
+
+
+def get_request_teacher(request):
+    """Get the teacher of the authenticated user, loaded once per request
+    together with its subscription, plan and price."""
+    from .models import Teacher
+
+    user = request.user
+    if type(user).teacher.is_cached(user):
+        teacher = user.teacher
+        if Teacher.subscription.is_cached(teacher):
+            return teacher
+
+    teacher = Teacher.objects.select_related(
+        "subscription__plan", "subscription__price"
+    ).get(user=user)
+    # Caches the teacher on the user, so request.user.teacher reuses it
+    user.teacher = teacher
+    return teacher
@@ -11,7 +11,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 
-from .utils import get_available_fee_days
+from .utils import get_available_fee_days, get_request_teacher
 from .models import Teacher
 from .serializers import (
     TeacherListSerializer,
@@ -34,7 +34,7 @@ class SelfTeacherDetailsView(RetrieveUpdateAPIView):
     serializer_class = SelfTeacherDetailsSerializer
 
     def get_object(self):
-        return self.request.user.teacher
+        return get_request_teacher(self.request)
 
 
 class AvailableFeeDaysView(APIView):
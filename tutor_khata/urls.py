@@ -15,6 +15,14 @@ urlpatterns = [
         "api/",
         include("tutor_khata.billing.urls"),
     ),
+    path(
+        "api/",
+        include("tutor_khata.analytics.urls"),
+    ),
+    path(
+        "api/",
+        include("tutor_khata.students.urls"),
+    ),
 ]
 
 